@@ -0,0 +1,155 @@
+from src.common.logger import get_logger
+from .write_behind import WriteBehindQueue
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import time
+import traceback
+
+logger = get_logger("Silence")
+logger_save = get_logger("Silence_Save")
+
+class ArchiveUtils:
+    """
+    沉默期间所见消息的归档
+    - 事件处理器只把记录放进有界队列（队列满时直接丢弃并计数），从不等待磁盘或控制台
+    - 后台协程批量把记录以 JSONL 格式追加到归档文件，文件超过大小上限时轮转并用 gzip 压缩旧文件
+    - 控制台输出按聊天流做令牌桶限流，刷屏时只打印一部分，并在下一条打印时注明省略了多少条
+    """
+
+    _queue: Optional[WriteBehindQueue] = None
+
+    _path: Optional[str] = None  # 为 None 时不写归档文件
+    _max_bytes: int = 10 * 1024 * 1024
+    _backup_count: int = 5
+
+    _console_rate: float = 0.5  # 每个聊天流每秒补充的令牌数
+    _console_burst: float = 10.0
+    _buckets: Dict[str, List[float]] = {}  # 格式: {stream_id: [剩余令牌, 上次补充时间, 被省略的条数]}
+
+    @classmethod
+    def configure(
+        cls,
+        archive: bool = False,
+        path: Optional[str] = None,
+        max_mb: float = 10.0,
+        backup_count: int = 5,
+        console_per_minute: float = 30.0,
+        console_burst: int = 10,
+        max_size: int = 5000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+    ):
+        """设置归档与控制台输出参数（需要在第一条记录入队之前调用）"""
+        if archive:
+            if not path:
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                path = os.path.join(script_dir, "silence_archive", "archive.jsonl")
+            cls._path = path
+        else:
+            cls._path = None
+        cls._max_bytes = max(1, int(max_mb * 1024 * 1024))
+        cls._backup_count = max(0, backup_count)
+        cls._console_rate = max(0.0, console_per_minute) / 60.0
+        cls._console_burst = float(max(0, console_burst))
+        cls._buckets = {}
+        cls._queue = WriteBehindQueue("沉默消息归档队列", cls._write_batch, max_size, batch_size, flush_interval)
+
+    @classmethod
+    def record(cls, stream_id: str, chat_name: str, user_id: Any, nickname: Any, text: str) -> bool:
+        """
+        记录一条沉默期间的消息（不会等待），返回是否成功放入队列
+        """
+        if cls._queue is None:
+            cls.configure()
+        console = cls._take_console_token(stream_id)
+        if cls._path is None and console is None:
+            return True
+        entry = (time.time(), stream_id, chat_name, user_id, nickname, text, console)
+        return cls._queue.put_nowait(entry)  # type: ignore
+
+    @classmethod
+    async def drain(cls, timeout: float = 10.0):
+        """写完队列中剩余的记录（插件停止时调用）"""
+        if cls._queue is not None:
+            await cls._queue.drain(timeout)
+
+    @classmethod
+    def dropped(cls) -> int:
+        """因队列满而丢弃的记录数"""
+        return cls._queue.dropped if cls._queue is not None else 0
+
+    @classmethod
+    def _take_console_token(cls, stream_id: str) -> Optional[int]:
+        """
+        从聊天流的令牌桶取一个令牌
+        返回: None 表示这条不打印到控制台，否则为此前被省略的条数
+        """
+        if cls._console_burst <= 0:
+            return None
+        now = time.monotonic()
+        bucket = cls._buckets.get(stream_id)
+        if bucket is None:
+            bucket = cls._buckets[stream_id] = [cls._console_burst, now, 0]
+        else:
+            bucket[0] = min(cls._console_burst, bucket[0] + (now - bucket[1]) * cls._console_rate)
+            bucket[1] = now
+        if bucket[0] < 1.0:
+            bucket[2] += 1
+            return None
+        bucket[0] -= 1.0
+        skipped = int(bucket[2])
+        bucket[2] = 0
+        return skipped
+
+    @classmethod
+    async def _write_batch(cls, batch: List[Tuple[Any, ...]]):
+        lines = []
+        for timestamp, stream_id, chat_name, user_id, nickname, text, console in batch:
+            if console is not None:
+                suffix = f"（此前省略 {console} 条）" if console else ""
+                logger_save.info(f"[{chat_name}](沉默中，已记录){nickname}:{text}{suffix}")
+            if cls._path is not None:
+                lines.append(json.dumps(
+                    {"ts": timestamp, "stream_id": stream_id, "chat": chat_name, "user_id": user_id, "nickname": nickname, "text": text},
+                    ensure_ascii=False,
+                ))
+        if lines:
+            # 文件写入和压缩放到线程里，不占用事件循环
+            await asyncio.to_thread(cls._append, cls._path, lines)
+
+    @classmethod
+    def _append(cls, path: str, lines: List[str]):
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if size and size + len(data) > cls._max_bytes:
+            cls._rotate(path)
+        with open(path, "ab") as f:
+            f.write(data)
+
+    @classmethod
+    def _rotate(cls, path: str):
+        """archive.jsonl -> archive.jsonl.1.gz -> archive.jsonl.2.gz ...，超出保留数量的最旧文件被删除"""
+        try:
+            if cls._backup_count <= 0:
+                os.remove(path)
+                return
+            oldest = f"{path}.{cls._backup_count}.gz"
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for index in range(cls._backup_count - 1, 0, -1):
+                source = f"{path}.{index}.gz"
+                if os.path.exists(source):
+                    os.replace(source, f"{path}.{index + 1}.gz")
+            with open(path, "rb") as src, gzip.open(f"{path}.1.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+        except Exception as e:
+            logger.error(f"轮转沉默消息归档文件失败: {str(e)}\n{traceback.format_exc()}")
@@ -0,0 +1,125 @@
+from src.common.logger import get_logger
+from .silence_utils import SilenceUtils
+from .silence_config import SilenceConfig
+from .cache_utils import BoundedCache, MISSING
+from array import array
+from typing import Dict, Optional
+import time
+
+logger = get_logger("Silence")
+
+class _RateWindow:
+    """
+    单个聊天流的滑动窗口计数器
+    - 窗口被切成固定数量的桶，用一个定长环形数组保存每个桶的消息数，内存占用与消息量无关
+    - 时间前进时只清空被跳过的桶，同时维护窗口内的总数，读取速率是 O(1)
+    """
+
+    __slots__ = ("counts", "total", "head")
+
+    def __init__(self, buckets: int, slot: int):
+        self.counts = array("I", bytes(4 * buckets))
+        self.total = 0
+        self.head = slot  # 最新一个桶对应的时间片序号
+
+    def add(self, slot: int) -> int:
+        """在时间片 slot 记一条消息，返回窗口内的消息总数"""
+        counts = self.counts
+        size = len(counts)
+        steps = slot - self.head
+        if steps > 0:
+            if steps >= size:
+                for index in range(size):
+                    counts[index] = 0
+                self.total = 0
+            else:
+                for offset in range(1, steps + 1):
+                    index = (self.head + offset) % size
+                    self.total -= counts[index]
+                    counts[index] = 0
+            self.head = slot
+        counts[slot % size] += 1
+        self.total += 1
+        return self.total
+
+class AutoSilence:
+    """
+    按消息速率自动沉默（实验性功能）
+    - 每条群聊消息都计入所在聊天流的滑动窗口
+    - 窗口内消息数达到阈值时通过 SilenceUtils.add_silence 施加 low 或 medium 沉默（自然语言层），省下刷屏时的规划和回复开销
+    - 自动施加的沉默在速率回落到解除阈值以下时只撤掉自然语言层；这一层被覆盖或解除后不再插手，更高层的沉默不受影响
+    - 被指令或艾特提前解除后，在一个窗口长度内不再自动施加，避免手动解除只维持一条消息
+    """
+
+    # 每个窗口切分的桶数
+    _BUCKETS = 12
+
+    _windows = BoundedCache(4096)
+    _width: float = 0.0  # 每个桶的时长（秒），窗口长度变化时所有计数器重置
+    _auto: Dict[str, Optional[float]] = {}  # 格式: {stream_id: 自动施加的沉默的过期时间戳}
+    _cooldown: Dict[str, float] = {}  # 格式: {stream_id: 冷却结束的时间（与 now 同一时钟）}，提前被解除后暂不自动施加
+
+    @classmethod
+    def observe(cls, stream_id: str, config: SilenceConfig, now: Optional[float] = None):
+        """记录一条消息，并按当前速率施加或解除自动沉默"""
+        width = config.auto_silence_window / cls._BUCKETS
+        if width != cls._width:
+            cls._windows.clear()
+            cls._width = width
+
+        now = time.monotonic() if now is None else now
+        slot = int(now // width)
+        window = cls._windows.get(stream_id)
+        if window is MISSING:
+            window = _RateWindow(cls._BUCKETS, slot)
+            cls._windows.set(stream_id, window)
+        rate = window.add(slot)
+
+        # 已经处于自动沉默中，检查是否可以解除
+        if stream_id in cls._auto:
+            exists, expiration = SilenceUtils.get_expiration(stream_id, "action")
+            if not exists or expiration != cls._auto[stream_id]:
+                # 已过期，或者被艾特、指令解除或覆盖了，不再由自动沉默管理
+                recorded = cls._auto.pop(stream_id)
+                if not exists and recorded is not None and recorded > time.time():
+                    # 还没到期就被解除，说明是管理员或艾特主动解除的，冷却一个窗口长度
+                    cls._cooldown[stream_id] = now + config.auto_silence_window
+                    logger.info(f"聊天流 {stream_id} 的自动沉默被提前解除，{config.auto_silence_window:g}秒内不再自动沉默")
+            elif rate <= config.auto_silence_release_rate:
+                del cls._auto[stream_id]
+                SilenceUtils.remove_silence(stream_id, "action")
+                logger.info(f"聊天流 {stream_id} 的消息速率已回落到 {rate} 条/{config.auto_silence_window:g}秒，解除自动沉默")
+            return
+
+        if config.auto_silence_medium_rate and rate >= config.auto_silence_medium_rate:
+            case = "medium"
+        elif config.auto_silence_low_rate and rate >= config.auto_silence_low_rate:
+            case = "low"
+        else:
+            return
+
+        # 被手动解除后的冷却期内不施加
+        cooldown = cls._cooldown.get(stream_id)
+        if cooldown is not None:
+            if now < cooldown:
+                return
+            del cls._cooldown[stream_id]
+
+        # 已经因为其他原因沉默时不重复施加
+        if SilenceUtils.is_silenced(stream_id)[0]:
+            return
+        if SilenceUtils.add_silence(case, None, stream_id):
+            cls._auto[stream_id] = SilenceUtils.get_expiration(stream_id, "action")[1]
+            logger.info(f"聊天流 {stream_id} 的消息速率达到 {rate} 条/{config.auto_silence_window:g}秒，自动进入 {case} 沉默")
+
+    @classmethod
+    def is_auto(cls, stream_id: str) -> bool:
+        """聊天流当前的沉默是否由自动沉默施加"""
+        return stream_id in cls._auto
+
+    @classmethod
+    def clear(cls):
+        """清空所有计数器和自动沉默记录"""
+        cls._windows.clear()
+        cls._auto.clear()
+        cls._cooldown.clear()
@@ -0,0 +1,290 @@
+"""
+沉默插件离线性能测试
+- 用桩模块代替麦麦主程序，回放合成的消息流（沉默/非沉默聊天流、图片、艾特、命令、禁言通知混合）
+- 报告两个事件处理器以及 MuteUtils / SilenceUtils 的吞吐量、p50/p99 延迟和内存分配情况
+- 可以保存结果并与之前的结果比较，超出容忍范围时以非零状态码退出，方便升级前发现性能回退
+
+用法（在插件目录下）:
+    python benchmarks/bench_handlers.py
+    python benchmarks/bench_handlers.py --messages 50000 --db-latency-ms 2 --json bench_output.json
+    python benchmarks/bench_handlers.py --compare bench_output.json --tolerance 0.2
+"""
+
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import host_stubs  # noqa: E402
+
+host_stubs.install()
+plugin = host_stubs.load_plugin()
+
+from silence_plugin.silence_utils import SilenceUtils  # noqa: E402
+from silence_plugin.silence_config import SilenceConfig  # noqa: E402
+from silence_plugin.mute_utils import MuteUtils  # noqa: E402
+from silence_plugin.storage_utils import StorageUtils  # noqa: E402
+from silence_plugin.learning_scheduler import LearningScheduler  # noqa: E402
+from silence_plugin.silence_stats import SilenceStats  # noqa: E402
+
+PLATFORM = "qq"
+
+class Workload:
+    """按参数生成的一段确定性合成消息流"""
+
+    def __init__(self, args: argparse.Namespace):
+        rng = random.Random(args.seed)
+        self.streams: List[Tuple[str, str]] = []  # [(stream_id, group_id)]
+        for i in range(args.streams):
+            group_id = str(100000 + i)
+            stream_id = SilenceUtils.generate_stream_id(PLATFORM, "", group_id)
+            host_stubs.chat_manager.streams[stream_id] = host_stubs.ChatStream(stream_id, group_id, PLATFORM)
+            self.streams.append((stream_id, group_id))
+
+        silenced_count = int(args.streams * args.silenced_ratio)
+        self.silenced = [stream_id for stream_id, _ in self.streams[:silenced_count]]
+
+        picids = [f"pic{i}" for i in range(args.picids)]
+        host_stubs.Images.table = {picid: f"描述{picid}" for picid in picids[: len(picids) * 4 // 5]}
+
+        self.messages: List[Tuple[Any, Any]] = []
+        for n in range(args.messages):
+            stream_id, group_id = self.streams[rng.randrange(len(self.streams))]
+            user_id = str(200000 + rng.randrange(args.users))
+            roll = rng.random()
+            if roll < args.notify_ratio:
+                sub_type = rng.choice(["ban", "lift_ban", "whole_ban", "whole_lift_ban"])
+                data = {
+                    "sub_type": sub_type,
+                    "duration": 600,
+                    "banned_user_info": {"user_id": int(host_stubs.BOT_QQ)},
+                    "lifted_user_info": {"user_id": int(host_stubs.BOT_QQ)},
+                }
+                segments = [host_stubs.Seg("notify", data)]
+                text = ""
+            else:
+                roll = rng.random()
+                if roll < args.command_ratio:
+                    text = rng.choice(["/help", "/status", "/echo hi", "/silence status"])
+                elif roll < args.command_ratio + args.at_ratio:
+                    text = f"@<麦麦:{host_stubs.BOT_QQ}> 在吗"
+                elif roll < args.command_ratio + args.at_ratio + args.picid_ratio:
+                    text = f"看这个[picid:{rng.choice(picids)}]哈哈[picid:{rng.choice(picids)}]"
+                else:
+                    text = f"普通的聊天消息 {n}"
+                segments = [host_stubs.Seg("text", text)]
+
+            message = host_stubs.MaiMessages(
+                message_segments=segments,
+                message_base_info={"platform": PLATFORM, "user_id": user_id, "user_nickname": f"用户{user_id}", "group_id": group_id},
+                plain_text=text,
+                is_group_message=True,
+                stream_id=stream_id,
+            )
+            original = SimpleNamespace(
+                processed_plain_text=text,
+                message_info=SimpleNamespace(platform=PLATFORM, user_info=SimpleNamespace(user_id=user_id, user_nickname=f"用户{user_id}")),
+                chat_stream=host_stubs.chat_manager.streams[stream_id],
+            )
+            self.messages.append((message, original))
+
+    def reset_state(self):
+        """恢复初始的沉默状态（被艾特打断的聊天流重新进入沉默）"""
+        for stream_id in self.silenced:
+            if not SilenceUtils.is_silenced(stream_id)[0]:
+                SilenceUtils.add_silence("command", 3600, stream_id)
+
+def percentile(sorted_values: List[int], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index] / 1000.0  # 纳秒 -> 微秒
+
+def summarize(name: str, samples: List[int], wall: float) -> Dict[str, Any]:
+    samples.sort()
+    return {
+        "name": name,
+        "calls": len(samples),
+        "ops_per_sec": len(samples) / wall if wall > 0 else 0.0,
+        "p50_us": percentile(samples, 0.50),
+        "p99_us": percentile(samples, 0.99),
+        "max_us": samples[-1] / 1000.0 if samples else 0.0,
+    }
+
+async def replay(workload: Workload, limit: int = 0) -> Tuple[Dict[str, List[int]], float]:
+    """按顺序回放消息流，依次经过 ON_MESSAGE_PRE_PROCESS 和 ON_MESSAGE 两个处理器"""
+    command_handler = plugin.SilenceCommandEventHandler()
+    event_handler = plugin.SilenceEventHandler()
+    samples: Dict[str, List[int]] = {"SilenceCommandEventHandler.execute": [], "SilenceEventHandler.execute": [], "message_total": []}
+    clock = time.perf_counter_ns
+    messages = workload.messages[:limit] if limit else workload.messages
+
+    start = time.perf_counter()
+    for index, (message, original) in enumerate(messages):
+        if index % 200 == 0:
+            workload.reset_state()
+        original.chat_stream.context.last_message = original
+
+        t0 = clock()
+        await command_handler.execute(message)
+        t1 = clock()
+        await event_handler.execute(message)
+        t2 = clock()
+
+        samples["SilenceCommandEventHandler.execute"].append(t1 - t0)
+        samples["SilenceEventHandler.execute"].append(t2 - t1)
+        samples["message_total"].append(t2 - t0)
+
+        # 让后台写入、学习等协程有机会运行
+        if index % 50 == 0:
+            await asyncio.sleep(0)
+    wall = time.perf_counter() - start
+    return samples, wall
+
+def bench_sync(name: str, func: Callable[[int], Any], iterations: int) -> Dict[str, Any]:
+    samples = []
+    clock = time.perf_counter_ns
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = clock()
+        func(i)
+        samples.append(clock() - t0)
+    return summarize(name, samples, time.perf_counter() - start)
+
+def bench_utils(workload: Workload, iterations: int) -> List[Dict[str, Any]]:
+    notify_messages = [m for m, _ in workload.messages if m.message_segments and m.message_segments[0].type == "notify"]
+    text_messages = [m for m, _ in workload.messages if m.message_segments[0].type == "text"]
+    stream_ids = [stream_id for stream_id, _ in workload.streams]
+    results = []
+    if notify_messages:
+        results.append(bench_sync("MuteUtils.mute_check(notify)", lambda i: MuteUtils.mute_check(notify_messages[i % len(notify_messages)]), iterations))
+    results.append(bench_sync("MuteUtils.mute_check(text)", lambda i: MuteUtils.mute_check(text_messages[i % len(text_messages)]), iterations))
+    results.append(bench_sync("SilenceUtils.is_silenced", lambda i: SilenceUtils.is_silenced(stream_ids[i % len(stream_ids)]), iterations))
+    results.append(bench_sync("SilenceUtils.is_silenced_someone", lambda i: SilenceUtils.is_silenced_someone(str(200000 + i % 500)), iterations))
+    results.append(bench_sync("SilenceUtils.check_person_permission", lambda i: SilenceUtils.check_person_permission(str(200000 + i % 500)), iterations))
+
+    def add_remove(i: int):
+        stream_id = f"bench_stream_{i % 1000}"
+        SilenceUtils.add_silence("command", 60, stream_id)
+        SilenceUtils.remove_silence(stream_id)
+    results.append(bench_sync("SilenceUtils.add_silence+remove_silence", add_remove, max(1, iterations // 10)))
+    return results
+
+async def measure_allocations(workload: Workload, limit: int) -> Dict[str, Any]:
+    """用 tracemalloc 统计回放期间的内存峰值和残留分配"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await replay(workload, limit)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    net_bytes = sum(stat.size_diff for stat in stats)
+    net_blocks = sum(stat.count_diff for stat in stats)
+    count = min(limit, len(workload.messages)) or 1
+    return {"messages": count, "peak_kib": peak / 1024.0, "retained_bytes_per_msg": net_bytes / count, "retained_blocks_per_msg": net_blocks / count}
+
+def print_table(results: List[Dict[str, Any]]):
+    print(f"{'名称':<44}{'次数':>9}{'每秒':>12}{'p50(us)':>10}{'p99(us)':>10}{'max(us)':>11}")
+    for r in results:
+        print(f"{r['name']:<46}{r['calls']:>9}{r['ops_per_sec']:>12.0f}{r['p50_us']:>10.1f}{r['p99_us']:>10.1f}{r['max_us']:>11.1f}")
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> bool:
+    """与基准结果比较，返回是否没有超出容忍范围的性能回退"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    ok = True
+    print(f"\n与基准 {baseline_path} 比较（容忍 {tolerance:.0%}）:")
+    for r in results:
+        base = baseline.get(r["name"])
+        if base is None:
+            continue
+        throughput = r["ops_per_sec"] / base["ops_per_sec"] - 1 if base["ops_per_sec"] else 0.0
+        p99 = r["p99_us"] / base["p99_us"] - 1 if base["p99_us"] else 0.0
+        regressed = throughput < -tolerance or p99 > tolerance
+        ok = ok and not regressed
+        print(f"  {'回退' if regressed else '正常'}  {r['name']:<44} 吞吐 {throughput:+.1%}  p99 {p99:+.1%}")
+    return ok
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="沉默插件离线性能测试")
+    parser.add_argument("--messages", type=int, default=20000, help="回放的消息数量")
+    parser.add_argument("--streams", type=int, default=200, help="群聊数量")
+    parser.add_argument("--users", type=int, default=500, help="发言用户数量")
+    parser.add_argument("--picids", type=int, default=200, help="不同图片的数量（其中80%%有描述）")
+    parser.add_argument("--silenced-ratio", type=float, default=0.3, help="处于沉默状态的群聊比例")
+    parser.add_argument("--picid-ratio", type=float, default=0.1, help="带图片消息的比例")
+    parser.add_argument("--at-ratio", type=float, default=0.01, help="艾特机器人消息的比例")
+    parser.add_argument("--command-ratio", type=float, default=0.05, help="命令消息的比例")
+    parser.add_argument("--notify-ratio", type=float, default=0.002, help="禁言通知的比例")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="消息存储和图片查询的模拟延迟")
+    parser.add_argument("--person-latency-ms", type=float, default=0.0, help="用户注册的模拟延迟")
+    parser.add_argument("--learning", action="store_true", help="开启沉默期间表达学习")
+    parser.add_argument("--stats", action="store_true", help="开启运行统计（用于衡量统计本身的开销）")
+    parser.add_argument("--util-iterations", type=int, default=100000, help="工具方法微基准的迭代次数")
+    parser.add_argument("--alloc-messages", type=int, default=2000, help="内存分配统计回放的消息数量，0表示跳过")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="把结果保存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="比较时允许的性能回退比例")
+    parser.add_argument("--verbose", action="store_true", help="输出插件日志")
+    return parser.parse_args()
+
+async def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    host_stubs.Latency.store_message = host_stubs.Latency.image_query = args.db_latency_ms / 1000.0
+    host_stubs.Latency.register_person = args.person_latency_ms / 1000.0
+    for pattern, name in [(plugin.SilenceCommand.command_pattern, "silence_command"), (r"^/help$", "help"), (r"^/status$", "status"), (r"^/echo\s+(?P<text>.+)$", "echo")]:
+        host_stubs.component_registry.register_command(pattern, name)
+
+    SilenceUtils._config = SilenceConfig({
+        "permissions": {"admin_users": list(range(200000, 200010))},
+        "adjustment": {"disable_command": True, "unaffected_command_list": ["help"]},
+        "experimental": {"silence_expression_learning": args.learning},
+    })
+
+    SilenceStats.configure(args.stats)
+
+    workload = Workload(args)
+    workload.reset_state()
+
+    samples, wall = await replay(workload)
+    results = [summarize(name, values, wall) for name, values in samples.items()]
+    results.extend(bench_utils(workload, args.util_iterations))
+
+    print(f"消息数 {len(workload.messages)}，群聊 {len(workload.streams)}，沉默群聊 {len(workload.silenced)}，回放耗时 {wall:.3f}s")
+    print_table(results)
+
+    allocations = None
+    if args.alloc_messages:
+        allocations = await measure_allocations(workload, args.alloc_messages)
+        print(f"\n内存: 峰值 {allocations['peak_kib']:.1f} KiB，每条消息残留 {allocations['retained_bytes_per_msg']:.1f} 字节 / {allocations['retained_blocks_per_msg']:.2f} 个内存块")
+
+    SilenceUtils.stop_background()
+    LearningScheduler.cancel_all()
+    await StorageUtils.drain()
+    counters = host_stubs.Counters
+    print(f"\n桩调用: 存储 {counters.store_message}，图片查询 {counters.image_query}，用户注册 {counters.register_person}，表达学习 {counters.learning}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results, "allocations": allocations}, f, ensure_ascii=False, indent=2)
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,80 @@
+"""
+沉默插件导入耗时测试
+- 每轮在新的子进程中导入插件，测量 load_plugin() 的耗时（插件加载时就要付出的冷启动开销）
+- 桩模块可以给主程序中较重的模块加上人为的导入耗时，用来观察插件在加载阶段导入了哪些重模块
+- 输出各轮耗时的 p50/p90/最大值，以及加载阶段导入的主程序模块列表
+
+用法（在插件目录下）:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 20 --import-delay-ms 20 --json import_output.json
+"""
+
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+def child(import_delay: float) -> Dict[str, Any]:
+    """在子进程中执行：导入插件并返回耗时和导入过的主程序模块"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import host_stubs
+
+    host_stubs.install(import_delay)
+    start = time.perf_counter()
+    host_stubs.load_plugin()
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "modules": list(host_stubs.imported_modules),
+        "heavy_modules": [name for name in host_stubs.imported_modules if name in host_stubs.HEAVY_MODULES],
+    }
+
+def run_once(import_delay_ms: float) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--import-delay-ms", str(import_delay_ms)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="沉默插件导入耗时测试")
+    parser.add_argument("--runs", type=int, default=10, help="子进程导入的轮数")
+    parser.add_argument("--import-delay-ms", type=float, default=20.0, help="每个较重的主程序模块的模拟导入耗时")
+    parser.add_argument("--json", help="把结果保存为JSON文件")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main() -> int:
+    args = parse_args()
+    if args.child:
+        print(json.dumps(child(args.import_delay_ms / 1000.0)))
+        return 0
+
+    runs = [run_once(args.import_delay_ms) for _ in range(max(1, args.runs))]
+    seconds = [run["seconds"] for run in runs]
+    ms = [value * 1000 for value in seconds]
+    heavy = runs[-1]["heavy_modules"]
+
+    print(f"轮数 {len(runs)}，重模块模拟导入耗时 {args.import_delay_ms:g}ms")
+    print(f"load_plugin 耗时: p50 {statistics.median(ms):.2f}ms  p90 {percentile(ms, 0.9):.2f}ms  max {max(ms):.2f}ms")
+    print(f"加载阶段导入的主程序模块 {len(runs[-1]['modules'])} 个，其中较重的模块 {len(heavy)} 个")
+    for name in heavy:
+        print(f"  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "seconds": seconds, "modules": runs[-1]["modules"], "heavy_modules": heavy}, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
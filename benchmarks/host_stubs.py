@@ -0,0 +1,337 @@
+"""
+麦麦主程序（src.*）的桩模块
+- 让沉默插件可以脱离麦麦单独导入，用于离线性能测试
+- 数据库、用户注册等操作可以配置人为延迟，模拟真实环境中的IO耗时
+  （同步接口用 time.sleep 阻塞，异步接口用 asyncio.sleep 让出事件循环，与真实实现的行为一致）
+"""
+
+from dataclasses import dataclass, field
+from types import ModuleType, SimpleNamespace
+from typing import Any, Dict, List, Optional
+import asyncio
+import enum
+import importlib
+import importlib.abc
+import importlib.util
+import logging
+import os
+import re
+import sys
+import time
+
+BOT_QQ = "10000"
+
+class Latency:
+    """各类桩操作的人为延迟（秒）"""
+    store_message = 0.0
+    image_query = 0.0
+    register_person = 0.0
+    learning = 0.0
+
+class Counters:
+    """桩操作的调用计数"""
+    store_message = 0
+    image_query = 0
+    register_person = 0
+    learning = 0
+    store_action = 0
+
+    @classmethod
+    def reset(cls):
+        cls.store_message = cls.image_query = cls.register_person = cls.learning = cls.store_action = 0
+
+# ---- src.common.logger ----
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+# ---- src.plugin_system.base.component_types ----
+
+@dataclass
+class Seg:
+    type: str
+    data: Any
+
+@dataclass
+class MaiMessages:
+    message_segments: List[Seg] = field(default_factory=list)
+    message_base_info: Dict[str, Any] = field(default_factory=dict)
+    plain_text: str = ""
+    raw_message: Optional[str] = None
+    is_group_message: bool = False
+    is_private_message: bool = False
+    stream_id: Optional[str] = None
+    additional_data: Dict[Any, Any] = field(default_factory=dict)
+
+class EventType(enum.Enum):
+    ON_START = "on_start"
+    ON_STOP = "on_stop"
+    ON_MESSAGE_PRE_PROCESS = "on_message_pre_process"
+    ON_MESSAGE = "on_message"
+
+class ComponentInfo:
+    pass
+
+# ---- src.person_info.person_info ----
+
+class Person:
+    @classmethod
+    def register_person(cls, platform: str, user_id: str, nickname: str):
+        Counters.register_person += 1
+        if Latency.register_person:
+            time.sleep(Latency.register_person)
+
+# ---- src.bw_learner.message_recorder ----
+
+async def extract_and_distribute_messages(stream_id: str):
+    Counters.learning += 1
+    if Latency.learning:
+        await asyncio.sleep(Latency.learning)
+
+# ---- src.common.database.database_model ----
+
+class _Field:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __eq__(self, other):  # type: ignore
+        return ("eq", [other])
+
+    def in_(self, values):
+        return ("in", list(values))
+
+class _Query:
+    def __init__(self, model):
+        self._model = model
+        self._values: List[str] = []
+
+    def where(self, expr):
+        self._values = expr[1]
+        return self
+
+    def __iter__(self):
+        Counters.image_query += 1
+        if Latency.image_query:
+            time.sleep(Latency.image_query)
+        table = self._model.table
+        return iter([self._model(image_id, table[image_id]) for image_id in self._values if image_id in table])
+
+class Images:
+    image_id = _Field("image_id")
+    description = _Field("description")
+    table: Dict[str, str] = {}
+
+    def __init__(self, image_id: str, description: str):
+        self.image_id = image_id
+        self.description = description
+
+    @classmethod
+    def select(cls, *fields):
+        return _Query(cls)
+
+    @classmethod
+    def get_or_none(cls, expr):
+        result = list(_Query(cls).where(expr))
+        return result[0] if result else None
+
+# ---- src.chat.message_receive.chat_stream ----
+
+class _StreamContext:
+    def __init__(self):
+        self.last_message = None
+
+    def get_last_message(self):
+        return self.last_message
+
+class ChatStream:
+    def __init__(self, stream_id: str, group_id: Optional[str], platform: str = "qq"):
+        self.stream_id = stream_id
+        self.platform = platform
+        self.group_info = SimpleNamespace(group_id=group_id, group_name=f"群{group_id}") if group_id else None
+        self.context = _StreamContext()
+
+class ChatManager:
+    def __init__(self):
+        self.streams: Dict[str, ChatStream] = {}
+
+    def get_stream(self, stream_id: str) -> Optional[ChatStream]:
+        return self.streams.get(stream_id)
+
+chat_manager = ChatManager()
+
+def get_chat_manager() -> ChatManager:
+    return chat_manager
+
+# ---- src.chat.utils.utils / chat_message_builder ----
+
+_AT_PATTERN = f"@<[^>]*:{BOT_QQ}>"
+
+def is_mentioned_bot_in_message(message):
+    is_at = re.search(_AT_PATTERN, message.processed_plain_text) is not None
+    return is_at, is_at, 1.0 if is_at else 0.0
+
+def replace_user_references(text: str, platform: str, replace_bot_name: bool = True) -> str:
+    return re.sub(r"@<([^:>]*):[^>]*>", r"@\1", text)
+
+# ---- src.chat.message_receive.storage ----
+
+class MessageStorage:
+    @staticmethod
+    async def store_message(message, chat_stream):
+        Counters.store_message += 1
+        if Latency.store_message:
+            await asyncio.sleep(Latency.store_message)
+
+# ---- src.plugin_system.apis.database_api ----
+
+stored_actions: List[Dict[str, Any]] = []
+
+async def store_action_info(chat_stream=None, **kwargs):
+    Counters.store_action += 1
+    stored_actions.append(dict(kwargs, stream_id=getattr(chat_stream, "stream_id", None)))
+
+# ---- src.plugin_system.* ----
+
+def register_plugin(cls):
+    return cls
+
+class BasePlugin:
+    def __init__(self, *args, **kwargs):
+        self.config: Dict[str, Any] = {}
+
+    def get_config(self, key: str, default: Any = None) -> Any:
+        return default
+
+class ActionActivationType(enum.Enum):
+    ALWAYS = "always"
+
+class BaseAction:
+    @classmethod
+    def get_action_info(cls):
+        return ComponentInfo()
+
+class BaseCommand:
+    def __init__(self, message, matched_groups: Optional[Dict[str, Any]] = None):
+        self.message = message
+        self.matched_groups = matched_groups or {}
+        self.sent: List[str] = []
+
+    async def send_text(self, text: str, *args, **kwargs):
+        self.sent.append(text)
+
+    @classmethod
+    def get_command_info(cls):
+        return ComponentInfo()
+
+class BaseEventHandler:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def get_handler_info(cls):
+        return ComponentInfo()
+
+class ConfigField:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class ConfigLayout(ConfigField):
+    pass
+
+class ConfigTab(ConfigField):
+    pass
+
+class ComponentRegistry:
+    def __init__(self):
+        self._command_patterns: Dict[re.Pattern, str] = {}
+
+    def register_command(self, pattern: str, name: str):
+        self._command_patterns[re.compile(pattern)] = name
+
+    def find_command_by_text(self, text: str):
+        for pattern, name in self._command_patterns.items():
+            match = pattern.match(text)
+            if match:
+                return None, match.groupdict(), SimpleNamespace(name=name)
+        return None
+
+component_registry = ComponentRegistry()
+
+# ---- 安装 ----
+
+# 真实环境中导入代价较高的主程序模块（数据库模型、聊天流管理、用户信息等），import_delay 只作用于这些模块
+HEAVY_MODULES = frozenset([
+    "src.person_info.person_info",
+    "src.bw_learner.message_recorder",
+    "src.common.database.database_model",
+    "src.chat.message_receive.chat_stream",
+    "src.chat.utils.utils",
+    "src.chat.utils.chat_message_builder",
+    "src.chat.message_receive.storage",
+    "src.plugin_system.apis.database_api",
+])
+
+# 导入过的桩模块，按导入顺序记录
+imported_modules: List[str] = []
+
+def _registry() -> Dict[str, Dict[str, Any]]:
+    return {
+        "src.common.logger": dict(get_logger=get_logger, MODULE_ALIASES={}, MODULE_COLORS={}),
+        "src.config.config": dict(global_config=SimpleNamespace(bot=SimpleNamespace(qq_account=BOT_QQ, nickname="麦麦"))),
+        "src.person_info.person_info": dict(Person=Person),
+        "src.bw_learner.message_recorder": dict(extract_and_distribute_messages=extract_and_distribute_messages),
+        "src.common.database.database_model": dict(Images=Images),
+        "src.chat.message_receive.chat_stream": dict(get_chat_manager=get_chat_manager, ChatStream=ChatStream),
+        "src.chat.utils.utils": dict(is_mentioned_bot_in_message=is_mentioned_bot_in_message),
+        "src.chat.utils.chat_message_builder": dict(replace_user_references=replace_user_references),
+        "src.chat.message_receive.storage": dict(MessageStorage=MessageStorage),
+        "src.plugin_system.apis.plugin_register_api": dict(register_plugin=register_plugin),
+        "src.plugin_system.apis.database_api": dict(store_action_info=store_action_info),
+        "src.plugin_system.base.base_plugin": dict(BasePlugin=BasePlugin),
+        "src.plugin_system.base.base_action": dict(BaseAction=BaseAction, ActionActivationType=ActionActivationType),
+        "src.plugin_system.base.base_command": dict(BaseCommand=BaseCommand),
+        "src.plugin_system.base.base_events_handler": dict(BaseEventHandler=BaseEventHandler),
+        "src.plugin_system.base.config_types": dict(ConfigField=ConfigField, ConfigLayout=ConfigLayout, ConfigTab=ConfigTab),
+        "src.plugin_system.base.component_types": dict(MaiMessages=MaiMessages, EventType=EventType, ComponentInfo=ComponentInfo),
+        "src.plugin_system.core": dict(component_registry=component_registry),
+    }
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """按需创建 src.* 桩模块，记录导入顺序，并可以给较重的模块加上人为的导入耗时"""
+
+    def __init__(self, registry: Dict[str, Dict[str, Any]], import_delay: float):
+        self._registry = registry
+        self._import_delay = import_delay
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != "src" and not fullname.startswith("src."):
+            return None
+        return importlib.util.spec_from_loader(fullname, self, is_package=fullname not in self._registry)
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        attrs = self._registry.get(module.__name__)
+        if attrs is None:
+            return
+        imported_modules.append(module.__name__)
+        if self._import_delay and module.__name__ in HEAVY_MODULES:
+            time.sleep(self._import_delay)
+        module.__dict__.update(attrs)
+
+def install(import_delay: float = 0.0):
+    """注册桩模块的导入器，src.* 模块在第一次被导入时才创建"""
+    for finder in sys.meta_path:
+        if isinstance(finder, _StubFinder):
+            return
+    sys.meta_path.insert(0, _StubFinder(_registry(), import_delay))
+
+def load_plugin(package_name: str = "silence_plugin") -> ModuleType:
+    """以包的形式导入沉默插件（插件目录本身没有 __init__.py）"""
+    plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if package_name not in sys.modules:
+        package = ModuleType(package_name)
+        package.__path__ = [plugin_dir]  # type: ignore
+        sys.modules[package_name] = package
+    return importlib.import_module(f"{package_name}.plugin")
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import time
+
+# 表示缓存中没有该键（区别于缓存了 None 值）
+MISSING = object()
+
+class BoundedCache:
+    """
+    有界LRU缓存
+    - 超过容量时淘汰最久未使用的条目
+    - 每个条目可以单独指定存活时间，到期后视为不存在
+    - 记录命中和未命中次数，方便观察缓存效果
+    """
+
+    __slots__ = ("_maxsize", "_ttl", "_data", "hits", "misses")
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # 格式: {key: (value, 过期时间戳 或 None)}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """读取缓存，不存在或已过期时返回 default"""
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """写入缓存，ttl 不传时使用缓存默认的存活时间"""
+        if ttl is None:
+            ttl = self._ttl
+        self._data[key] = (value, None if ttl is None else time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """移除缓存条目"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存和计数"""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,135 @@
+from src.common.logger import get_logger
+from .lazy_import import LazyImport
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Pattern, Set
+import re
+import time
+
+# 正则解析器是标准库的内部模块（sre_parse 从 3.11 起已弃用），拿不到时整个索引退回到不过滤
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    try:
+        import sre_parse  # type: ignore  # Python 3.10
+    except ImportError:
+        sre_parse = None  # type: ignore
+
+# 主程序中较重的模块在第一次使用时才导入
+component_registry = LazyImport("src.plugin_system.core", "component_registry")
+
+logger = get_logger("Silence")
+
+if sre_parse is not None:
+    _AT = sre_parse.AT
+    _LITERAL = sre_parse.LITERAL
+    _IN = sre_parse.IN
+    _SUBPATTERN = sre_parse.SUBPATTERN
+    _BRANCH = sre_parse.BRANCH
+    _REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+class CommandIndex:
+    """
+    命令首字符索引
+    - 从已注册命令的正则表达式中预先算出命令可能的首字符集合
+    - 首字符不在集合里的文本一定不是命令，无需再跑任何正则
+    - 注册表发生变化（或超过刷新间隔）时才重新计算
+    - 只要有一个命令的首字符无法确定（包括带 (?i:...) 这类局部标志的正则），就退回到不过滤
+    """
+
+    # 即使注册表看起来没变，也定期重新计算一次，防止替换了同样数量的命令
+    _REFRESH_INTERVAL = 30.0
+
+    _version: Optional[tuple] = None
+    _refreshed_at: float = 0.0
+    _first_chars: FrozenSet[str] = frozenset()
+    _match_any: bool = True
+
+    @classmethod
+    def may_be_command(cls, text: str) -> bool:
+        """快速判断文本是否可能是命令（返回False时一定不是命令）"""
+        cls._refresh()
+        if cls._match_any:
+            return True
+        return bool(text) and text[0] in cls._first_chars
+
+    @classmethod
+    def _refresh(cls):
+        patterns = _registered_patterns()
+        if patterns is None:
+            cls._match_any = True
+            return
+
+        now = time.monotonic()
+        version = (id(patterns), len(patterns))
+        if version == cls._version and now - cls._refreshed_at < cls._REFRESH_INTERVAL:
+            return
+        cls._version = version
+        cls._refreshed_at = now
+
+        first_chars: Set[str] = set()
+        for pattern in list(patterns):
+            chars = _pattern_first_chars(pattern)
+            if chars is None:
+                cls._match_any = True
+                return
+            first_chars.update(chars)
+        cls._first_chars = frozenset(first_chars)
+        cls._match_any = False
+
+def _registered_patterns() -> Optional[Dict[Pattern, Any]]:
+    """
+    读取主程序注册的全部命令正则（唯一访问注册表私有属性的地方）
+    主程序没有这个属性、解析器不可用或读取出错时返回None，调用方据此退回到不过滤
+    """
+    if sre_parse is None:
+        return None
+    try:
+        patterns = getattr(component_registry, "_command_patterns", None)
+    except Exception as e:
+        logger.debug(f"读取已注册的命令正则失败: {str(e)}")
+        return None
+    return patterns if isinstance(patterns, dict) else None
+
+def _pattern_first_chars(pattern: Pattern) -> Optional[Set[str]]:
+    """计算正则能匹配的文本的首字符集合，无法确定时返回None"""
+    try:
+        chars = _leading_chars(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception as e:
+        logger.debug(f"无法分析命令正则 {pattern.pattern!r} 的首字符: {str(e)}")
+        return None
+    if chars is not None and pattern.flags & re.IGNORECASE:
+        chars |= {c.swapcase() for c in chars}
+    return chars
+
+def _leading_chars(items: Iterable) -> Optional[Set[str]]:
+    for op, av in items:
+        if op is _AT:
+            continue  # ^ 之类的零宽断言不消耗字符
+        if op is _LITERAL:
+            return {chr(av)}
+        if op is _IN:
+            chars = set()
+            for sub_op, sub_av in av:
+                if sub_op is not _LITERAL:
+                    return None  # 范围、字符类、取反等情况不做细分
+                chars.add(chr(sub_av))
+            return chars
+        if op is _SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            if add_flags or del_flags:
+                return None  # (?i:...) 之类的局部标志会改变匹配方式，不做分析
+            return _leading_chars(sub)
+        if op is _BRANCH:
+            chars = set()
+            for branch in av[1]:
+                branch_chars = _leading_chars(branch)
+                if branch_chars is None:
+                    return None
+                chars |= branch_chars
+            return chars
+        if op in _REPEATS:
+            min_count, _, sub = av
+            if min_count == 0:
+                return None  # 可以匹配零次，首字符可能来自后面的部分
+            return _leading_chars(sub)
+        return None
+    return None  # 空模式可以匹配任何文本
@@ -0,0 +1,124 @@
+from src.common.logger import get_logger
+from typing import Callable, Optional, Tuple
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import traceback
+
+logger = get_logger("Silence")
+
+# inotify 事件掩码（见 linux/inotify.h）
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+class ConfigWatcher:
+    """
+    配置文件监视器
+    - 在独立的守护线程中运行，事件处理器永远不会碰到文件系统
+    - Linux 下使用 inotify 监听配置文件所在目录，其他平台或 inotify 不可用时退回定时轮询
+    - 发现文件变化后调用 on_change 回调（同样在监视线程中执行）
+    """
+
+    def __init__(self, path: str, on_change: Callable[[], None], poll_interval: float = 3.0):
+        self._path = path
+        self._on_change = on_change
+        self._poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_stat = self._stat()
+
+    def start(self):
+        """启动监视线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="silence-config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _check(self):
+        """文件的修改时间或大小变了才回调"""
+        current = self._stat()
+        if current is None or current == self._last_stat:
+            return
+        self._last_stat = current
+        try:
+            self._on_change()
+        except Exception as e:
+            logger.error(f"处理配置文件变化时出错: {str(e)}\n{traceback.format_exc()}")
+
+    def _run(self):
+        fd = self._open_inotify()
+        if fd is None:
+            self._run_polling()
+            return
+        try:
+            self._run_inotify(fd)
+        finally:
+            os.close(fd)
+
+    def _run_polling(self):
+        while not self._stop_event.wait(self._poll_interval):
+            self._check()
+
+    def _run_inotify(self, fd: int):
+        name = os.path.basename(self._path).encode()
+        while not self._stop_event.is_set():
+            # 带超时地等待，保证 stop 之后能及时退出
+            readable, _, _ = select.select([fd], [], [], 1.0)
+            if not readable:
+                continue
+            data = os.read(fd, 4096)
+
+            # 只关心配置文件本身的事件（编辑器保存时可能是原地写入，也可能是先写临时文件再改名）
+            offset, hit = 0, False
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                start = offset + _EVENT_HEADER.size
+                if data[start:start + length].rstrip(b"\0") == name:
+                    hit = True
+                offset = start + length
+            if hit:
+                # 稍等片刻让写入完成，避免读到写了一半的文件
+                if self._stop_event.wait(0.1):
+                    break
+                self._check()
+
+    def _open_inotify(self) -> Optional[int]:
+        """尝试创建 inotify 监听，不支持时返回 None"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(_IN_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+            directory = os.path.dirname(os.path.abspath(self._path)).encode()
+            if libc.inotify_add_watch(fd, directory, mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except Exception as e:
+            logger.warning(f"inotify 不可用，配置文件监视退回轮询模式: {str(e)}")
+            return None
@@ -0,0 +1,136 @@
+from src.common.logger import get_logger
+from .image_utils import ImageUtils
+from .lazy_import import LazyImport
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import asyncio
+import time
+import traceback
+
+# 主程序中较重的模块在第一次使用时才导入
+get_chat_manager = LazyImport("src.chat.message_receive.chat_stream", "get_chat_manager")
+replace_user_references = LazyImport("src.chat.utils.chat_message_builder", "replace_user_references")
+store_action_info = LazyImport("src.plugin_system.apis.database_api", "store_action_info")
+
+logger = get_logger("Silence")
+
+class _StreamDigest:
+    """单个聊天流沉默期间的滚动摘要"""
+
+    __slots__ = ("count", "first_time", "last_time", "speakers", "excerpts")
+
+    # 单独统计发言数的用户数量上限，超出的用户计入“其他人”
+    MAX_SPEAKERS = 64
+
+    def __init__(self, max_excerpts: int):
+        self.count = 0
+        self.first_time = time.time()
+        self.last_time = self.first_time
+        self.speakers: Dict[Any, int] = {}  # 格式: {昵称: 发言数}，None 为其他人
+        self.excerpts: Deque[Tuple[Any, str]] = deque(maxlen=max_excerpts)  # 格式: (昵称, 原始文本)
+
+    def add(self, nickname: Any, text: str):
+        self.count += 1
+        self.last_time = time.time()
+        speakers = self.speakers
+        if nickname in speakers or len(speakers) < self.MAX_SPEAKERS:
+            speakers[nickname] = speakers.get(nickname, 0) + 1
+        else:
+            speakers[None] = speakers.get(None, 0) + 1
+        if text:
+            self.excerpts.append((nickname, text))
+
+class DigestUtils:
+    """
+    沉默期间消息的摘要模式（实验性功能）
+    - 沉默期间的消息不再逐条存储、替换图片和记录日志，只计入所在聊天流的有界滚动摘要（消息数、发言最多的人、最近几条消息）
+    - 沉默结束时（到期、被艾特打断或指令解除）把整段摘要作为一条动作记录写入聊天上下文，麦麦恢复发言时可以据此快速了解错过的内容
+    - 图片描述和用户引用只对最终保留下来的几条消息做一次替换
+    """
+
+    # 摘要中每条消息原文的保存上限，防止个别超长消息占用过多内存（图片替换后再按配置截断）
+    _RAW_LIMIT = 2000
+
+    _digests: Dict[str, _StreamDigest] = {}
+    _excerpt_length: int = 100
+    _tasks: set = set()
+
+    @classmethod
+    def add(cls, stream_id: str, nickname: Any, text: str, max_excerpts: int, excerpt_length: int):
+        """把一条沉默期间的消息计入摘要（过长的消息在整理摘要时只保留开头）"""
+        digest = cls._digests.get(stream_id)
+        if digest is None:
+            digest = cls._digests[stream_id] = _StreamDigest(max(1, max_excerpts))
+        cls._excerpt_length = excerpt_length
+        digest.add(nickname, text[:cls._RAW_LIMIT])
+
+    @classmethod
+    def pending(cls, stream_id: str) -> int:
+        """聊天流已攒下但还没写入的消息数"""
+        digest = cls._digests.get(stream_id)
+        return digest.count if digest is not None else 0
+
+    @classmethod
+    def on_silence_exit(cls, stream_id: str):
+        """沉默结束的回调：取出摘要并在后台写入（没有事件循环时直接丢弃）"""
+        digest = cls._digests.pop(stream_id, None)
+        if digest is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(cls._store(stream_id, digest))
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+
+    @classmethod
+    async def flush(cls, stream_id: str):
+        """立即写入聊天流的摘要（例如被艾特打断时，需要在后续处理之前写好）"""
+        digest = cls._digests.pop(stream_id, None)
+        if digest is not None:
+            await cls._store(stream_id, digest)
+
+    @classmethod
+    def clear(cls):
+        """丢弃所有未写入的摘要"""
+        cls._digests.clear()
+
+    @classmethod
+    def format(cls, digest: _StreamDigest, platform: Optional[str], top_speakers: int = 3) -> str:
+        """把摘要整理成一段给麦麦看的文字"""
+        minutes = max(1, int((digest.last_time - digest.first_time) / 60))
+        lines = [f"你沉默的约{minutes}分钟里，群里共有{digest.count}条消息"]
+
+        ranked = sorted(((name, count) for name, count in digest.speakers.items() if name is not None), key=lambda item: item[1], reverse=True)
+        if ranked:
+            lines.append("发言最多的是: " + "，".join(f"{name}({count}条)" for name, count in ranked[:top_speakers]))
+
+        if digest.excerpts:
+            lines.append("最近的几条消息:")
+            for nickname, text in digest.excerpts:
+                text = ImageUtils.replace_picids(text)
+                if platform:
+                    text = replace_user_references(text, platform, replace_bot_name=True)
+                if cls._excerpt_length and len(text) > cls._excerpt_length:
+                    text = text[:cls._excerpt_length] + "…"
+                lines.append(f"{nickname}: {text}")
+        return "\n".join(lines)
+
+    @classmethod
+    async def _store(cls, stream_id: str, digest: _StreamDigest):
+        try:
+            chat_stream = get_chat_manager().get_stream(stream_id)
+            if chat_stream is None:
+                return
+            text = cls.format(digest, getattr(chat_stream, "platform", None))
+            await store_action_info(
+                chat_stream=chat_stream,
+                action_build_into_prompt=True,
+                action_prompt_display=text,
+                action_done=True,
+                action_name="silence_digest",
+            )
+            logger.info(f"已将聊天流 {stream_id} 沉默期间的 {digest.count} 条消息整理为摘要")
+        except Exception as e:
+            logger.error(f"写入沉默期间的消息摘要失败: {str(e)}\n{traceback.format_exc()}")
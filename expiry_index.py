@@ -0,0 +1,54 @@
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, List, Optional, Tuple
+import math
+
+class ExpiryIndex:
+    """
+    按过期时间排序的索引
+    - 维护一个 (过期时间, key) 的有序列表，永不过期的条目排在最后
+    - 增删为一次二分查找加一次列表插入/删除，分页读取只切片需要的部分，不需要每次全量排序
+    """
+
+    def __init__(self):
+        self._sorted: List[Tuple[float, Hashable]] = []
+        self._positions: Dict[Hashable, float] = {}  # 格式: {key: 排序用的过期时间}
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+
+    def set(self, key: Hashable, expiration: Optional[float]):
+        """添加或更新 key 的过期时间，None 表示永不过期"""
+        sort_key = math.inf if expiration is None else expiration
+        old = self._positions.get(key)
+        if old is not None:
+            if old == sort_key:
+                return
+            self._remove(old, key)
+        self._positions[key] = sort_key
+        insort(self._sorted, (sort_key, key))
+
+    def discard(self, key: Hashable):
+        """移除 key（不存在时什么也不做）"""
+        old = self._positions.pop(key, None)
+        if old is not None:
+            self._remove(old, key)
+
+    def clear(self):
+        self._sorted = []
+        self._positions = {}
+
+    def page(self, offset: int, limit: int) -> List[Tuple[Hashable, Optional[float]]]:
+        """按过期时间从早到晚返回第 offset 条开始的最多 limit 条，格式: [(key, 过期时间 或 None)]"""
+        return [(key, None if expiration == math.inf else expiration) for expiration, key in self._sorted[offset:offset + limit]]
+
+    def keys(self) -> List[Hashable]:
+        """按过期时间从早到晚返回全部 key"""
+        return [key for _, key in self._sorted]
+
+    def _remove(self, sort_key: float, key: Hashable):
+        index = bisect_left(self._sorted, (sort_key, key))
+        if index < len(self._sorted) and self._sorted[index] == (sort_key, key):
+            del self._sorted[index]
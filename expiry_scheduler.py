@@ -0,0 +1,127 @@
+from src.common.logger import get_logger
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+import traceback
+
+logger = get_logger("Silence")
+
+class ExpiryScheduler:
+    """
+    过期调度器
+    - 以过期时间戳为键的最小堆，添加 O(log n)，取消为 O(1) 标记 + 惰性删除
+    - 后台协程只睡到堆顶的过期时间，到期后主动调用 on_expire 回调清理记录
+    - 被取消或被覆盖的旧条目超过堆大小一半时整体重建，保证内存不随调度次数增长
+    - 调用 stop() 之后不会再因为新的调度自动启动后台协程，只有显式调用 start() 才会重新启动
+    """
+
+    # 旧条目少于这个数量时不值得重建堆
+    _COMPACT_MIN_STALE = 64
+
+    def __init__(self, name: str, on_expire: Callable[[Hashable], None]):
+        self._name = name
+        self._on_expire = on_expire
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}  # 格式: {key: (过期时间戳, 序号)}，只有序号一致的堆条目才有效
+        self._counter = itertools.count()
+        self._stale = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, key: Hashable, expiration: float):
+        """安排（或重新安排）key 在 expiration 时刻过期"""
+        if key in self._entries:
+            self._stale += 1
+        seq = next(self._counter)
+        self._entries[key] = (expiration, seq)
+        heapq.heappush(self._heap, (expiration, seq, key))
+        self._maybe_compact()
+
+        # 新条目成了堆顶，需要叫醒后台协程重新计算睡眠时间
+        if self._heap[0][1] == seq and self._wakeup is not None:
+            self._wakeup.set()
+        if not self._stopped:
+            self._launch()
+
+    def cancel(self, key: Hashable):
+        """取消 key 的过期安排（不存在时什么也不做）"""
+        if self._entries.pop(key, None) is None:
+            return
+        self._stale += 1
+        self._maybe_compact()
+
+    def start(self) -> bool:
+        """在有运行中的事件循环时启动后台协程，返回是否在运行（会撤销之前的 stop()）"""
+        self._stopped = False
+        return self._launch()
+
+    def _launch(self) -> bool:
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False  # 还没有事件循环，等下一次 schedule 或插件启动事件时再启动
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+        return True
+
+    def stop(self):
+        """停止后台协程（已安排的条目会保留，下次显式启动后继续生效）"""
+        self._stopped = True
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._wakeup = None
+
+    def _maybe_compact(self):
+        if self._stale > self._COMPACT_MIN_STALE and self._stale * 2 > len(self._heap):
+            self._compact()
+
+    def _compact(self):
+        self._heap = [(expiration, seq, key) for key, (expiration, seq) in self._entries.items()]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _pop_due(self, now: float) -> List[Hashable]:
+        """弹出所有已到期的有效条目，同时顺手丢掉堆顶的旧条目"""
+        due = []
+        heap = self._heap
+        while heap:
+            expiration, seq, key = heap[0]
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != seq:
+                heapq.heappop(heap)
+                self._stale -= 1
+                continue
+            if expiration > now:
+                break
+            heapq.heappop(heap)
+            del self._entries[key]
+            due.append(key)
+        return due
+
+    async def _run(self):
+        while True:
+            wakeup = self._wakeup
+            if wakeup is None:
+                return
+            wakeup.clear()
+
+            for key in self._pop_due(time.time()):
+                try:
+                    self._on_expire(key)
+                except Exception as e:
+                    logger.error(f"{self._name} 过期回调执行出错: {str(e)}\n{traceback.format_exc()}")
+
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,74 @@
+from src.common.logger import get_logger
+from .cache_utils import BoundedCache, MISSING
+from .lazy_import import LazyImport
+from typing import Dict, List
+import re
+import traceback
+
+# 主程序中较重的模块在第一次使用时才导入
+Images = LazyImport("src.common.database.database_model", "Images")
+
+logger = get_logger("Silence")
+
+class ImageUtils:
+    """
+    沉默期间消息中图片描述的解析
+    - 一条消息里的所有picid只用一次批量查询解析
+    - 查询结果放进有界LRU缓存，重复出现的表情包不再访问数据库
+    - 没查到描述的picid也会缓存一小段时间（图片描述可能稍后才生成），避免反复查询
+    """
+
+    _PICID_PATTERN = re.compile(r"\[picid:([^\]]+)\]")
+    _FALLBACK = "[图片：网络不好，图片无法加载]"
+
+    # 缓存容量和未命中结果的缓存时间（秒）
+    _CACHE_SIZE = 4096
+    _MISS_TTL = 60.0
+
+    _descriptions = BoundedCache(_CACHE_SIZE)  # 格式: {picid: 图片描述 或 None}
+
+    @classmethod
+    def replace_picids(cls, text: str) -> str:
+        """把文本中的[picid:xxxx]一次性替换成对应的图片描述"""
+        if "[picid:" not in text:
+            return text
+
+        descriptions: Dict[str, str] = {}
+        missing: List[str] = []
+        for picid in set(cls._PICID_PATTERN.findall(text)):
+            description = cls._descriptions.get(picid)
+            if description is MISSING:
+                missing.append(picid)
+            elif description:
+                descriptions[picid] = description
+
+        if missing:
+            descriptions.update(cls._query(missing))
+
+        def _replace(match: "re.Match") -> str:
+            description = descriptions.get(match.group(1))
+            return f"[图片：{description}]" if description else cls._FALLBACK
+
+        return cls._PICID_PATTERN.sub(_replace, text)
+
+    @classmethod
+    def _query(cls, picids: List[str]) -> Dict[str, str]:
+        """批量查询图片描述并写入缓存"""
+        found: Dict[str, str] = {}
+        try:
+            query = Images.select(Images.image_id, Images.description).where(Images.image_id.in_(picids))
+            for image in query:
+                if image.description:
+                    found[image.image_id] = image.description
+        except Exception as e:
+            # 查询失败时不缓存任何结果，下次再试
+            logger.error(f"批量查询图片描述失败: {str(e)}\n{traceback.format_exc()}")
+            return found
+
+        for picid in picids:
+            description = found.get(picid)
+            if description:
+                cls._descriptions.set(picid, description)
+            else:
+                cls._descriptions.set(picid, None, ttl=cls._MISS_TTL)
+        return found
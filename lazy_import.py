@@ -0,0 +1,41 @@
+from typing import Any
+import importlib
+
+_UNSET = object()
+
+class LazyImport:
+    """
+    延迟导入的主程序对象
+    - 插件加载时只记录模块名和属性名，第一次被调用或访问属性时才真正导入
+    - 导入后缓存对象本身，之后的调用和属性访问直接转发
+    - 没有进入沉默路径、或对应组件被禁用时，这些主程序模块就不会因为沉默插件而被导入
+    """
+
+    __slots__ = ("_module", "_name", "_value")
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+        self._value = _UNSET
+
+    def get(self) -> Any:
+        """返回真正的对象（必要时先导入）"""
+        value = self._value
+        if value is _UNSET:
+            value = self._value = getattr(importlib.import_module(self._module), self._name)
+        return value
+
+    @property
+    def loaded(self) -> bool:
+        """是否已经导入"""
+        return self._value is not _UNSET
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.get()(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = "已导入" if self.loaded else "未导入"
+        return f"<LazyImport {self._module}.{self._name} ({state})>"
@@ -0,0 +1,143 @@
+from src.common.logger import get_logger
+from .lazy_import import LazyImport
+from typing import Dict, Optional, Set
+import asyncio
+import time
+import traceback
+
+# 主程序中较重的模块在第一次使用时才导入
+extract_and_distribute_messages = LazyImport("src.bw_learner.message_recorder", "extract_and_distribute_messages")
+
+logger = get_logger("Silence")
+
+class _StreamLearningState:
+    """单个聊天流的表达学习调度状态"""
+
+    __slots__ = ("pending", "first_pending", "last_run", "running", "timer")
+
+    def __init__(self):
+        self.pending = 0  # 上次学习之后新收到的消息数
+        self.first_pending = 0.0  # 其中第一条消息到达的时间
+        self.last_run = 0.0  # 上次学习开始的时间
+        self.running = False  # 是否有正在进行的学习
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class LearningScheduler:
+    """
+    沉默期间表达学习的合并调度器
+    - 每条沉默消息只累加计数，不再各自创建学习任务
+    - 新消息数达到 min_messages，或第一条新消息已等待 max_delay 秒时才触发一次学习
+    - 同一聊天流两次学习至少间隔 min_interval 秒，且同时最多只有一次在进行
+    - 所有聊天流共享一个并发上限
+    """
+
+    _streams: Dict[str, _StreamLearningState] = {}
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _tasks: Set[asyncio.Task] = set()  # 持有进行中的学习任务，防止被垃圾回收
+    _max_concurrency: int = 2
+
+    # 当前生效的阈值（每次收到消息时从配置快照刷新）
+    _min_messages: int = 10
+    _max_delay: float = 60.0
+    _min_interval: float = 30.0
+
+    @classmethod
+    def configure(cls, max_concurrency: int = 2):
+        """设置全局并发上限（需要在第一次学习之前调用）"""
+        cls._max_concurrency = max(1, max_concurrency)
+        cls._semaphore = None
+
+    @classmethod
+    def notify(cls, stream_id: str, min_messages: int, max_delay: float, min_interval: float):
+        """记录一条沉默期间收到的新消息，必要时安排一次学习"""
+        cls._min_messages = min_messages
+        cls._max_delay = max_delay
+        cls._min_interval = min_interval
+
+        state = cls._streams.get(stream_id)
+        if state is None:
+            state = cls._streams[stream_id] = _StreamLearningState()
+        state.pending += 1
+        if state.pending == 1:
+            state.first_pending = time.monotonic()
+
+        # 正在学习的聊天流等这次学习结束后再统一处理
+        if state.running:
+            return
+
+        if state.pending >= min_messages:
+            cls._try_run(stream_id, state)
+        elif state.pending == 1:
+            cls._arm(stream_id, state, max_delay)
+
+    @classmethod
+    def cancel_all(cls):
+        """取消所有等待中的学习安排（插件停止时调用）"""
+        for state in cls._streams.values():
+            if state.timer is not None:
+                state.timer.cancel()
+        cls._streams.clear()
+
+    @classmethod
+    def _arm(cls, stream_id: str, state: _StreamLearningState, delay: float):
+        """安排 delay 秒后重新检查该聊天流，已有更早的安排时保留原安排"""
+        loop = asyncio.get_running_loop()
+        when = loop.time() + max(0.0, delay)
+        if state.timer is not None:
+            if state.timer.when() <= when:
+                return
+            state.timer.cancel()
+        state.timer = loop.call_at(when, cls._on_timer, stream_id)
+
+    @classmethod
+    def _on_timer(cls, stream_id: str):
+        state = cls._streams.get(stream_id)
+        if state is None:
+            return
+        state.timer = None
+        if state.running:
+            return
+
+        now = time.monotonic()
+        if state.pending > 0:
+            waited = now - state.first_pending
+            if state.pending >= cls._min_messages or waited >= cls._max_delay:
+                cls._try_run(stream_id, state)
+            else:
+                cls._arm(stream_id, state, cls._max_delay - waited)
+        elif now - state.last_run >= cls._min_interval:
+            # 一段时间内没有新消息，回收状态
+            del cls._streams[stream_id]
+
+    @classmethod
+    def _try_run(cls, stream_id: str, state: _StreamLearningState):
+        wait = state.last_run + cls._min_interval - time.monotonic()
+        if wait > 0:
+            cls._arm(stream_id, state, wait)
+            return
+
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        state.pending = 0
+        state.running = True
+        state.last_run = time.monotonic()
+        task = asyncio.get_running_loop().create_task(cls._run(stream_id, state))
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+
+    @classmethod
+    async def _run(cls, stream_id: str, state: _StreamLearningState):
+        if cls._semaphore is None:
+            cls._semaphore = asyncio.Semaphore(cls._max_concurrency)
+        try:
+            async with cls._semaphore:
+                await extract_and_distribute_messages(stream_id)
+        except Exception as e:
+            logger.error(f"沉默期间表达学习失败: {str(e)}\n{traceback.format_exc()}")
+        finally:
+            state.running = False
+
+            # 间隔 min_interval 秒后再检查：期间攒够了新消息就再学一次，否则回收状态
+            if cls._streams.get(stream_id) is state:
+                cls._arm(stream_id, state, cls._min_interval)
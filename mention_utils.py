@@ -0,0 +1,33 @@
+from src.config.config import global_config
+from typing import Any
+
+class MentionUtils:
+    """
+    艾特麦麦的快速预检查
+    - 只判断消息里有没有出现麦麦的账号（@<昵称:账号> 文本、at 消息段或回复消息段里都会带上账号）
+    - 账号都没出现时不可能是在艾特麦麦，可以跳过完整的 is_mentioned_bot_in_message 计算
+    - 这是一个必要条件：返回 True 时仍需要完整计算来确认
+    """
+
+    @classmethod
+    def may_mention_bot(cls, message: Any) -> bool:
+        """消息是否可能艾特了麦麦"""
+        bot_id = str(global_config.bot.qq_account)
+        if bot_id in (message.plain_text or ""):
+            return True
+        if message.raw_message and bot_id in message.raw_message:
+            return True
+        return cls._segments_contain(message.message_segments, bot_id)
+
+    @classmethod
+    def _segments_contain(cls, segments: Any, bot_id: str) -> bool:
+        for seg in segments or ():
+            data = seg.data
+            if seg.type == "text":
+                continue  # 文本段已经包含在 plain_text 里
+            if seg.type == "seglist" and isinstance(data, list):
+                if cls._segments_contain(data, bot_id):
+                    return True
+            elif bot_id in str(data):
+                return True
+        return False
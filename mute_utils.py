@@ -1,13 +1,36 @@
 from src.plugin_system.base.component_types import MaiMessages
 from src.common.logger import get_logger
 from src.config.config import global_config
+from .silence_store import SilenceStore
+from .expiry_scheduler import ExpiryScheduler
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import traceback
+import math
+import time
 
 logger = get_logger("Silence")
 
+# 禁言记录中表示“直到解除禁言为止”的过期时间
+NO_EXPIRY = math.inf
+
 class MuteUtils:
+    """
+    禁言状态跟踪
+    - 每个聊天流只保存一个 (个人禁言截止时间, 全体禁言截止时间) 二元组，0 表示没有该类禁言，NO_EXPIRY 表示直到解除为止
+    - 个人禁言的截止时间取自禁言通知里的 duration，到期后由过期调度器主动清理，即使错过了解除禁言的通知也不会一直处于禁言状态
+    """
+
+    _mute_records: Dict[str, Tuple[float, float]] = {}  # 格式: {stream_id: (个人禁言截止时间, 全体禁言截止时间)}
+
+    # 状态版本号，禁言记录每次变化都会加一，供判定结果缓存校验
+    state_version: int = 0
 
-    _personal_mute_records = {}  # 格式: {stream_id: True/False}
-    _whole_mute_records = {}  # 格式: {stream_id: True/False}
+    _expiry: ExpiryScheduler
+
+    # 禁言状态变化（enter=进入禁言，exit=被解除，expire=到期结束）时的回调
+    _state_listeners: List[Callable[[str, str], None]] = []
+
+    _KIND_INDEX = {"personal": 0, "whole": 1}
 
     @classmethod
     def is_muted(cls, stream_id: str) -> bool:
@@ -15,10 +38,102 @@ class MuteUtils:
         检查聊天流是否被禁言
         返回：True/False
         """
-        whole = cls._whole_mute_records.get(stream_id, False)
-        personal = cls._personal_mute_records.get(stream_id, False)
-        return personal or whole
-    
+        record = cls._mute_records.get(stream_id)
+        if record is None:
+            return False
+
+        now = time.time()
+        if record[0] > now or record[1] > now:
+            return True
+
+        # 过期调度器还没来得及清理，这里兜底
+        cls._expire(stream_id)
+        return False
+
+    @classmethod
+    def get_mute_remaining(cls, stream_id: str) -> Tuple[bool, Optional[float]]:
+        """
+        查询聊天流剩余的禁言时间
+        返回: (是否被禁言, 剩余秒数)，剩余秒数为 None 表示直到解除禁言为止
+        """
+        if not cls.is_muted(stream_id):
+            return False, None
+        until = max(cls._mute_records[stream_id])
+        if until == NO_EXPIRY:
+            return True, None
+        return True, until - time.time()
+
+    @classmethod
+    def restore(cls) -> int:
+        """
+        从本地数据库恢复禁言状态（已过期的记录会在恢复时被丢弃）
+        返回: 恢复的记录数量
+        """
+        rows = SilenceStore.load_mutes()
+        previous = set(cls._mute_records)
+        cls._mute_records = {}
+        for stream_id, kind, expiration in rows:
+            index = cls._KIND_INDEX.get(kind)
+            if index is None:
+                continue
+            record = list(cls._mute_records.get(stream_id, (0.0, 0.0)))
+            record[index] = NO_EXPIRY if expiration is None else expiration
+            cls._mute_records[stream_id] = (record[0], record[1])
+        for stream_id in cls._mute_records:
+            cls._reschedule(stream_id)
+        cls.state_version += 1
+
+        # 只通知真正发生了变化的聊天流
+        for stream_id in previous - cls._mute_records.keys():
+            cls._notify_state("exit", stream_id)
+        for stream_id in cls._mute_records.keys() - previous:
+            cls._notify_state("enter", stream_id)
+        return len(rows)
+
+    @classmethod
+    def apply_remote(cls, stream_id: str, kinds: Dict[str, Optional[float]]):
+        """把数据库中（由其他进程写入的）单个聊天流的禁言状态同步到内存，不会再写回数据库"""
+        record = [0.0, 0.0]
+        for kind, expiration in kinds.items():
+            index = cls._KIND_INDEX.get(kind)
+            if index is not None:
+                record[index] = NO_EXPIRY if expiration is None else expiration
+        new = (record[0], record[1]) if record[0] or record[1] else None
+        old = cls._mute_records.get(stream_id)
+        if old == new:
+            return
+        if new is None:
+            del cls._mute_records[stream_id]
+        else:
+            cls._mute_records[stream_id] = new
+        cls.state_version += 1
+        cls._reschedule(stream_id)
+        if old is None:
+            cls._notify_state("enter", stream_id)
+        elif new is None:
+            cls._notify_state("exit", stream_id)
+
+    @classmethod
+    def add_state_listener(cls, listener: Callable[[str, str], None]):
+        """注册禁言状态变化时的回调，参数为 (enter、exit 或 expire, 聊天流ID)（重复注册同一个回调只生效一次）"""
+        if listener not in cls._state_listeners:
+            cls._state_listeners.append(listener)
+
+    @classmethod
+    def export_records(cls) -> Dict[str, Tuple[float, float]]:
+        """导出各聊天流的 (个人禁言截止时间, 全体禁言截止时间)（副本），不做过期检查、不修改任何状态"""
+        return dict(cls._mute_records)
+
+    @classmethod
+    def start_background(cls):
+        """启动禁言过期调度（需要在事件循环中调用）"""
+        cls._expiry.start()
+
+    @classmethod
+    def stop_background(cls):
+        """停止禁言过期调度"""
+        cls._expiry.stop()
+
     @classmethod
     def mute_check(cls, message: MaiMessages):
         """
@@ -30,7 +145,7 @@ class MuteUtils:
         if len(message.message_segments) == 1:
             seg = message.message_segments[0]
             self_id = int(global_config.bot.qq_account)
-            
+
             if seg.type == "notify":
                 data = seg.data
 
@@ -40,20 +155,93 @@ class MuteUtils:
 
                     if banned_user_info.get("user_id") == self_id:
 
-                        cls._personal_mute_records[stream_id] = True
-           
+                        cls._set(stream_id, "personal", cls._ban_until(data.get("duration")))
+
                 elif data.get("sub_type") == "whole_ban":
 
-                    cls._whole_mute_records[stream_id] = True
-                
+                    cls._set(stream_id, "whole", NO_EXPIRY)
+
                 elif data.get("sub_type") == "lift_ban":
 
                     lifted_user_info = data.get("lifted_user_info", {})
 
                     if lifted_user_info.get("user_id") == self_id:
 
-                        cls._personal_mute_records.pop(stream_id, None)
+                        cls._set(stream_id, "personal", 0.0)
 
                 elif data.get("sub_type") == "whole_lift_ban":
 
-                    cls._whole_mute_records.pop(stream_id, None)
\ No newline at end of file
+                    cls._set(stream_id, "whole", 0.0)
+
+    @staticmethod
+    def _ban_until(duration: Any) -> float:
+        """根据禁言通知里的 duration（秒）计算截止时间，缺失或无法识别时视为直到解除禁言为止"""
+        try:
+            duration = float(duration)
+        except (TypeError, ValueError):
+            return NO_EXPIRY
+        if duration <= 0 or math.isnan(duration):
+            return NO_EXPIRY
+        return time.time() + duration
+
+    @classmethod
+    def _set(cls, stream_id: str, kind: str, until: float):
+        """设置（until 为 0 时解除）某一类禁言，同步写入数据库并重新安排过期"""
+        index = cls._KIND_INDEX[kind]
+        old = cls._mute_records.get(stream_id)
+        record = list(old or (0.0, 0.0))
+        record[index] = until
+        if record[0] or record[1]:
+            cls._mute_records[stream_id] = (record[0], record[1])
+        else:
+            cls._mute_records.pop(stream_id, None)
+        cls.state_version += 1
+
+        if until:
+            SilenceStore.save_mute(stream_id, kind, None if until == NO_EXPIRY else until)
+        else:
+            SilenceStore.delete_mute(stream_id, kind)
+        cls._reschedule(stream_id)
+        if old is None and until:
+            cls._notify_state("enter", stream_id)
+        elif old is not None and stream_id not in cls._mute_records:
+            cls._notify_state("exit", stream_id)
+
+    @classmethod
+    def _reschedule(cls, stream_id: str):
+        """按聊天流最晚的禁言截止时间安排过期，存在不会过期的禁言时不需要安排"""
+        record = cls._mute_records.get(stream_id)
+        if record is None or NO_EXPIRY in record:
+            cls._expiry.cancel(stream_id)
+        else:
+            cls._expiry.schedule(stream_id, max(record))
+
+    @classmethod
+    def _expire(cls, stream_id: str):
+        """清理已经过期的禁言状态（由过期调度器回调，记录已被覆盖或解除时什么也不做）"""
+        record = cls._mute_records.get(stream_id)
+        if record is None:
+            return
+        now = time.time()
+        if record[0] > now or record[1] > now:
+            cls._reschedule(stream_id)
+            return
+
+        del cls._mute_records[stream_id]
+        cls.state_version += 1
+        for kind, index in cls._KIND_INDEX.items():
+            if record[index]:
+                SilenceStore.delete_mute(stream_id, kind)
+        cls._expiry.cancel(stream_id)
+        logger.info(f"聊天流 {stream_id} 的禁言状态已过期，自动清理")
+        cls._notify_state("expire", stream_id)
+
+    @classmethod
+    def _notify_state(cls, event: str, stream_id: str):
+        for listener in cls._state_listeners:
+            try:
+                listener(event, stream_id)
+            except Exception as e:
+                logger.error(f"禁言状态变化回调执行出错: {str(e)}\n{traceback.format_exc()}")
+
+MuteUtils._expiry = ExpiryScheduler("禁言状态", MuteUtils._expire)
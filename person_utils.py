@@ -0,0 +1,42 @@
+from src.common.logger import get_logger
+from .cache_utils import BoundedCache, MISSING
+from .lazy_import import LazyImport
+from typing import Any, Dict
+import traceback
+
+# 主程序中较重的模块在第一次使用时才导入
+Person = LazyImport("src.person_info.person_info", "Person")
+
+logger = get_logger("Silence")
+
+class PersonUtils:
+    """
+    沉默期间发言用户的注册缓存
+    - 以 (平台, 用户ID, 昵称) 为键，最近注册过且昵称没变的用户直接跳过 Person.register_person
+    - 缓存有容量上限和存活时间，过期后会重新注册一次
+    """
+
+    _cache = BoundedCache(2048, ttl=600.0)
+
+    @classmethod
+    def configure(cls, max_size: int = 2048, ttl: float = 600.0):
+        """设置缓存容量和存活时间（会清空已有缓存）"""
+        cls._cache = BoundedCache(max(1, max_size), ttl=ttl if ttl > 0 else None)
+
+    @classmethod
+    def register_person(cls, platform: Any, user_id: Any, nickname: Any):
+        """确保用户信息已注册，最近注册过的相同用户不会重复访问数据库"""
+        key = (platform, user_id, nickname)
+        if cls._cache.get(key) is not MISSING:
+            return
+        try:
+            Person.register_person(platform=platform, user_id=user_id, nickname=nickname)
+        except Exception as e:
+            logger.error(f"注册用户信息失败: {str(e)}\n{traceback.format_exc()}")
+            return
+        cls._cache.set(key, True)
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        """返回缓存的命中、未命中次数和当前条目数"""
+        return {"hits": cls._cache.hits, "misses": cls._cache.misses, "size": len(cls._cache)}
@@ -1,11 +1,4 @@
-from src.person_info.person_info import Person
-from src.bw_learner.message_recorder import extract_and_distribute_messages
-from src.common.database.database_model import Images
 from src.common.logger import MODULE_ALIASES, MODULE_COLORS, get_logger
-from src.chat.message_receive.chat_stream import get_chat_manager
-from src.chat.utils.utils import is_mentioned_bot_in_message
-from src.chat.utils.chat_message_builder import replace_user_references
-from src.chat.message_receive.storage import MessageStorage
 from src.plugin_system.apis.plugin_register_api import register_plugin
 from src.plugin_system.base.base_plugin import BasePlugin
 from src.plugin_system.base.base_action import BaseAction, ActionActivationType
@@ -14,19 +7,39 @@ from src.plugin_system.base.base_events_handler import BaseEventHandler
 from src.plugin_system.base.config_types import ConfigField
 from src.plugin_system.base.component_types import ComponentInfo, EventType
 from src.plugin_system.base.config_types import ConfigLayout, ConfigTab
-from src.plugin_system.core import component_registry
-from .silence_utils import SilenceUtils
+from .silence_utils import SilenceUtils, LAYER_NAMES
 from .mute_utils import MuteUtils
+from .user_silence_utils import UserSilenceUtils
+from .state_sync import StateSync
+from .silence_store import SilenceStore
+from .image_utils import ImageUtils
+from .storage_utils import StorageUtils
+from .learning_scheduler import LearningScheduler
+from .command_index import CommandIndex
+from .person_utils import PersonUtils
+from .silence_verdict import VerdictEngine
+from .silence_stats import SilenceStats
+from .archive_utils import ArchiveUtils
+from .auto_silence import AutoSilence
+from .mention_utils import MentionUtils
+from .digest_utils import DigestUtils
+from .savings_utils import SavingsUtils
+from .silence_api import SilenceAPI
+from .lazy_import import LazyImport
 from typing import List, Tuple, Type, Optional
-import asyncio
-import re
+import time
+
+# 主程序中较重的模块在第一次使用时才导入
+get_chat_manager = LazyImport("src.chat.message_receive.chat_stream", "get_chat_manager")
+is_mentioned_bot_in_message = LazyImport("src.chat.utils.utils", "is_mentioned_bot_in_message")
+replace_user_references = LazyImport("src.chat.utils.chat_message_builder", "replace_user_references")
+component_registry = LazyImport("src.plugin_system.core", "component_registry")
 
 MODULE_ALIASES["Silence"] = "沉默插件" # 定义插件的日志前缀名
 MODULE_ALIASES["Silence_Save"] = "所见" # 特殊的保存日志前缀名
 MODULE_COLORS["Silence"] = "\033[38;5;27m" # 浅蓝色
 MODULE_COLORS["Silence_Save"] = "\033[38;5;82m" # 亮蓝色
 logger = get_logger("Silence") # 正式创建日志实例
-logger_save = get_logger("Silence_Save") # 一个特殊的保存日志实例
 
 @register_plugin
 class SilencePlugin(BasePlugin):
@@ -48,14 +61,17 @@ class SilencePlugin(BasePlugin):
         "components": "插件组件开关配置",
         "permissions": "权限配置(内部设置均可热重载)",
         "adjustment": "沉默的个性化调整(内部设置均可热重载)",
-        "experimental": "实验性功能（内部设置均可热重载）"
+        "experimental": "实验性功能（内部设置均可热重载）",
+        "schedule": "定时沉默（内部设置均可热重载）",
+        "savings": "节省统计的估算参数（内部设置均可热重载）",
+        "performance": "性能调优（修改后需重启麦麦生效）"
     } 
 
     config_schema = {
     "plugin": {
         "config_version": ConfigField(
             type=str,
-            default="1.6.6",
+            default="1.7.0",
             description="插件配置文件版本号",
             disabled=True
         ),
@@ -144,6 +160,21 @@ class SilencePlugin(BasePlugin):
             default=False,
             description="是否在沉默状态下继续进行表达方式学习"
         ),
+        "learning_min_messages": ConfigField(
+            type=int,
+            default=10,
+            description="沉默状态下每攒够多少条新消息进行一次表达方式学习"
+        ),
+        "learning_max_delay": ConfigField(
+            type=float,
+            default=60.0,
+            description="沉默状态下新消息不够数量时，最多等待多少秒也会进行一次表达方式学习"
+        ),
+        "learning_min_interval": ConfigField(
+            type=float,
+            default=30.0,
+            description="沉默状态下同一聊天两次表达方式学习的最小间隔，单位为秒"
+        ),
         "silence_special_check": ConfigField(
             type=bool,
             default=False,
@@ -160,6 +191,169 @@ class SilencePlugin(BasePlugin):
             default=[123456789],
             description="被沉默检查的群聊ID列表，仅在启用默认沉默功能时生效",
             item_type="number",
+        ),
+        "auto_silence": ConfigField(
+            type=bool,
+            default=False,
+            description="是否在群聊刷屏时按消息速率自动沉默（实验性功能）"
+        ),
+        "auto_silence_window": ConfigField(
+            type=float,
+            default=60.0,
+            description="统计消息速率的滑动窗口长度，单位为秒"
+        ),
+        "auto_silence_low_rate": ConfigField(
+            type=int,
+            default=30,
+            description="窗口内消息数达到多少条时自动进入low程度的沉默，设为0则不启用"
+        ),
+        "auto_silence_medium_rate": ConfigField(
+            type=int,
+            default=60,
+            description="窗口内消息数达到多少条时自动进入medium程度的沉默，设为0则不启用"
+        ),
+        "auto_silence_release_rate": ConfigField(
+            type=int,
+            default=10,
+            description="自动沉默期间窗口内消息数回落到多少条及以下时自动解除沉默，必须小于 auto_silence_low_rate 和 auto_silence_medium_rate"
+        ),
+        "digest_mode": ConfigField(
+            type=bool,
+            default=False,
+            description="是否启用摘要模式：沉默期间的消息不再逐条存储，而是在沉默结束时整理成一条摘要交给麦麦（实验性功能）"
+        ),
+        "digest_max_excerpts": ConfigField(
+            type=int,
+            default=10,
+            description="摘要中保留的最近消息条数"
+        ),
+        "digest_excerpt_length": ConfigField(
+            type=int,
+            default=100,
+            description="摘要中每条消息最多保留的字数，设为0则不截断"
+        )
+    },
+    "schedule": {
+        "enable_quiet_hours": ConfigField(
+            type=bool,
+            default=False,
+            description="是否启用定时沉默，处于时间窗口内的群聊会自动保持沉默，艾特也无法打断"
+        ),
+        "quiet_hours": ConfigField(
+            type=list,
+            default=["123456789 1-5 00:00-08:00"],
+            description="定时沉默规则列表，每条格式为\"群号 星期 开始-结束\"，群号填*表示所有群聊，星期为1-7（周一到周日），可以写*、1-5或6,7，结束早于开始表示跨过午夜，例如\"* * 23:00-07:00\"（默认规则仅示例）",
+            item_type="string",
+        )
+    },
+    "savings": {
+        "llm_calls_per_message": ConfigField(
+            type=float,
+            default=1.0,
+            description="每截断一条消息估计能省下的LLM调用次数（规划器、回复器等），用于 /silence savings 的估算"
+        ),
+        "llm_calls_per_command": ConfigField(
+            type=float,
+            default=0.5,
+            description="每拦截一条命令估计能省下的LLM调用次数"
+        ),
+        "tokens_per_llm_call": ConfigField(
+            type=float,
+            default=3000,
+            description="每次LLM调用估计消耗的Token数"
+        )
+    },
+    "performance": {
+        "storage_queue_size": ConfigField(
+            type=int,
+            default=1000,
+            description="沉默期间消息存储队列的容量，队列满时处理器会等待数据库写入腾出空间"
+        ),
+        "storage_batch_size": ConfigField(
+            type=int,
+            default=50,
+            description="沉默期间消息每批写入数据库的最大条数"
+        ),
+        "storage_flush_interval": ConfigField(
+            type=float,
+            default=1.0,
+            description="沉默期间消息最多在队列中等待多少秒就会被写入数据库"
+        ),
+        "learning_max_concurrency": ConfigField(
+            type=int,
+            default=2,
+            description="沉默状态下所有聊天同时进行表达方式学习的最大数量"
+        ),
+        "person_cache_size": ConfigField(
+            type=int,
+            default=2048,
+            description="沉默期间用户注册缓存的最大条目数，缓存命中时不再重复注册用户信息"
+        ),
+        "person_cache_ttl": ConfigField(
+            type=float,
+            default=600.0,
+            description="沉默期间用户注册缓存的存活时间，单位为秒，过期后会重新注册一次"
+        ),
+        "enable_stats": ConfigField(
+            type=bool,
+            default=False,
+            description="是否开启运行统计（各处理阶段耗时和每个聊天的消息计数），开启后可以用 /silence stats 查看"
+        ),
+        "state_backend": ConfigField(
+            type=str,
+            default="local",
+            description="沉默与禁言状态的存储方式，'local'为仅本进程使用，'shared'为同一台机器上的多个麦麦进程共用同一个状态数据库并实时同步",
+            choices=["local", "shared"]
+        ),
+        "state_db_path": ConfigField(
+            type=str,
+            default="",
+            description="状态数据库文件的路径，留空则使用插件目录下的silence_state.db。多个麦麦进程共享状态时应填入同一个路径"
+        ),
+        "state_sync_interval": ConfigField(
+            type=float,
+            default=0.05,
+            description="共享模式下检查其他进程写入的间隔，单位为秒"
+        ),
+        "archive_enabled": ConfigField(
+            type=bool,
+            default=False,
+            description="是否把沉默期间看到的消息以JSONL格式归档到文件（在后台批量写入）"
+        ),
+        "archive_path": ConfigField(
+            type=str,
+            default="",
+            description="归档文件的路径，留空则使用插件目录下的silence_archive/archive.jsonl"
+        ),
+        "archive_max_mb": ConfigField(
+            type=float,
+            default=10.0,
+            description="单个归档文件的大小上限，单位为MB，超过后轮转并用gzip压缩旧文件"
+        ),
+        "archive_backup_count": ConfigField(
+            type=int,
+            default=5,
+            description="保留的压缩归档文件数量"
+        ),
+        "console_per_minute": ConfigField(
+            type=float,
+            default=30.0,
+            description="每个聊天每分钟最多在控制台打印多少条沉默期间的消息，超出的部分只归档不打印"
+        ),
+        "console_burst": ConfigField(
+            type=int,
+            default=10,
+            description="每个聊天在控制台连续打印沉默期间消息的突发上限，设为0则完全不打印"
+        ),
+        "enable_savings": ConfigField(
+            type=bool,
+            default=True,
+            description="是否统计沉默截断的消息和拦截的命令数量（按天、按聊天记录），可以用 /silence savings 查看估算节省的Token"
+        ),
+        "savings_flush_interval": ConfigField(
+            type=float,
+            default=60.0,
+            description="节省统计写入本地数据库的间隔，单位为秒"
         )
     }
 }
@@ -174,11 +368,29 @@ class SilencePlugin(BasePlugin):
             sections=["plugin", "components", "permissions", "adjustment"],
             icon="settings"
         ),
+        ConfigTab(
+            id="schedule",
+            title="定时沉默",
+            sections=["schedule"],
+            icon="clock"
+        ),
+        ConfigTab(
+            id="savings",
+            title="节省统计",
+            sections=["savings"],
+            icon="coins"
+        ),
         ConfigTab(
             id="experimental",
             title="实验性功能",
             sections=["experimental"],
             icon="flask"
+        ),
+        ConfigTab(
+            id="performance",
+            title="性能调优",
+            sections=["performance"],
+            icon="gauge"
         )
     ]
 )
@@ -189,6 +401,69 @@ class SilencePlugin(BasePlugin):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # 初始化时同步读取一次配置，之后由后台线程监视配置文件变化
+        SilenceUtils.reload_config()
+        SilenceUtils.start_config_watcher()
+
+        # 从本地数据库恢复重启前的沉默和禁言状态，共享模式下还会记录变更日志供其他进程同步
+        shared_state = self.get_config("performance.state_backend", "local") == "shared"
+        if SilenceStore.open(self.get_config("performance.state_db_path", "") or None, journal=shared_state):
+            silence_count = SilenceUtils.restore()
+            mute_count = MuteUtils.restore()
+            user_count = UserSilenceUtils.restore()
+            logger.info(f"已恢复 {silence_count} 条沉默状态、{user_count} 条用户沉默和 {mute_count} 条禁言状态")
+
+        # 沉默期间的消息存储走延迟写入队列
+        StorageUtils.configure(
+            max_size=self.get_config("performance.storage_queue_size", 1000),
+            batch_size=self.get_config("performance.storage_batch_size", 50),
+            flush_interval=self.get_config("performance.storage_flush_interval", 1.0),
+        )
+
+        # 沉默期间表达学习的全局并发上限
+        LearningScheduler.configure(self.get_config("performance.learning_max_concurrency", 2))
+
+        # 沉默期间用户注册缓存
+        PersonUtils.configure(
+            max_size=self.get_config("performance.person_cache_size", 2048),
+            ttl=self.get_config("performance.person_cache_ttl", 600.0),
+        )
+
+        # 沉默期间消息的归档和控制台输出
+        ArchiveUtils.configure(
+            archive=self.get_config("performance.archive_enabled", False),
+            path=self.get_config("performance.archive_path", "") or None,
+            max_mb=self.get_config("performance.archive_max_mb", 10.0),
+            backup_count=self.get_config("performance.archive_backup_count", 5),
+            console_per_minute=self.get_config("performance.console_per_minute", 30.0),
+            console_burst=self.get_config("performance.console_burst", 10),
+        )
+
+        # 摘要模式在沉默结束时写入摘要
+        SilenceUtils.add_exit_listener(DigestUtils.on_silence_exit)
+
+        # 其他插件订阅的沉默和禁言状态变化
+        SilenceAPI.attach()
+
+        # 运行统计
+        SilenceStats.configure(self.get_config("performance.enable_stats", False))
+
+        # 节省统计
+        SavingsUtils.configure(
+            self.get_config("performance.enable_savings", True),
+            self.get_config("performance.savings_flush_interval", 60.0),
+        )
+
+        # 多进程共享状态同步
+        StateSync.configure(shared_state and SilenceStore.is_open(), self.get_config("performance.state_sync_interval", 0.05))
+
+        # 插件在事件循环中加载时直接启动后台任务，否则等待启动事件
+        SilenceUtils.start_background()
+        MuteUtils.start_background()
+        UserSilenceUtils.start_background()
+        StateSync.start()
+        SavingsUtils.start()
+
     def get_plugin_components(self) -> List[Tuple[ComponentInfo, Type]]:
         """返回插件包含的组件列表"""
         components = []
@@ -199,6 +474,10 @@ class SilencePlugin(BasePlugin):
         if self.get_config("components.enable_silence_event_handler", True):
             components.append((SilenceEventHandler.get_handler_info(), SilenceEventHandler))
             components.append((SilenceCommandEventHandler.get_handler_info(), SilenceCommandEventHandler))
+
+        # 生命周期处理器负责后台任务的启停，不受组件开关影响
+        components.append((SilenceStartEventHandler.get_handler_info(), SilenceStartEventHandler))
+        components.append((SilenceStopEventHandler.get_handler_info(), SilenceStopEventHandler))
         return components
     
 class SilenceAction(BaseAction):
@@ -221,7 +500,9 @@ class SilenceAction(BaseAction):
     action_description = "根据当前聊天的情况判断自己是否应该选择进入沉默状态" 
     action_parameters = {
     "case": "让你决定执行这个动作的情况，必填，只能填一个参数。如果你觉得自己应该收敛一点，适当保持沉默，填'low'；如果你感觉聊天气氛不对劲，自己说错了话，或者参与聊天的人显著对你说话有意见甚至生气，隐约表达了需要你安静的意愿，填'medium'；如果你是被别人直接明确且礼貌地要求了保持沉默一段时间，填'serious'",
-    "time": "沉默的时间长度，选填，必须填入以秒为单位的整数数字。如果被人明确要求了保持沉默多久的话，把对方要求的时间长度换算成秒数填入即可；如果没有人对你明确要求沉默多久,请一定要保持该参数为None，绝对不要填入数字！"
+    "time": "沉默的时间长度，选填，必须填入以秒为单位的整数数字。如果被人明确要求了保持沉默多久的话，把对方要求的时间长度换算成秒数填入即可；如果没有人对你明确要求沉默多久,请一定要保持该参数为None，绝对不要填入数字！",
+    "target": "沉默的对象，选填。如果只是当前这条消息的发送者一直在刷屏、骚扰你，你只想不再理会这一个人而不是整个群聊，填'sender'；其他情况请保持该参数为None",
+    "reason": "沉默的原因，选填，用一句简短的话概括即可"
     }
     action_require = [
     "当你觉得自己话太多了，同时有人也明确反映你说话太多时使用该动作",
@@ -240,6 +521,10 @@ class SilenceAction(BaseAction):
 
         # 获取当前聊天流ID
         stream_id = self.chat_stream.stream_id
+
+        # 只针对当前消息发送者的用户沉默
+        if self.action_data.get("target") == "sender":
+            return await self._silence_sender(stream_id)
         
         # 检查是否可以添加沉默
         is_silenced, _ = SilenceUtils.is_silenced(stream_id)
@@ -265,12 +550,37 @@ class SilenceAction(BaseAction):
             return True, f"已对聊天流 {stream_id} 执行沉默操作"
         else:
             return False, f"聊天流 {stream_id} 已经在沉默列表里"
+
+    async def _silence_sender(self, stream_id: str) -> Tuple[bool, str]:
+        """在当前聊天流中只沉默当前消息的发送者"""
+        user_id = getattr(self, "user_id", None)
+        if not user_id:
+            return False, "无法确定当前消息的发送者"
+        if UserSilenceUtils.is_silenced(stream_id, user_id)[0]:
+            return False, f"用户 {user_id} 已经在聊天流 {stream_id} 中被沉默"
+
+        ok, duration = SilenceUtils.resolve_duration(self.action_data.get("case", ""), self.action_data.get("time"))
+        if not ok:
+            return False, "无效的沉默参数"
+        UserSilenceUtils.add(stream_id, user_id, duration, self.action_data.get("reason") or "")
+
+        nickname = getattr(self, "user_nickname", None) or user_id
+        await self.store_action_info(
+            action_build_into_prompt=True,
+            action_prompt_display=f"已决定在这个聊天里暂时不再理会{nickname}",
+            action_done=True
+            )
+        return True, f"已在聊天流 {stream_id} 中沉默用户 {user_id}"
         
 class SilenceCommand(BaseCommand):
     """
     沉默命令
     -允许管理员用户手动让麦麦进入沉默状态，或解除沉默状态
     -可以指定沉默时长，不指定即为永久沉默
+    -末尾加上 in 群号1 群号2... 或 all 可以一次操作多个群聊
+    -/silence list [页码] 按剩余时间列出沉默中的聊天，/silence status 查看当前聊天的状态
+    -/silence stats 查看插件的运行统计，/silence savings [天数] 查看估算节省的Token
+    -/silence user 用户ID [时长] [原因] 只在当前聊天中沉默某个用户，/silence user 用户ID false 解除
     """
     # 命令名
     command_name: str = "silence_command"
@@ -278,56 +588,200 @@ class SilenceCommand(BaseCommand):
     # 命令描述
     command_description: str = "沉默插件命令模块"
     
-    # 命令匹配正则表达式
-    command_pattern: str = r"^/silence\s+(?P<action>\w+)(?:\s+(?P<duration>\d+))?\s*$"
+    # 命令匹配正则表达式（list 分支中 duration 表示页码；user 分支中 user_action 为时长或 false）
+    command_pattern: str = (
+        r"^/silence\s+(?:user\s+(?P<user_id>\d+)(?:\s+(?P<user_action>(?:false|\d+)(?=\s|$)))?(?:\s+(?P<reason>\S.*?))?"
+        r"|(?P<action>\w+)(?:\s+(?P<duration>\d+))?(?:\s+(?P<targets>all|in(?:\s+\d+)+))?)\s*$"
+    )
+
+    # /silence list 每页显示的条数，以及可以请求的最大页码（命令正则不限制数字长度）
+    list_page_size: int = 10
+    list_max_page: int = 100000
 
     # 命令执行总函数
     async def execute(self) -> Tuple[bool, Optional[str], bool]:
 
-        # 确定发送者ID（传进来的是str，因此要转换成int）
-        sender_id = int(self.message.message_info.user_info.user_id)
+        # 确定发送者ID（配置快照的索引同时收录了int和str形式，无需转换）
+        sender_id = self.message.message_info.user_info.user_id
 
         # 使用权限检查
         if not SilenceUtils.check_person_permission(sender_id):
             await self.send_text("权限不足，你无权使用此命令")    
             return True, "权限不足，无权使用此命令", True
-         
-        # 私聊环境检查
-        if not self.message.message_info.group_info:
-            logger.info("你为什么要在私聊环境使用沉默插件的指令？")
-            return True, "该命令不应该用于私聊环境", True
-        
+
+        # 只针对某个用户的沉默
+        if self.matched_groups.get("user_id"):
+            return await self._handle_user_silence()
+
         # 解析命令需要参数
-        action = self.matched_groups.get("action", "")
+        action = self.matched_groups.get("action") or ""
         duration = self.matched_groups.get("duration")
-        stream_id = self.message.chat_stream.stream_id
+        targets = self.matched_groups.get("targets")
+        chat_stream = self.message.chat_stream
+
+        # 以下几个只读分支私聊也可以用
+        # 查看运行统计的分支
+        if action == "stats":
+            await self.send_text(SilenceStats.format_report(chat_stream.stream_id if chat_stream else None))
+            return True, "已发送沉默插件运行统计", True
+
+        # 列出沉默中聊天的分支
+        if action == "list":
+            await self.send_text(self._format_list(int(duration) if duration else 1))
+            return True, "已发送沉默列表", True
+
+        # 查看节省统计的分支（duration 表示天数）
+        if action == "savings":
+            group_name = chat_stream.group_info.group_name if chat_stream and chat_stream.group_info else None
+            report = SavingsUtils.format_report(
+                SilenceUtils.get_config(), int(duration) if duration else 7, chat_stream.stream_id if chat_stream else None, group_name
+            )
+            await self.send_text(report)
+            return True, "已发送节省统计", True
+
+        # 查看当前聊天状态的分支
+        if action == "status":
+            await self.send_text(self._format_status(chat_stream))
+            return True, "已发送沉默状态", True
+
+        if action not in ("true", "false"):
+            return True, f"未知的沉默命令 {action}", True
+
         duration_val = float(duration) if duration else None
         case = "command"
+
+        # 批量操作的分支（指定了群号，私聊也可以用）
+        if targets:
+            stream_ids = self._resolve_targets(action, targets)
+            changed = 0
+            for stream_id in stream_ids:
+                if action == "true":
+                    changed += SilenceUtils.add_silence(case, duration_val, stream_id)
+                else:
+                    changed += SilenceUtils.remove_silence(stream_id)
+            verb = "进入沉默" if action == "true" else "解除沉默"
+            await self.send_text(f"已让 {changed}/{len(stream_ids)} 个聊天{verb}")
+            return True, f"批量{verb} {changed} 个聊天", True
+
+        # 私聊环境检查
+        if not self.message.message_info.group_info:
+            logger.info("你为什么要在私聊环境使用沉默插件的指令？")
+            return True, "该命令不应该用于私聊环境", True
+
+        stream_id = chat_stream.stream_id
         
         # 添加沉默状态的分支
         if action == "true":
 
-            # 检查是否可以添加沉默
-            is_silenced, _ = SilenceUtils.is_silenced(stream_id)
-
-            # 如果已经沉默了，先移除再添加（直接覆盖已有的）
-            if is_silenced:
-                SilenceUtils.remove_silence(stream_id) 
-
-            # 交给SilenceUtils干活咯
+            # 交给SilenceUtils干活咯（只覆盖指令层，自然语言施加的沉默在指令沉默结束后继续生效）
             if SilenceUtils.add_silence(case, duration_val, stream_id):
                 return True, f"已添加聊天流 {stream_id} 到沉默列表", True
             else:
                 return True, f"聊天流 {stream_id} 沉默失败了", True
         
         # 移除沉默状态的分支
-        elif action == "false":
+        else:
 
             # 交给SilenceUtils干活咯
             if SilenceUtils.remove_silence(stream_id):
                 return True, f"已从沉默列表移除聊天流 {stream_id}", True
             else:
                 return True, f"聊天流 {stream_id}并不处于沉默状态中，或者移除失败了 ", True
+
+    async def _handle_user_silence(self) -> Tuple[bool, Optional[str], bool]:
+        """/silence user 用户ID [时长|false] [原因]"""
+        if not self.message.message_info.group_info:
+            logger.info("你为什么要在私聊环境使用沉默插件的指令？")
+            return True, "该命令不应该用于私聊环境", True
+
+        stream_id = self.message.chat_stream.stream_id
+        user_id = self.matched_groups["user_id"]
+        user_action = self.matched_groups.get("user_action")
+        reason = self.matched_groups.get("reason") or ""
+
+        # false 打错（如 falsehood）时会被当成永久沉默的原因，这里直接拒绝；
+        # 时长必须是单独的一段数字，以数字开头的原因（如 2次刷屏）照常作为原因
+        if user_action is None and reason.lower().startswith("false"):
+            return True, "无法识别的参数，解除用户沉默请使用: /silence user 用户ID false", True
+
+        if user_action == "false":
+            if UserSilenceUtils.remove(stream_id, user_id):
+                return True, f"已解除聊天流 {stream_id} 中用户 {user_id} 的沉默", True
+            return True, f"用户 {user_id} 在聊天流 {stream_id} 中并没有被沉默", True
+
+        duration = float(user_action) if user_action else None
+        UserSilenceUtils.add(stream_id, user_id, duration, reason)
+        return True, f"已在聊天流 {stream_id} 中沉默用户 {user_id}", True
+
+    def _resolve_targets(self, action: str, targets: str) -> List[str]:
+        """把 all 或 in 群号1 群号2... 解析成聊天流ID列表"""
+        if targets == "all":
+            # 解除时只需要处理沉默中的聊天；施加时覆盖麦麦已知的所有群聊
+            if action == "false":
+                return SilenceUtils.silenced_streams()
+            streams = getattr(get_chat_manager(), "streams", {})
+            return [stream_id for stream_id, stream in streams.items() if stream.group_info]
+
+        platform = self.message.message_info.platform
+        group_ids = targets.split()[1:]
+        return list(dict.fromkeys(SilenceUtils.generate_stream_id(platform, "", group_id) for group_id in group_ids))
+
+    @staticmethod
+    def _chat_name(stream_id: str) -> str:
+        stream = get_chat_manager().get_stream(stream_id)
+        if stream is not None and stream.group_info:
+            return f"{stream.group_info.group_name}({stream.group_info.group_id})"
+        return stream_id[:8]
+
+    def _format_list(self, page: int) -> str:
+        page = min(max(1, page), self.list_max_page)
+        total, entries = SilenceUtils.list_silences((page - 1) * self.list_page_size, self.list_page_size)
+        if not total:
+            return "当前没有沉默中的聊天"
+        pages = (total + self.list_page_size - 1) // self.list_page_size
+        if not entries:
+            return f"只有 {pages} 页"
+
+        now = time.time()
+        lines = [f"沉默中的聊天 共{total}个（第{page}/{pages}页，按剩余时间排序）"]
+        for stream_id, expiration in entries:
+            remaining = "永久沉默" if expiration is None else f"剩余{SilenceUtils.format_remaining(expiration - now)}"
+            lines.append(f"{self._chat_name(stream_id)}: {remaining}")
+        return "\n".join(lines)
+
+    def _format_status(self, chat_stream) -> str:
+        lines = [f"沉默中的聊天共 {len(SilenceUtils.silenced_streams())} 个"]
+        if chat_stream is None or not chat_stream.group_info:
+            return lines[0]
+
+        stream_id = chat_stream.stream_id
+        is_silenced, remaining = SilenceUtils.get_silence_remaining(stream_id)
+        if is_silenced:
+            lines.append("当前聊天: 永久沉默" if remaining is None else f"当前聊天: 沉默中，剩余{SilenceUtils.format_remaining(remaining)}")
+            now = time.time()
+            layers = [
+                f"{LAYER_NAMES[layer]}({'永久' if expiration is None else f'剩余{SilenceUtils.format_remaining(expiration - now)}'})"
+                for layer, expiration in SilenceUtils.get_layers(stream_id)
+            ]
+            lines.append("生效的沉默层: " + " > ".join(layers))
+        else:
+            lines.append("当前聊天: 未沉默")
+
+        if SilenceUtils.is_quiet_hours(chat_stream.group_info.group_id)[0]:
+            lines.append("当前聊天: 处于定时沉默时间窗口内")
+
+        users = UserSilenceUtils.list_users(stream_id)
+        if users:
+            now = time.time()
+            lines.append(f"当前聊天: 单独沉默了 {len(users)} 个用户")
+            for user_id, expiration, reason in users:
+                remaining = "永久" if expiration is None else f"剩余{SilenceUtils.format_remaining(expiration - now)}"
+                lines.append(f"  {user_id}: {remaining}{f'（{reason}）' if reason else ''}")
+
+        is_muted, mute_remaining = MuteUtils.get_mute_remaining(stream_id)
+        if is_muted:
+            lines.append(f"当前聊天: 麦麦被禁言中，剩余{SilenceUtils.format_remaining(mute_remaining) if mute_remaining is not None else '直到解除为止'}")
+        return "\n".join(lines)
             
 class SilenceCommandEventHandler(BaseEventHandler):
     """
@@ -351,45 +805,44 @@ class SilenceCommandEventHandler(BaseEventHandler):
 
     async def execute(self, message):
         is_command, available_commands = SilenceUtils.is_disable_commands()
-        if is_command:
-            platform = message.message_base_info.get("platform")
-            user_id = message.message_base_info.get("user_id")
-            group_id = message.message_base_info.get("group_id")
-            stream_id = SilenceUtils.generate_stream_id(platform,user_id,group_id)
-
-            # 经过验证，指令应当只能是单文本，故检查seg数量
-            if len(message.message_segments) == 1:
-                seg = message.message_segments[0]
-
-                # 检查是不是指令，是的话走下一步
-                if seg.type == "text":
-                    command_result = component_registry.find_command_by_text(seg.data)
-                    if command_result:
-                        _, _, command_info = command_result
-                        command_name = command_info.name
-
-                        # 被豁免的指令直接放行
-                        if command_name in available_commands:
-                            return True, True, None, None, None
-
-                        # 检查是否处于沉默状态
-                        is_silenced, _ = SilenceUtils.is_silenced(stream_id)
-
-                        # 进行针对特定群聊的沉默检查（实验性功能）
-                        if not is_silenced and group_id:
-                            is_silenced, _ = SilenceUtils.is_silenced_group(int(group_id))
-
-                            # 直接添加到沉默列表
-                            if is_silenced:
-                                SilenceUtils.add_silence("command", None, stream_id)
-
-                        # 进行针对特定用户的沉默检查（实验性功能）
-                        if not is_silenced and user_id:
-                            is_silenced, _ = SilenceUtils.is_silenced_someone(int(user_id))
-
-                        if is_silenced:
-                            return True, False, None, None, None  # 成功执行，阻止后续处理，且不返回任何消息
-                    
+        if not is_command:
+            return True, True, None, None, None
+
+        # 经过验证，指令应当只能是单文本，故检查seg数量
+        if len(message.message_segments) != 1:
+            return True, True, None, None, None
+        seg = message.message_segments[0]
+        if seg.type != "text":
+            return True, True, None, None, None
+
+        platform = message.message_base_info.get("platform")
+        user_id = message.message_base_info.get("user_id")
+        group_id = message.message_base_info.get("group_id")
+        stream_id = SilenceUtils.generate_stream_id(platform,user_id,group_id)
+
+        # 先检查是否处于沉默状态，绝大多数聊天流都不在沉默中，直接放行（判定结果会被随后的ON_MESSAGE复用）
+        verdict = VerdictEngine.decide(stream_id, user_id, group_id)
+        if not verdict.silenced:
+            return True, True, None, None, None
+
+        # 首字符不可能是任何命令开头的文本无需再跑命令正则
+        if not CommandIndex.may_be_command(seg.data):
+            return True, True, None, None, None
+
+        # 检查是不是指令，是的话走下一步
+        command_result = component_registry.find_command_by_text(seg.data)
+        if command_result:
+            _, _, command_info = command_result
+            command_name = command_info.name
+
+            # 被豁免的指令直接放行
+            if command_name in available_commands:
+                return True, True, None, None, None
+
+            if SavingsUtils.enabled:
+                SavingsUtils.count(stream_id, verdict.reason, "command")
+            return True, False, None, None, None  # 成功执行，阻止后续处理，且不返回任何消息
+
         return True, True, None, None, None  # 成功执行，允许后续处理
             
 class SilenceEventHandler(BaseEventHandler):
@@ -413,6 +866,11 @@ class SilenceEventHandler(BaseEventHandler):
     intercept_message = True
 
     async def execute(self, message):
+
+        # 统计关闭时下面所有的计时都只是一次布尔判断
+        stats = SilenceStats.enabled
+        if stats:
+            start = lap = SilenceStats.now()
        
         # 获取当前聊天流ID和相关需要信息
         stream_id = message.stream_id
@@ -422,40 +880,70 @@ class SilenceEventHandler(BaseEventHandler):
         # 先进行一次禁言状态检查更新
         MuteUtils.mute_check(message) 
 
-        # 检查是否处于沉默状态
-        is_silenced, silence_reason = SilenceUtils.is_silenced(stream_id)
-
-        # 进行针对特定群聊的沉默检查（实验性功能）
-        if not is_silenced and group_id:
-            is_silenced, silence_reason = SilenceUtils.is_silenced_group(int(group_id))
-
-            # 直接添加到沉默列表
-            if is_silenced:
-                SilenceUtils.add_silence("command", None, stream_id)
+        # 按群聊消息速率施加或解除自动沉默（实验性功能）
+        config = SilenceUtils.get_config()
+        if config.auto_silence and group_id:
+            AutoSilence.observe(stream_id, config)
 
-        # 进行针对特定用户的沉默检查（实验性功能）
-        if not is_silenced and user_id:
-            is_silenced, silence_reason = SilenceUtils.is_silenced_someone(int(user_id))
+        # 计算（或复用ON_MESSAGE_PRE_PROCESS阶段已算出的）沉默判定结果
+        verdict = VerdictEngine.decide(stream_id, user_id, group_id)
+        if stats:
+            lap = SilenceStats.lap("silence_check", lap)
 
         # 如果处于沉默或被禁言状态，则截断回复流程
-        if is_silenced or MuteUtils.is_muted(stream_id):
+        if verdict.intercept:
 
             # 获取原始消息(MessageRecv对象)
             chat_stream = get_chat_manager().get_stream(message.stream_id)
             original_message = chat_stream.context.get_last_message()
 
-            # 计算at信息等
-            is_mentioned, is_at, reply_probability_boost = is_mentioned_bot_in_message(original_message)
+            # 判断能否被艾特打断：艾特打断不了的沉默不需要计算，消息里连麦麦的账号都没有时也不可能是艾特
+            # 预检查只用于这个判断，存储的at信息在真正需要存储时再完整计算（None 表示还没算）
+            mention = None
+            if not verdict.unbreakable and MentionUtils.may_mention_bot(message):
+                mention = is_mentioned_bot_in_message(original_message)
+            if stats:
+                lap = SilenceStats.lap("mention", lap)
 
             # 处理被at的特殊情况，解除沉默状态
-            if is_at and silence_reason not in ["force_silence", "special_silence"]:
+            if mention is not None and mention[1]:
                 logger.info(f"检测到在沉默状态下被at，已解除聊天流 {stream_id} 的沉默状态")
+
+                # 摘要模式下先把沉默期间的摘要写进上下文，再放行这条消息
+                if config.digest_mode:
+                    await DigestUtils.flush(stream_id)
                 SilenceUtils.remove_silence(stream_id)
+                if stats:
+                    SilenceStats.count_at_broken(stream_id)
+                    SilenceStats.lap("event_handler", start)
                 return True, True, None, None, None  # 成功执行，允许后续处理
-            
-            if silence_reason == "force_silence" and is_at:
+
+            # 摘要模式下只把消息计入摘要，省掉逐条存储、替换和日志
+            # 只有会结束的沉默（没有配置层，只有自然语言层或指令层）才会写出摘要；定时沉默、默认沉默和用户沉默的消息照常存储和学习
+            if config.digest_mode and verdict.silenced and SilenceUtils.can_end(stream_id):
+                DigestUtils.add(
+                    stream_id,
+                    message.message_base_info.get("user_nickname"),
+                    message.plain_text or "",
+                    config.digest_max_excerpts,
+                    config.digest_excerpt_length,
+                )
+                if SavingsUtils.enabled:
+                    SavingsUtils.count(stream_id, verdict.reason)
+                if stats:
+                    SilenceStats.count_intercepted(stream_id)
+                    SilenceStats.lap("event_handler", start)
+                return True, False, None, None, None
+
+            # 计算要存储的at信息（与主程序的计算保持一致，名字提及等预检查看不出来的情况也要记录）
+            if mention is None:
+                mention = is_mentioned_bot_in_message(original_message)
+                if stats:
+                    lap = SilenceStats.lap("mention", lap)
+            is_mentioned, is_at, reply_probability_boost = mention
+            if verdict.reason == "force_silence" and is_at:
                 logger.info(f"该沉默为指令强行指定的永久沉默，艾特无法打断")
-            
+
             # 走一下自定义的消息预加工流程
             userinfo = original_message.message_info.user_info
             chat = original_message.chat_stream
@@ -465,24 +953,15 @@ class SilenceEventHandler(BaseEventHandler):
             original_message.reply_probability_boost = reply_probability_boost
             mes_name = chat.group_info.group_name if chat.group_info else "私聊"
 
-            # 存储消息
-            await MessageStorage.store_message(original_message, chat)
-
-            # 用这个pattern截取出id部分，picid是一个list，并替换成对应的图片描述
-            picid_pattern = r"\[picid:([^\]]+)\]"
-            picid_list = re.findall(picid_pattern, original_message.processed_plain_text)
-
-            # 创建替换后的文本
-            processed_text = original_message.processed_plain_text
-            if picid_list:
-                for picid in picid_list:
-                    image = Images.get_or_none(Images.image_id == picid)
-                    if image and image.description:
-                        # 将[picid:xxxx]替换成图片描述
-                        processed_text = processed_text.replace(f"[picid:{picid}]", f"[图片：{image.description}]")
-                    else:
-                        # 如果没有找到图片描述，则移除[picid:xxxx]标记
-                        processed_text = processed_text.replace(f"[picid:{picid}]", "[图片：网络不好，图片无法加载]")
+            # 存储消息（放进延迟写入队列，不等待数据库）
+            await StorageUtils.store_message(original_message, chat)
+            if stats:
+                lap = SilenceStats.lap("storage", lap)
+
+            # 将[picid:xxxx]一次性替换成对应的图片描述（批量查询+缓存）
+            processed_text = ImageUtils.replace_picids(original_message.processed_plain_text)
+            if stats:
+                lap = SilenceStats.lap("picid", lap)
 
             # 应用用户引用格式替换，将回复<aaa:bbb>和@<aaa:bbb>格式转换为可读格式
             processed_plain_text = replace_user_references(
@@ -490,20 +969,101 @@ class SilenceEventHandler(BaseEventHandler):
                 original_message.message_info.platform,  # type: ignore
                 replace_bot_name=True,
             )
+            if stats:
+                lap = SilenceStats.lap("user_refs", lap)
 
-            logger_save.info(f"[{mes_name}](沉默中，已记录){userinfo.user_nickname}:{processed_plain_text}")  # type: ignore
+            # 归档并（限流地）打印到控制台，实际的写入由后台协程完成
+            ArchiveUtils.record(stream_id, mes_name, userinfo.user_id, userinfo.user_nickname, processed_plain_text)  # type: ignore
+            if stats:
+                lap = SilenceStats.lap("log", lap)
 
-            # 确保用户信息已注册
-            _ = Person.register_person(
+            # 确保用户信息已注册（最近注册过的用户走缓存，不重复访问数据库）
+            PersonUtils.register_person(
                 platform=original_message.message_info.platform,  # type: ignore
                 user_id=original_message.message_info.user_info.user_id,  # type: ignore
                 nickname=userinfo.user_nickname,  # type: ignore
             )
+            if stats:
+                lap = SilenceStats.lap("person", lap)
 
-            # 在配置启用的情况下，沉默状态下也进行表达学习（实验性功能）
-            if SilenceUtils.check_expression_learning():
-                asyncio.create_task(extract_and_distribute_messages(stream_id))
+            # 在配置启用的情况下，沉默状态下也进行表达学习（实验性功能），按数量和时间阈值合并调度
+            if config.silence_expression_learning:
+                LearningScheduler.notify(stream_id, config.learning_min_messages, config.learning_max_delay, config.learning_min_interval)
 
+            if SavingsUtils.enabled:
+                SavingsUtils.count(stream_id, verdict.reason if verdict.silenced else "mute")
+            if stats:
+                SilenceStats.count_intercepted(stream_id)
+                SilenceStats.lap("event_handler", start)
             return True, False, None, None, None  # 成功执行，阻止后续处理，且不返回任何消息
         else:
-            return True, True, None, None, None  # 成功执行，允许后续处理
\ No newline at end of file
+            if stats:
+                SilenceStats.count_passed(stream_id)
+                SilenceStats.lap("event_handler", start)
+            return True, True, None, None, None  # 成功执行，允许后续处理
+
+class SilenceStartEventHandler(BaseEventHandler):
+    """
+    沉默插件启动事件处理器
+    -监听ON_START事件，启动过期调度等后台任务
+    """
+    # 事件类型
+    event_type = EventType.ON_START
+
+    # 处理器名称
+    handler_name = "silence_start_event_handler"
+
+    # 处理器描述
+    handler_description = "沉默插件启动事件处理器"
+
+    # 处理器权重
+    weight = 0
+
+    # 是否阻塞消息（消息的处理流程到底等不等这个处理器忙活完）
+    intercept_message = False
+
+    async def execute(self, message):
+        SilenceUtils.start_background()
+        MuteUtils.start_background()
+        UserSilenceUtils.start_background()
+        StateSync.start()
+        SavingsUtils.start()
+        return True, True, None, None, None
+
+class SilenceStopEventHandler(BaseEventHandler):
+    """
+    沉默插件停止事件处理器
+    -监听ON_STOP事件，停止后台任务、写完队列中的数据并关闭状态数据库
+    """
+    # 事件类型
+    event_type = EventType.ON_STOP
+
+    # 处理器名称
+    handler_name = "silence_stop_event_handler"
+
+    # 处理器描述
+    handler_description = "沉默插件停止事件处理器"
+
+    # 处理器权重
+    weight = 0
+
+    # 是否阻塞消息（消息的处理流程到底等不等这个处理器忙活完）
+    intercept_message = True
+
+    async def execute(self, message):
+        SilenceUtils.stop_background()
+        MuteUtils.stop_background()
+        UserSilenceUtils.stop_background()
+        StateSync.stop()
+        SavingsUtils.stop()
+        SilenceAPI.stop()
+        SilenceUtils.stop_config_watcher()
+        LearningScheduler.cancel_all()
+
+        # 写完还在队列里的沉默期间消息
+        await StorageUtils.drain()
+        await ArchiveUtils.drain()
+
+        # 所有写入都完成后再关闭状态数据库，让 WAL 在退出前检查点并干净地关闭
+        SilenceStore.close()
+        return True, True, None, None, None
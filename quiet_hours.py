@@ -0,0 +1,140 @@
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import time
+
+# 一周的分钟数，时间窗口统一换算成“从周一0点起的第几分钟”
+WEEK_MINUTES = 7 * 24 * 60
+DAY_MINUTES = 24 * 60
+
+class QuietHours:
+    """
+    定时沉默时间窗口（只读）
+    - 规则格式: "<群号或*> <星期> <开始-结束>"，例如 "123456 1-5 00:00-08:00"、"* * 23:00-07:00"
+      星期为 1-7（周一到周日），支持 *、单个数字、范围和逗号分隔；结束时间早于开始时间表示跨过午夜
+    - 加载配置时把所有规则编译成每个群聊一份有序、互不重叠的 [开始, 结束) 区间列表（全局规则已合并进去），
+      查询时只需要一次字典查找和一次二分查找
+    """
+
+    __slots__ = ("_starts", "_ends", "_global_starts", "_global_ends")
+
+    def __init__(self, rules: Iterable[Any] = ()):
+        global_intervals: List[Tuple[int, int]] = []
+        group_intervals: Dict[str, List[Tuple[int, int]]] = {}
+        for rule in rules:
+            target, intervals = _parse_rule(rule)
+            if target is None:
+                global_intervals.extend(intervals)
+            else:
+                group_intervals.setdefault(target, []).extend(intervals)
+
+        global_merged = _merge(global_intervals)
+        starts: Dict[Any, List[int]] = {}
+        ends: Dict[Any, List[int]] = {}
+        for group_id, intervals in group_intervals.items():
+            merged = _merge(intervals + global_intervals)
+            # 同时收录int和str形式的群号，查询时无需转换
+            for key in (group_id, int(group_id)):
+                starts[key] = [start for start, _ in merged]
+                ends[key] = [end for _, end in merged]
+
+        _set = object.__setattr__
+        _set(self, "_starts", starts)
+        _set(self, "_ends", ends)
+        _set(self, "_global_starts", [start for start, _ in global_merged])
+        _set(self, "_global_ends", [end for _, end in global_merged])
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("QuietHours 是只读的，请通过重新加载配置来替换")
+
+    def __bool__(self) -> bool:
+        return bool(self._starts or self._global_starts)
+
+    def is_quiet(self, group_id: Any, now: Optional[float] = None) -> bool:
+        """检查群聊当前是否处于定时沉默时间窗口内"""
+        starts = self._starts.get(group_id)
+        if starts is None:
+            starts, ends = self._global_starts, self._global_ends
+            if not starts:
+                return False
+        else:
+            ends = self._ends[group_id]
+
+        local = time.localtime(now)
+        minute = local.tm_wday * DAY_MINUTES + local.tm_hour * 60 + local.tm_min
+        index = bisect_right(starts, minute) - 1
+        return index >= 0 and minute < ends[index]
+
+def _parse_rule(rule: Any) -> Tuple[Optional[str], List[Tuple[int, int]]]:
+    """解析一条规则，返回 (群号 或 None表示全局, [(开始分钟, 结束分钟)])"""
+    parts = str(rule).split()
+    if len(parts) != 3:
+        raise ValueError(f"定时沉默规则应为 \"<群号或*> <星期> <开始-结束>\"，当前为: {rule!r}")
+    target, days_text, window = parts
+
+    if target == "*":
+        group_id = None
+    else:
+        try:
+            group_id = str(int(target))
+        except ValueError:
+            raise ValueError(f"定时沉默规则中的群号无法识别: {rule!r}") from None
+
+    days = _parse_days(days_text, rule)
+    start_text, sep, end_text = window.partition("-")
+    if not sep:
+        raise ValueError(f"定时沉默规则中的时间段应为 HH:MM-HH:MM，当前为: {rule!r}")
+    start, end = _parse_clock(start_text, rule), _parse_clock(end_text, rule)
+    if start == end:
+        raise ValueError(f"定时沉默规则中的开始和结束时间不能相同: {rule!r}")
+
+    intervals = []
+    for day in days:
+        begin = day * DAY_MINUTES + start
+        length = end - start if end > start else DAY_MINUTES - start + end
+        finish = begin + length
+        if finish <= WEEK_MINUTES:
+            intervals.append((begin, finish))
+        else:
+            # 周日跨到周一的部分折回一周的开头
+            intervals.append((begin, WEEK_MINUTES))
+            intervals.append((0, finish - WEEK_MINUTES))
+    return group_id, intervals
+
+def _parse_days(text: str, rule: Any) -> List[int]:
+    """解析星期字段，返回 0-6（周一到周日）"""
+    if text == "*":
+        return list(range(7))
+    days = set()
+    for part in text.split(","):
+        low, sep, high = part.partition("-")
+        try:
+            first, last = int(low), int(high) if sep else int(low)
+        except ValueError:
+            raise ValueError(f"定时沉默规则中的星期无法识别: {rule!r}") from None
+        if not 1 <= first <= last <= 7:
+            raise ValueError(f"定时沉默规则中的星期应在 1-7 之间: {rule!r}")
+        days.update(range(first - 1, last))
+    return sorted(days)
+
+def _parse_clock(text: str, rule: Any) -> int:
+    """解析 HH:MM，返回当天的第几分钟（24:00 表示当天结束）"""
+    hour, sep, minute = text.partition(":")
+    try:
+        hours, minutes = int(hour), int(minute) if sep else 0
+    except ValueError:
+        raise ValueError(f"定时沉默规则中的时间无法识别: {rule!r}") from None
+    total = hours * 60 + minutes
+    if not (0 <= minutes < 60 and 0 <= total <= DAY_MINUTES):
+        raise ValueError(f"定时沉默规则中的时间超出范围: {rule!r}")
+    return total
+
+def _merge(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """合并重叠或相接的区间"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
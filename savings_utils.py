@@ -0,0 +1,167 @@
+from src.common.logger import get_logger
+from .silence_store import SilenceStore
+from .silence_config import SilenceConfig
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import datetime
+import time
+import traceback
+
+logger = get_logger("Silence")
+
+class SavingsUtils:
+    """
+    Token节省统计
+    - 事件处理器每截断一条消息、拦截一条命令，就在内存中按 (日期, 聊天流, 沉默原因, 类型) 计数一次
+    - 后台协程定期把内存中的增量一次性累加进本地数据库，查询时再合并还没写入的部分
+    - 节省的LLM调用次数和Token数按配置中的每次调用估算值换算，只是粗略估计
+    """
+
+    # 沉默原因的显示名称
+    REASONS = {
+        "silence": "普通沉默",
+        "force_silence": "永久沉默",
+        "special_silence": "默认沉默",
+        "quiet_hours": "定时沉默",
+        "user_silence": "用户沉默",
+        "mute": "禁言",
+    }
+
+    enabled: bool = True
+
+    # 可以查询的最大天数（命令正则不限制数字长度，过大的天数会让日期计算溢出）
+    MAX_DAYS = 3650
+
+    _pending: Dict[Tuple[str, str, str, str], int] = {}  # 格式: {(日期, stream_id, 沉默原因, message/command): 数量}
+    _interval: float = 60.0
+    _task: Optional[asyncio.Task] = None
+    _store_warned: bool = False  # 数据库未打开的警告只输出一次
+
+    # 当天的日期字符串和当天结束的时间戳，跨天之前不用重复格式化日期
+    _day: str = ""
+    _day_end: float = 0.0
+
+    @classmethod
+    def configure(cls, enabled: bool = True, flush_interval: float = 60.0):
+        """开启或关闭统计，并设置写入数据库的间隔（秒）"""
+        cls.enabled = enabled
+        cls._interval = max(1.0, flush_interval)
+
+    @classmethod
+    def count(cls, stream_id: str, reason: str, kind: str = "message"):
+        """计数一次被截断的消息（kind="message"）或被拦截的命令（kind="command"）"""
+        now = time.time()
+        if now >= cls._day_end:
+            cls._roll_day(now)
+        key = (cls._day, stream_id, reason or "silence", kind)
+        cls._pending[key] = cls._pending.get(key, 0) + 1
+
+    @classmethod
+    def start(cls) -> bool:
+        """在开启统计且有运行中的事件循环时启动定期写入协程，返回是否在运行"""
+        if not cls.enabled:
+            return False
+        if cls._task is not None and not cls._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        cls._task = loop.create_task(cls._run())
+        return True
+
+    @classmethod
+    def stop(cls):
+        """停止定期写入协程，并写入剩余的计数"""
+        if cls._task is not None:
+            cls._task.cancel()
+            cls._task = None
+        cls.flush()
+
+    @classmethod
+    def flush(cls) -> int:
+        """把内存中的计数写入数据库，返回写入的行数"""
+        if not cls._pending:
+            return 0
+        # 数据库还没打开（或已关闭）时先留在内存里，等下一次写入
+        if not SilenceStore.is_open():
+            if not cls._store_warned:
+                cls._store_warned = True
+                logger.warning(f"本地数据库未打开，{len(cls._pending)}条节省统计暂时保留在内存中")
+            return 0
+        cls._store_warned = False
+        pending, cls._pending = cls._pending, {}
+        rows = [(day, stream_id, reason, kind, count) for (day, stream_id, reason, kind), count in pending.items()]
+        SilenceStore.add_savings(rows)
+        return len(rows)
+
+    @classmethod
+    def query(cls, days: int = 7, stream_id: Optional[str] = None) -> List[Tuple[str, str, str, str, int]]:
+        """
+        查询最近 days 天（含今天）的计数，包含还没写入数据库的部分
+        返回: [(日期, stream_id, 沉默原因, message 或 command, 数量)]
+        """
+        days = min(max(1, days), cls.MAX_DAYS)
+        since = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+        merged: Dict[Tuple[str, str, str, str], int] = {}
+        for day, sid, reason, kind, count in SilenceStore.load_savings(since, stream_id):
+            merged[(day, sid, reason, kind)] = count
+        for key, count in cls._pending.items():
+            if key[0] >= since and (stream_id is None or key[1] == stream_id):
+                merged[key] = merged.get(key, 0) + count
+        return [key + (count,) for key, count in sorted(merged.items())]
+
+    @staticmethod
+    def estimate(messages: int, commands: int, config: SilenceConfig) -> Tuple[float, float]:
+        """把截断的消息数和拦截的命令数换算成 (节省的LLM调用次数, 节省的Token数)"""
+        calls = messages * config.llm_calls_per_message + commands * config.llm_calls_per_command
+        return calls, calls * config.tokens_per_llm_call
+
+    @classmethod
+    def format_report(cls, config: SilenceConfig, days: int = 7, stream_id: Optional[str] = None, group_name: Any = None) -> str:
+        """生成给管理员看的节省统计报告"""
+        if not cls.enabled:
+            return "节省统计未开启，请在配置文件 performance.enable_savings 中开启"
+        days = min(max(1, days), cls.MAX_DAYS)
+
+        rows = cls.query(days)
+        totals = {"message": 0, "command": 0}
+        by_day: Dict[str, Dict[str, int]] = {}
+        by_reason: Dict[str, int] = {}
+        by_stream: Dict[str, Dict[str, int]] = {}
+        for day, sid, reason, kind, count in rows:
+            totals[kind] = totals.get(kind, 0) + count
+            day_totals = by_day.setdefault(day, {"message": 0, "command": 0})
+            day_totals[kind] = day_totals.get(kind, 0) + count
+            by_reason[reason] = by_reason.get(reason, 0) + count
+            stream_totals = by_stream.setdefault(sid, {"message": 0, "command": 0})
+            stream_totals[kind] = stream_totals.get(kind, 0) + count
+
+        def line(label: str, counts: Dict[str, int]) -> str:
+            calls, tokens = cls.estimate(counts["message"], counts["command"], config)
+            return f"{label}: 截断消息{counts['message']}条 拦截命令{counts['command']}条，约节省{calls:.0f}次LLM调用、{tokens:.0f} tokens"
+
+        lines = [f"最近{days}天的节省统计（估算）", line("全部聊天", totals)]
+        if stream_id is not None:
+            lines.append(line(f"当前聊天{f'({group_name})' if group_name else ''}", by_stream.get(stream_id, {"message": 0, "command": 0})))
+        if by_reason:
+            lines.append("按原因: " + "，".join(f"{cls.REASONS.get(reason, reason)}{count}条" for reason, count in sorted(by_reason.items(), key=lambda item: -item[1])))
+        for day in sorted(by_day, reverse=True):
+            lines.append(line(day, by_day[day]))
+        return "\n".join(lines)
+
+    @classmethod
+    def _roll_day(cls, now: float):
+        today = datetime.date.fromtimestamp(now)
+        cls._day = today.isoformat()
+        tomorrow = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time())
+        cls._day_end = tomorrow.timestamp()
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            await asyncio.sleep(cls._interval)
+            try:
+                cls.flush()
+            except Exception as e:
+                logger.error(f"写入节省统计时出错: {str(e)}\n{traceback.format_exc()}")
@@ -0,0 +1,285 @@
+from src.common.logger import get_logger
+from .silence_utils import SilenceUtils, layer_reason, LAYERS, NO_EXPIRY
+from .mute_utils import MuteUtils
+from .user_silence_utils import UserSilenceUtils
+from .quiet_hours import QuietHours
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import asyncio
+import time
+import traceback
+
+logger = get_logger("Silence")
+
+class SilenceSnapshot:
+    """
+    某一时刻沉默插件全部状态的只读快照
+    - version 与 SilenceAPI.version() 对应，版本号相同说明状态没有变化，可以继续使用手里的快照
+    - 所有查询都只比较快照里保存的截止时间，不会清理过期记录，也不会修改插件的任何状态
+    - 定时沉默按快照里保存的规则实时计算，因此同一个快照在时间窗口的边界前后会给出不同的结果
+    """
+
+    __slots__ = ("version", "created", "_silences", "_mutes", "_users", "_quiet_hours")
+
+    def __init__(
+        self,
+        version: int,
+        silences: Dict[str, Tuple[float, ...]],
+        mutes: Dict[str, Tuple[float, float]],
+        users: Dict[str, Dict[str, Tuple[Optional[float], str]]],
+        quiet_hours: QuietHours,
+    ):
+        _set = object.__setattr__
+        _set(self, "version", version)
+        _set(self, "created", time.time())
+        _set(self, "_silences", silences)
+        _set(self, "_mutes", mutes)
+        _set(self, "_users", users)
+        _set(self, "_quiet_hours", quiet_hours)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("SilenceSnapshot 是只读的快照")
+
+    def __repr__(self) -> str:
+        return f"SilenceSnapshot(version={self.version}, silences={len(self._silences)}, mutes={len(self._mutes)})"
+
+    def is_silenced(self, stream_id: str, now: Optional[float] = None) -> bool:
+        """聊天流是否处于沉默状态（不含定时沉默和用户沉默）"""
+        return self.get_reason(stream_id, now) is not None
+
+    def get_reason(self, stream_id: str, now: Optional[float] = None) -> Optional[str]:
+        """
+        聊天流的沉默原因，未沉默时为 None
+        ""=普通沉默，"force_silence"=指令指定的永久沉默，"special_silence"=实验性功能配置的默认沉默
+        """
+        until = self._silences.get(stream_id)
+        if until is None:
+            return None
+        now = time.time() if now is None else now
+        top = -1
+        for layer, value in enumerate(until):
+            if value and value >= now:
+                top = layer
+        if top < 0:
+            return None
+        return layer_reason(top, until)
+
+    def get_expiration(self, stream_id: str, now: Optional[float] = None) -> Tuple[bool, Optional[float]]:
+        """聊天流的沉默结束时间，返回 (是否处于沉默状态, 所有沉默层都结束的时间戳 或 None表示永久)"""
+        until = self._silences.get(stream_id)
+        if until is None:
+            return False, None
+        now = time.time() if now is None else now
+        end = max(until)
+        if end < now:
+            return False, None
+        return True, None if end == NO_EXPIRY else end
+
+    def get_layers(self, stream_id: str, now: Optional[float] = None) -> List[Tuple[str, Optional[float]]]:
+        """按优先级从高到低返回聊天流正在生效的沉默层，格式: [(沉默层, 过期时间戳 或 None)]"""
+        until = self._silences.get(stream_id, ())
+        now = time.time() if now is None else now
+        return [
+            (LAYERS[layer], None if value == NO_EXPIRY else value)
+            for layer, value in reversed(list(enumerate(until)))
+            if value and value >= now
+        ]
+
+    def is_muted(self, stream_id: str, now: Optional[float] = None) -> bool:
+        """麦麦在聊天流中是否处于（已知的）禁言状态"""
+        record = self._mutes.get(stream_id)
+        if record is None:
+            return False
+        now = time.time() if now is None else now
+        return record[0] > now or record[1] > now
+
+    def is_user_silenced(self, stream_id: str, user_id: Any, now: Optional[float] = None) -> bool:
+        """聊天流中的某个用户是否被单独沉默（int和str形式的ID均可）"""
+        users = self._users.get(stream_id)
+        if users is None:
+            return False
+        record = users.get(str(user_id))
+        if record is None:
+            return False
+        return record[0] is None or record[0] >= (time.time() if now is None else now)
+
+    def is_quiet_hours(self, group_id: Any, now: Optional[float] = None) -> bool:
+        """群聊是否处于定时沉默时间窗口内"""
+        return self._quiet_hours.is_quiet(group_id, now)
+
+    def should_skip(self, stream_id: str, group_id: Any = None, now: Optional[float] = None) -> bool:
+        """麦麦在这个聊天流里是否不应该主动发言（沉默、被禁言或处于定时沉默时间窗口内）"""
+        if self.is_silenced(stream_id, now) or self.is_muted(stream_id, now):
+            return True
+        return bool(group_id) and self.is_quiet_hours(group_id, now)
+
+    def silenced_streams(self, now: Optional[float] = None) -> List[str]:
+        """所有处于沉默状态的聊天流ID"""
+        now = time.time() if now is None else now
+        return [stream_id for stream_id, until in self._silences.items() if max(until) >= now]
+
+    def muted_streams(self, now: Optional[float] = None) -> List[str]:
+        """所有处于禁言状态的聊天流ID"""
+        now = time.time() if now is None else now
+        return [stream_id for stream_id, record in self._mutes.items() if record[0] > now or record[1] > now]
+
+class SilenceEvent:
+    """
+    一次沉默或禁言状态变化（只读）
+    - kind: silence_enter / silence_exit / silence_expire / mute_enter / mute_exit / mute_expire
+      （exit 表示被指令、艾特或其他进程解除，expire 表示到期自然结束）
+    - stream_id: 发生变化的聊天流
+    - version: 变化发生后的状态版本号，大于手里快照的版本号时说明快照已经过时
+    - timestamp: 变化发生的时间
+    """
+
+    __slots__ = ("kind", "stream_id", "version", "timestamp")
+
+    def __init__(self, kind: str, stream_id: str, version: int):
+        _set = object.__setattr__
+        _set(self, "kind", kind)
+        _set(self, "stream_id", stream_id)
+        _set(self, "version", version)
+        _set(self, "timestamp", time.time())
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("SilenceEvent 是只读的")
+
+    def __repr__(self) -> str:
+        return f"SilenceEvent(kind={self.kind!r}, stream_id={self.stream_id!r}, version={self.version})"
+
+class SilenceAPI:
+    """
+    给其他插件使用的只读查询接口和状态变化订阅
+    - 查询都基于带版本号的只读快照，状态没有变化时反复查询只是一次版本比较，调用方可以缓存快照或查询结果，
+      也可以直接调用这里的便捷方法；这些方法不会像 SilenceUtils.is_silenced 那样顺手清理过期记录
+    - subscribe 注册的异步回调在沉默或禁言状态进入、被解除、到期时依次被调用，事件按发生顺序派发，
+      一个回调出错或耗时较长不会影响状态变化本身；没有订阅者时状态变化不会产生任何额外开销
+
+    用法示例（在其他插件中）:
+        snapshot = SilenceAPI.snapshot()
+        if snapshot.should_skip(stream_id, group_id):
+            return
+
+        async def on_change(event: SilenceEvent):
+            ...
+        unsubscribe = SilenceAPI.subscribe(on_change, ["silence_enter", "silence_exit", "silence_expire"])
+    """
+
+    EVENTS: FrozenSet[str] = frozenset([
+        "silence_enter", "silence_exit", "silence_expire",
+        "mute_enter", "mute_exit", "mute_expire",
+    ])
+
+    # 待派发事件数的上限，订阅者长期跟不上时丢弃最旧的事件（订阅者可以比较版本号后重新获取快照）
+    _MAX_PENDING = 1024
+
+    _snapshot: Optional[SilenceSnapshot] = None
+    _subscribers: List[Tuple[Callable[[SilenceEvent], Awaitable[Any]], Optional[FrozenSet[str]]]] = []
+    _pending: Deque[SilenceEvent] = deque()
+    _dispatcher: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def version() -> int:
+        """当前的状态版本号，沉默、禁言、用户沉默记录或配置任何变化都会使它增大"""
+        return SilenceUtils.config_version + SilenceUtils.state_version + MuteUtils.state_version + UserSilenceUtils.state_version
+
+    @classmethod
+    def snapshot(cls) -> SilenceSnapshot:
+        """获取当前状态的只读快照（状态没有变化时直接返回上一次的快照）"""
+        version = cls.version()
+        snapshot = cls._snapshot
+        if snapshot is None or snapshot.version != version:
+            snapshot = cls._snapshot = SilenceSnapshot(
+                version,
+                SilenceUtils.export_records(),
+                MuteUtils.export_records(),
+                UserSilenceUtils.export_records(),
+                SilenceUtils.get_config().quiet_hours,
+            )
+        return snapshot
+
+    @classmethod
+    def is_silenced(cls, stream_id: str) -> bool:
+        """聊天流是否处于沉默状态（不含定时沉默和用户沉默）"""
+        return cls.snapshot().is_silenced(stream_id)
+
+    @classmethod
+    def is_muted(cls, stream_id: str) -> bool:
+        """麦麦在聊天流中是否处于（已知的）禁言状态"""
+        return cls.snapshot().is_muted(stream_id)
+
+    @classmethod
+    def should_skip(cls, stream_id: str, group_id: Any = None) -> bool:
+        """麦麦在这个聊天流里是否不应该主动发言（沉默、被禁言或处于定时沉默时间窗口内）"""
+        return cls.snapshot().should_skip(stream_id, group_id)
+
+    @classmethod
+    def subscribe(cls, callback: Callable[[SilenceEvent], Awaitable[Any]], events: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """
+        订阅状态变化，callback 为接收 SilenceEvent 的异步函数，events 为关心的事件类型（None 表示全部）
+        返回: 取消订阅的函数
+        """
+        kinds = None if events is None else frozenset(events)
+        if kinds is not None and not kinds <= cls.EVENTS:
+            raise ValueError(f"未知的事件类型: {', '.join(sorted(kinds - cls.EVENTS))}")
+        entry = (callback, kinds)
+        cls._subscribers.append(entry)
+
+        def unsubscribe():
+            if entry in cls._subscribers:
+                cls._subscribers.remove(entry)
+
+        return unsubscribe
+
+    @classmethod
+    def attach(cls):
+        """把状态变化接入订阅派发（插件初始化时调用一次）"""
+        SilenceUtils.add_state_listener(cls._on_silence_state)
+        MuteUtils.add_state_listener(cls._on_mute_state)
+
+    @classmethod
+    def stop(cls):
+        """停止派发并丢弃还没派发的事件"""
+        if cls._dispatcher is not None:
+            cls._dispatcher.cancel()
+            cls._dispatcher = None
+        cls._pending.clear()
+
+    @classmethod
+    def _on_silence_state(cls, event: str, stream_id: str):
+        if cls._subscribers:
+            cls._publish(SilenceEvent(f"silence_{event}", stream_id, cls.version()))
+
+    @classmethod
+    def _on_mute_state(cls, event: str, stream_id: str):
+        if cls._subscribers:
+            cls._publish(SilenceEvent(f"mute_{event}", stream_id, cls.version()))
+
+    @classmethod
+    def _publish(cls, event: SilenceEvent):
+        """把事件放进待派发队列，必要时启动派发协程（没有事件循环时直接丢弃）"""
+        if cls._dispatcher is None or cls._dispatcher.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            cls._pending.append(event)
+            cls._dispatcher = loop.create_task(cls._dispatch())
+        else:
+            cls._pending.append(event)
+        if len(cls._pending) > cls._MAX_PENDING:
+            cls._pending.popleft()
+
+    @classmethod
+    async def _dispatch(cls):
+        pending = cls._pending
+        while pending:
+            event = pending.popleft()
+            for callback, kinds in list(cls._subscribers):
+                if kinds is not None and event.kind not in kinds:
+                    continue
+                try:
+                    await callback(event)
+                except Exception as e:
+                    logger.error(f"沉默状态订阅回调执行出错: {str(e)}\n{traceback.format_exc()}")
@@ -0,0 +1,153 @@
+from typing import Any, Dict, FrozenSet, Iterable, Tuple
+from .quiet_hours import QuietHours
+
+class SilenceConfig:
+    """
+    配置快照
+    - 由配置文件解析、校验而来，创建后不可修改
+    - 所有ID列表都预先建成frozenset索引，同时收录int和str两种形式，检查时无需再做int转换
+    - 加载新配置时整体替换快照对象，读取方拿到的永远是一份完整一致的配置
+    """
+
+    __slots__ = (
+        "is_whitelist",
+        "admin_users",
+        "disable_command",
+        "unaffected_commands",
+        "low_case",
+        "medium_case",
+        "serious_case",
+        "max_action_silence_time",
+        "silence_expression_learning",
+        "learning_min_messages",
+        "learning_max_delay",
+        "learning_min_interval",
+        "silence_special_check",
+        "special_users",
+        "special_groups",
+        "quiet_hours",
+        "auto_silence",
+        "auto_silence_window",
+        "auto_silence_low_rate",
+        "auto_silence_medium_rate",
+        "auto_silence_release_rate",
+        "digest_mode",
+        "digest_max_excerpts",
+        "digest_excerpt_length",
+        "llm_calls_per_message",
+        "llm_calls_per_command",
+        "tokens_per_llm_call",
+    )
+
+    def __init__(self, config_data: Dict[str, Any]):
+        permissions = config_data.get("permissions", {})
+        adjustment = config_data.get("adjustment", {})
+        experimental = config_data.get("experimental", {})
+        schedule = config_data.get("schedule", {})
+        savings = config_data.get("savings", {})
+
+        mode = permissions.get("white_or_black_list", "whitelist")
+        if mode not in ("whitelist", "blacklist"):
+            raise ValueError(f"white_or_black_list 只能是 whitelist 或 blacklist，当前为: {mode}")
+
+        special_check = bool(experimental.get("silence_special_check", False))
+
+        _set = object.__setattr__
+        _set(self, "is_whitelist", mode == "whitelist")
+        _set(self, "admin_users", _id_index(permissions.get("admin_users", []), "admin_users"))
+        _set(self, "disable_command", bool(adjustment.get("disable_command", True)))
+        _set(self, "unaffected_commands", frozenset(["silence_command"] + [str(name) for name in adjustment.get("unaffected_command_list", [])]))
+        _set(self, "low_case", _range(adjustment.get("low_case", [120, 600]), "low_case"))
+        _set(self, "medium_case", _range(adjustment.get("medium_case", [600, 1200]), "medium_case"))
+        _set(self, "serious_case", _range(adjustment.get("serious_case", [1200, 5400]), "serious_case"))
+        _set(self, "max_action_silence_time", _non_negative_int(adjustment.get("max_action_silence_time", 10800), "max_action_silence_time"))
+        _set(self, "silence_expression_learning", bool(experimental.get("silence_expression_learning", False)))
+        _set(self, "learning_min_messages", max(1, _non_negative_int(experimental.get("learning_min_messages", 10), "learning_min_messages")))
+        _set(self, "learning_max_delay", _non_negative_float(experimental.get("learning_max_delay", 60.0), "learning_max_delay"))
+        _set(self, "learning_min_interval", _non_negative_float(experimental.get("learning_min_interval", 30.0), "learning_min_interval"))
+        _set(self, "silence_special_check", special_check)
+
+        # 未启用默认沉默功能时直接给空索引，检查时就不用再判断开关了
+        someone_index = _id_index(experimental.get("silence_someone_list", []), "silence_someone_list")
+        group_index = _id_index(experimental.get("silence_group_list", []), "silence_group_list")
+        _set(self, "special_users", someone_index if special_check else frozenset())
+        _set(self, "special_groups", group_index if special_check else frozenset())
+
+        window = _non_negative_float(experimental.get("auto_silence_window", 60.0), "auto_silence_window")
+        if window <= 0:
+            raise ValueError(f"auto_silence_window 必须大于0，当前为: {window!r}")
+        low_rate = _non_negative_int(experimental.get("auto_silence_low_rate", 30), "auto_silence_low_rate")
+        medium_rate = _non_negative_int(experimental.get("auto_silence_medium_rate", 60), "auto_silence_medium_rate")
+        release_rate = _non_negative_int(experimental.get("auto_silence_release_rate", 10), "auto_silence_release_rate")
+        # 解除阈值不低于施加阈值时，沉默会在相邻两条消息之间反复施加和解除
+        for field, rate in (("auto_silence_low_rate", low_rate), ("auto_silence_medium_rate", medium_rate)):
+            if rate and release_rate >= rate:
+                raise ValueError(f"auto_silence_release_rate 必须小于 {field}，当前为: {release_rate!r} >= {rate!r}")
+        _set(self, "auto_silence", bool(experimental.get("auto_silence", False)))
+        _set(self, "auto_silence_window", window)
+        _set(self, "auto_silence_low_rate", low_rate)
+        _set(self, "auto_silence_medium_rate", medium_rate)
+        _set(self, "auto_silence_release_rate", release_rate)
+
+        _set(self, "digest_mode", bool(experimental.get("digest_mode", False)))
+        _set(self, "digest_max_excerpts", max(1, _non_negative_int(experimental.get("digest_max_excerpts", 10), "digest_max_excerpts")))
+        _set(self, "digest_excerpt_length", _non_negative_int(experimental.get("digest_excerpt_length", 100), "digest_excerpt_length"))
+
+        _set(self, "llm_calls_per_message", _non_negative_float(savings.get("llm_calls_per_message", 1.0), "llm_calls_per_message"))
+        _set(self, "llm_calls_per_command", _non_negative_float(savings.get("llm_calls_per_command", 0.5), "llm_calls_per_command"))
+        _set(self, "tokens_per_llm_call", _non_negative_float(savings.get("tokens_per_llm_call", 3000), "tokens_per_llm_call"))
+
+        # 定时沉默规则在这里一次性编译成区间索引，规则有误时整份配置都不会生效
+        quiet_hours = QuietHours(schedule.get("quiet_hours", []))
+        _set(self, "quiet_hours", quiet_hours if schedule.get("enable_quiet_hours", False) else QuietHours())
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("SilenceConfig 是只读快照，请通过重新加载配置来替换")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("SilenceConfig 是只读快照，请通过重新加载配置来替换")
+
+def _id_index(values: Iterable[Any], field: str) -> FrozenSet[Any]:
+    """把ID列表转换为同时包含int和str形式的frozenset"""
+    index = set()
+    for value in values:
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} 中存在无法识别的ID: {value!r}") from None
+        index.add(number)
+        index.add(str(number))
+    return frozenset(index)
+
+def _range(value: Any, field: str) -> Tuple[int, int]:
+    """校验并解析[最小值, 最大值]形式的时间范围"""
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"{field} 必须是包含两个数字的列表，当前为: {value!r}")
+    low, high = _non_negative_int(value[0], field), _non_negative_int(value[1], field)
+    if low > high:
+        raise ValueError(f"{field} 的最小值不能大于最大值，当前为: {value!r}")
+    return low, high
+
+def _non_negative_int(value: Any, field: str) -> int:
+    """校验非负整数"""
+    if isinstance(value, bool):
+        raise ValueError(f"{field} 必须是非负整数，当前为: {value!r}")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} 必须是非负整数，当前为: {value!r}") from None
+    if number < 0:
+        raise ValueError(f"{field} 必须是非负整数，当前为: {value!r}")
+    return number
+
+def _non_negative_float(value: Any, field: str) -> float:
+    """校验非负数"""
+    if isinstance(value, bool):
+        raise ValueError(f"{field} 必须是非负数，当前为: {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} 必须是非负数，当前为: {value!r}") from None
+    if not number >= 0:
+        raise ValueError(f"{field} 必须是非负数，当前为: {value!r}")
+    return number
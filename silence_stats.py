@@ -0,0 +1,158 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+import time
+
+class _Histogram:
+    """固定分桶的耗时直方图（单位: 纳秒）"""
+
+    # 各桶上界（微秒），最后一个桶收纳所有更慢的样本
+    BOUNDS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000)
+    _BOUNDS_NS = tuple(bound * 1000 for bound in BOUNDS_US)
+
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * (len(self.BOUNDS_US) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int):
+        self.buckets[bisect_left(self._BOUNDS_NS, elapsed_ns)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile_us(self, q: float) -> float:
+        """按桶估算分位数，返回所在桶的上界"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target:
+                return float(self.BOUNDS_US[index]) if index < len(self.BOUNDS_US) else self.max_ns / 1000.0
+        return self.max_ns / 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_us": self.total_ns / self.count / 1000.0 if self.count else 0.0,
+            "p50_us": self.percentile_us(0.50),
+            "p99_us": self.percentile_us(0.99),
+            "max_us": self.max_ns / 1000.0,
+            "buckets": dict(zip([str(b) for b in self.BOUNDS_US] + ["inf"], self.buckets)),
+        }
+
+class SilenceStats:
+    """
+    沉默插件的运行统计
+    - 事件处理器各阶段的耗时直方图
+    - 每个聊天流被截断、放行、被艾特打断沉默的消息数
+    - 关闭时调用方只需判断一次 enabled，不产生任何计时和计数开销
+    """
+
+    # 事件处理器各阶段的名称和说明
+    STAGES = {
+        "silence_check": "禁言与沉默判定",
+        "mention": "艾特信息计算",
+        "storage": "消息入存储队列",
+        "picid": "图片描述替换",
+        "user_refs": "用户引用格式替换",
+        "log": "沉默消息日志",
+        "person": "用户注册",
+        "event_handler": "消息事件处理器总耗时",
+    }
+
+    enabled: bool = False
+
+    _histograms: Dict[str, _Histogram] = {}
+    _streams: Dict[str, List[int]] = {}  # 格式: {stream_id: [截断数, 放行数, 艾特打断数]}
+    _since: float = time.time()
+
+    @classmethod
+    def configure(cls, enabled: bool):
+        """开启或关闭统计"""
+        cls.enabled = enabled
+
+    @staticmethod
+    def now() -> int:
+        """计时起点（纳秒）"""
+        return time.perf_counter_ns()
+
+    @classmethod
+    def lap(cls, stage: str, start_ns: int) -> int:
+        """记录从 start_ns 到现在的耗时，返回当前时间作为下一阶段的起点"""
+        now = time.perf_counter_ns()
+        histogram = cls._histograms.get(stage)
+        if histogram is None:
+            histogram = cls._histograms[stage] = _Histogram()
+        histogram.record(now - start_ns)
+        return now
+
+    @classmethod
+    def count_intercepted(cls, stream_id: str):
+        cls._stream_counters(stream_id)[0] += 1
+
+    @classmethod
+    def count_passed(cls, stream_id: str):
+        cls._stream_counters(stream_id)[1] += 1
+
+    @classmethod
+    def count_at_broken(cls, stream_id: str):
+        cls._stream_counters(stream_id)[2] += 1
+
+    @classmethod
+    def reset(cls):
+        """清空所有统计数据"""
+        cls._histograms = {}
+        cls._streams = {}
+        cls._since = time.time()
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        """以字典形式导出当前的统计数据"""
+        return {
+            "enabled": cls.enabled,
+            "since": cls._since,
+            "stages": {stage: histogram.to_dict() for stage, histogram in cls._histograms.items()},
+            "streams": {
+                stream_id: {"intercepted": counters[0], "passed": counters[1], "at_broken": counters[2]}
+                for stream_id, counters in cls._streams.items()
+            },
+        }
+
+    @classmethod
+    def format_report(cls, stream_id: Optional[str] = None) -> str:
+        """生成给管理员看的文字报告"""
+        if not cls.enabled:
+            return "运行统计未开启，请在配置文件 performance.enable_stats 中开启"
+
+        lines = [f"沉默插件运行统计（自 {time.strftime('%m-%d %H:%M:%S', time.localtime(cls._since))} 起）"]
+        for stage, description in cls.STAGES.items():
+            histogram = cls._histograms.get(stage)
+            if histogram is None or not histogram.count:
+                continue
+            lines.append(
+                f"{description}: {histogram.count}次 平均{histogram.total_ns / histogram.count / 1000.0:.1f}us "
+                f"p50≤{histogram.percentile_us(0.5):.0f}us p99≤{histogram.percentile_us(0.99):.0f}us"
+            )
+
+        totals = [0, 0, 0]
+        for counters in cls._streams.values():
+            for i in range(3):
+                totals[i] += counters[i]
+        lines.append(f"全部聊天: 截断{totals[0]}条 放行{totals[1]}条 艾特打断{totals[2]}次")
+        if stream_id is not None and stream_id in cls._streams:
+            counters = cls._streams[stream_id]
+            lines.append(f"当前聊天: 截断{counters[0]}条 放行{counters[1]}条 艾特打断{counters[2]}次")
+        return "\n".join(lines)
+
+    @classmethod
+    def _stream_counters(cls, stream_id: str) -> List[int]:
+        counters = cls._streams.get(stream_id)
+        if counters is None:
+            counters = cls._streams[stream_id] = [0, 0, 0]
+        return counters
@@ -0,0 +1,428 @@
+from src.common.logger import get_logger
+from typing import Any, Optional, Dict, List, Tuple
+import os
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+
+logger = get_logger("Silence")
+
+class SilenceStore:
+    """
+    沉默与禁言状态的本地持久化
+    - 基于SQLite（WAL模式），每次状态变化直接写入，重启后一次查询即可恢复
+    - 恢复时只读出还没过期的记录，已过期的记录顺手删除
+    - 写入在事件循环中只等待很短的时间；数据库被其他进程锁住时，这次写入和之后的写入按顺序交给后台写入线程
+      （使用独立的连接）慢慢重试，事件循环不会因为锁竞争被卡住
+    - 表结构版本记录在 user_version 中，以后表结构变化时据此升级
+    - 任何数据库错误都只记录日志，不影响内存中的沉默判断
+    - 开启变更日志后，每次写入都会在同一个事务里追加一条 (类型, stream_id) 记录，
+      其他进程通过 PRAGMA data_version 发现有新提交，再只读出变化的那几条记录
+    """
+
+    _SCHEMA_VERSION = 1
+
+    # 变更日志保留的条数，落后超过这么多的进程需要整体重新加载
+    _JOURNAL_KEEP = 10000
+
+    # 事件循环中的写入等待锁的时间（毫秒），等不到就交给后台写入线程；后台线程每次尝试等待的时间
+    _LOOP_BUSY_TIMEOUT_MS = 20
+    _WRITER_BUSY_TIMEOUT_MS = 2000
+
+    _conn: Optional[sqlite3.Connection] = None
+    _db_path: Optional[str] = None
+
+    _journal: bool = False
+    _last_seq: int = 0
+    _data_version: int = 0
+
+    # 交给后台写入线程的写入，格式: (sql, 参数, 是否executemany, 变更类型, stream_id)，None 表示停止
+    _writes: "queue.Queue[Optional[Tuple[str, Any, bool, Optional[str], Optional[str]]]]" = queue.Queue()
+    _writer: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+    _deferred: int = 0  # 还没写完的后台写入数
+    _deferred_keys: Dict[Tuple[str, str], int] = {}  # 格式: {(变更类型, stream_id): 还没写完的后台写入数}
+    _closing: bool = False
+
+    @classmethod
+    def open(cls, db_path: Optional[str] = None, journal: bool = False) -> bool:
+        """
+        打开（必要时创建）状态数据库，返回是否成功
+        journal 为 True 时记录变更日志，供同一台机器上共用这个数据库的其他进程同步
+        """
+        if cls._conn is not None:
+            return True
+
+        if db_path is None:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            db_path = os.path.join(script_dir, "silence_state.db")
+
+        try:
+            conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+            # 打开时（插件初始化阶段）可以多等一会儿其他进程的事务，之后的写入只等很短的时间
+            conn.execute(f"PRAGMA busy_timeout={cls._WRITER_BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < cls._SCHEMA_VERSION:
+                cls._create_schema(conn)
+            conn.execute(f"PRAGMA busy_timeout={cls._LOOP_BUSY_TIMEOUT_MS}")
+            if journal:
+                cls._last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+                cls._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            cls._conn = conn
+            cls._db_path = db_path
+            cls._journal = journal
+            cls._closing = False
+            return True
+        except Exception as e:
+            logger.error(f"打开沉默状态数据库失败，本次运行将不会持久化沉默状态: {str(e)}\n{traceback.format_exc()}")
+            return False
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        """在一个事务里创建全部表，并记录表结构版本"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 拿到写锁后重新读取版本号，避免和同时启动的其他进程重复建表
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SilenceStore._SCHEMA_VERSION:
+                # 沉默状态按优先级分层保存，expiration 为 NULL 表示永久
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS silence_layer (stream_id TEXT NOT NULL, layer TEXT NOT NULL, expiration REAL, "
+                    "PRIMARY KEY (stream_id, layer))"
+                )
+                # 禁言记录，expiration 为 NULL 表示直到解除禁言为止
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS mute (stream_id TEXT NOT NULL, kind TEXT NOT NULL, expiration REAL, "
+                    "PRIMARY KEY (stream_id, kind))"
+                )
+                # 只针对群聊中某个用户的沉默
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS user_silence (stream_id TEXT NOT NULL, user_id TEXT NOT NULL, expiration REAL, reason TEXT NOT NULL DEFAULT '', "
+                    "PRIMARY KEY (stream_id, user_id))"
+                )
+                # 多进程共享状态用的变更日志
+                conn.execute("CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, stream_id TEXT NOT NULL)")
+                # 按天、聊天流、沉默原因汇总的节省统计
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS savings (day TEXT NOT NULL, stream_id TEXT NOT NULL, reason TEXT NOT NULL, kind TEXT NOT NULL, "
+                    "count INTEGER NOT NULL, PRIMARY KEY (day, stream_id, reason, kind))"
+                )
+                conn.execute(f"PRAGMA user_version={SilenceStore._SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @classmethod
+    def is_open(cls) -> bool:
+        """状态数据库是否已经打开"""
+        return cls._conn is not None
+
+    @classmethod
+    def close(cls):
+        """等后台写入线程写完（最多等几秒）后关闭状态数据库"""
+        if cls._conn is None:
+            return
+        writer = cls._writer
+        if writer is not None and writer.is_alive():
+            # 关闭时不再无限重试，每条还没写完的写入最多再尝试一次
+            cls._closing = True
+            cls._writes.put(None)
+            writer.join(timeout=5.0)
+            if writer.is_alive():
+                logger.warning(f"关闭沉默状态数据库时仍有 {cls._deferred} 条写入没能完成")
+        cls._writer = None
+        try:
+            cls._conn.close()
+        except Exception as e:
+            logger.error(f"关闭沉默状态数据库时出错: {str(e)}")
+        cls._conn = None
+
+    @classmethod
+    def load_silences(cls) -> Dict[str, Dict[str, Optional[float]]]:
+        """清理已过期的记录后读出全部沉默状态，格式: {stream_id: {沉默层: 过期时间戳 或 None}}"""
+        if cls._conn is None:
+            return {}
+        now = time.time()
+        cls._execute("DELETE FROM silence_layer WHERE expiration IS NOT NULL AND expiration < ?", (now,))
+        try:
+            records: Dict[str, Dict[str, Optional[float]]] = {}
+            for stream_id, layer, expiration in cls._conn.execute(
+                "SELECT stream_id, layer, expiration FROM silence_layer WHERE expiration IS NULL OR expiration >= ?", (now,)
+            ):
+                records.setdefault(stream_id, {})[layer] = expiration
+            return records
+        except Exception as e:
+            logger.error(f"读取沉默状态记录失败: {str(e)}\n{traceback.format_exc()}")
+            return {}
+
+    @classmethod
+    def save_silence(cls, stream_id: str, layer: str, expiration: Optional[float]):
+        """写入（覆盖）聊天流某一层的沉默状态"""
+        cls._execute(
+            "INSERT OR REPLACE INTO silence_layer (stream_id, layer, expiration) VALUES (?, ?, ?)",
+            (stream_id, layer, expiration), "silence", stream_id,
+        )
+
+    @classmethod
+    def delete_silence(cls, stream_id: str, layers: Tuple[str, ...]):
+        """删除聊天流指定几层的沉默状态"""
+        placeholders = ", ".join("?" * len(layers))
+        cls._execute(f"DELETE FROM silence_layer WHERE stream_id = ? AND layer IN ({placeholders})", (stream_id,) + tuple(layers), "silence", stream_id)
+
+    @classmethod
+    def load_mutes(cls) -> List[Tuple[str, str, Optional[float]]]:
+        """清理已过期的记录后读出全部禁言状态，格式: [(stream_id, personal 或 whole, 过期时间戳 或 None)]"""
+        if cls._conn is None:
+            return []
+        now = time.time()
+        cls._execute("DELETE FROM mute WHERE expiration IS NOT NULL AND expiration < ?", (now,))
+        try:
+            return list(cls._conn.execute("SELECT stream_id, kind, expiration FROM mute WHERE expiration IS NULL OR expiration >= ?", (now,)))
+        except Exception as e:
+            logger.error(f"读取禁言状态记录失败: {str(e)}\n{traceback.format_exc()}")
+            return []
+
+    @classmethod
+    def save_mute(cls, stream_id: str, kind: str, expiration: Optional[float] = None):
+        """写入（覆盖）一条禁言状态，kind 为 personal 或 whole，expiration 为 None 表示直到解除禁言为止"""
+        cls._execute("INSERT OR REPLACE INTO mute (stream_id, kind, expiration) VALUES (?, ?, ?)", (stream_id, kind, expiration), "mute", stream_id)
+
+    @classmethod
+    def delete_mute(cls, stream_id: str, kind: str):
+        """删除一条禁言状态"""
+        cls._execute("DELETE FROM mute WHERE stream_id = ? AND kind = ?", (stream_id, kind), "mute", stream_id)
+
+    @classmethod
+    def load_user_silences(cls) -> List[Tuple[str, str, Optional[float], str]]:
+        """清理已过期的记录后读出全部用户沉默，格式: [(stream_id, user_id, 过期时间戳 或 None, 原因)]"""
+        if cls._conn is None:
+            return []
+        now = time.time()
+        cls._execute("DELETE FROM user_silence WHERE expiration IS NOT NULL AND expiration < ?", (now,))
+        try:
+            return list(cls._conn.execute(
+                "SELECT stream_id, user_id, expiration, reason FROM user_silence WHERE expiration IS NULL OR expiration >= ?", (now,)
+            ))
+        except Exception as e:
+            logger.error(f"读取用户沉默记录失败: {str(e)}\n{traceback.format_exc()}")
+            return []
+
+    @classmethod
+    def save_user_silence(cls, stream_id: str, user_id: str, expiration: Optional[float], reason: str = ""):
+        """写入（覆盖）聊天流中某个用户的沉默"""
+        cls._execute(
+            "INSERT OR REPLACE INTO user_silence (stream_id, user_id, expiration, reason) VALUES (?, ?, ?, ?)",
+            (stream_id, user_id, expiration, reason), "user_silence", stream_id,
+        )
+
+    @classmethod
+    def delete_user_silence(cls, stream_id: str, user_id: str):
+        """删除聊天流中某个用户的沉默"""
+        cls._execute("DELETE FROM user_silence WHERE stream_id = ? AND user_id = ?", (stream_id, user_id), "user_silence", stream_id)
+
+    @classmethod
+    def load_user_silence(cls, stream_id: str) -> Dict[str, Tuple[Optional[float], str]]:
+        """读出单个聊天流中的用户沉默，格式: {user_id: (过期时间戳 或 None, 原因)}"""
+        if cls._conn is None:
+            return {}
+        try:
+            return {user_id: (expiration, reason) for user_id, expiration, reason in cls._conn.execute(
+                "SELECT user_id, expiration, reason FROM user_silence WHERE stream_id = ?", (stream_id,)
+            )}
+        except Exception as e:
+            logger.error(f"读取用户沉默记录失败: {str(e)}\n{traceback.format_exc()}")
+            return {}
+
+    @classmethod
+    def load_silence(cls, stream_id: str) -> Dict[str, Optional[float]]:
+        """读出单个聊天流各层的沉默状态，格式: {沉默层: 过期时间戳 或 None}"""
+        if cls._conn is None:
+            return {}
+        try:
+            return dict(cls._conn.execute("SELECT layer, expiration FROM silence_layer WHERE stream_id = ?", (stream_id,)))
+        except Exception as e:
+            logger.error(f"读取沉默状态记录失败: {str(e)}\n{traceback.format_exc()}")
+            return {}
+
+    @classmethod
+    def load_mute(cls, stream_id: str) -> Dict[str, Optional[float]]:
+        """读出单个聊天流的禁言状态，格式: {personal 或 whole: 过期时间戳 或 None}"""
+        if cls._conn is None:
+            return {}
+        try:
+            return dict(cls._conn.execute("SELECT kind, expiration FROM mute WHERE stream_id = ?", (stream_id,)))
+        except Exception as e:
+            logger.error(f"读取禁言状态记录失败: {str(e)}\n{traceback.format_exc()}")
+            return {}
+
+    @classmethod
+    def add_savings(cls, rows: List[Tuple[str, str, str, str, int]]):
+        """在一个事务里累加一批节省统计，格式: [(日期, stream_id, 沉默原因, message 或 command, 数量)]"""
+        if not rows:
+            return
+        cls._execute(
+            "INSERT INTO savings (day, stream_id, reason, kind, count) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (day, stream_id, reason, kind) DO UPDATE SET count = count + excluded.count",
+            rows, many=True,
+        )
+
+    @classmethod
+    def load_savings(cls, since_day: str, stream_id: Optional[str] = None) -> List[Tuple[str, str, str, str, int]]:
+        """读出 since_day（含）以来的节省统计，可以只读某个聊天流"""
+        if cls._conn is None:
+            return []
+        sql = "SELECT day, stream_id, reason, kind, count FROM savings WHERE day >= ?"
+        params: tuple = (since_day,)
+        if stream_id is not None:
+            sql += " AND stream_id = ?"
+            params += (stream_id,)
+        try:
+            return list(cls._conn.execute(sql, params))
+        except Exception as e:
+            logger.error(f"读取节省统计失败: {str(e)}\n{traceback.format_exc()}")
+            return []
+
+    @classmethod
+    def poll_changes(cls) -> Optional[List[Tuple[str, str]]]:
+        """
+        读出其他进程提交的变更
+        返回: 去重后的 [(silence、mute 或 user_silence, stream_id)]，没有变化时为空列表；
+              落后太多、变更日志已被清理时返回 None，调用方需要整体重新加载
+        """
+        if cls._conn is None or not cls._journal:
+            return []
+        try:
+            # data_version 只在其他连接（包括本进程的后台写入线程）提交后变化，绝大多数轮询到这里就结束了
+            data_version = cls._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == cls._data_version:
+                return []
+
+            rows = cls._conn.execute("SELECT seq, kind, stream_id FROM changes WHERE seq > ? ORDER BY seq", (cls._last_seq,)).fetchall()
+            gap = bool(rows) and rows[0][0] != cls._last_seq + 1
+            with cls._lock:
+                # 本进程还有写入没写完时，整体重新加载会读到旧数据，等写完之后再处理
+                if gap and cls._deferred:
+                    return []
+                deferred_keys = set(cls._deferred_keys)
+            cls._data_version = data_version
+            if not rows:
+                return []
+            cls._last_seq = rows[-1][0]
+        except Exception as e:
+            logger.error(f"读取沉默状态变更日志失败: {str(e)}\n{traceback.format_exc()}")
+            return []
+
+        # 序号不连续说明中间的日志已经被清理，或者有还没提交的事务占着序号，稳妥起见整体重新加载
+        if gap:
+            return None
+        # 本进程还在排队写入的聊天流以本进程为准（排队的写入提交后会覆盖数据库中的这次变更）
+        return list(dict.fromkeys((kind, stream_id) for _, kind, stream_id in rows if (kind, stream_id) not in deferred_keys))
+
+    @classmethod
+    def _execute(cls, sql: str, params: Any, kind: Optional[str] = None, stream_id: Optional[str] = None, many: bool = False):
+        """写入数据库，被其他进程锁住时交给后台写入线程（已经有写入在排队时直接排在后面，保证写入顺序）"""
+        if cls._conn is None:
+            return
+        write = (sql, params, many, kind, stream_id)
+        with cls._lock:
+            queued = cls._deferred > 0
+        if not queued:
+            try:
+                cls._apply(cls._conn, write)
+                return
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e):
+                    logger.error(f"写入沉默状态数据库失败: {str(e)}\n{traceback.format_exc()}")
+                    return
+            except Exception as e:
+                logger.error(f"写入沉默状态数据库失败: {str(e)}\n{traceback.format_exc()}")
+                return
+        cls._defer(write)
+
+    @classmethod
+    def _apply(cls, conn: sqlite3.Connection, write: Tuple[str, Any, bool, Optional[str], Optional[str]]):
+        """在指定的连接上执行一次写入，需要记录变更日志或批量写入时放在同一个事务里"""
+        sql, params, many, kind, stream_id = write
+        journal = cls._journal and kind is not None
+        if not journal and not many:
+            conn.execute(sql, params)
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if many:
+                conn.executemany(sql, params)
+            else:
+                conn.execute(sql, params)
+            if journal:
+                seq = conn.execute("INSERT INTO changes (kind, stream_id) VALUES (?, ?)", (kind, stream_id)).lastrowid
+                if seq % 1000 == 0:
+                    conn.execute("DELETE FROM changes WHERE seq <= ?", (seq - cls._JOURNAL_KEEP,))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    @classmethod
+    def _defer(cls, write: Tuple[str, Any, bool, Optional[str], Optional[str]]):
+        """把写入交给后台写入线程，必要时启动线程"""
+        kind, stream_id = write[3], write[4]
+        with cls._lock:
+            cls._deferred += 1
+            if kind is not None:
+                key = (kind, stream_id)
+                cls._deferred_keys[key] = cls._deferred_keys.get(key, 0) + 1
+            cls._writes.put(write)
+            if cls._writer is None or not cls._writer.is_alive():
+                logger.warning("沉默状态数据库正被其他进程占用，写入转入后台重试")
+                cls._writer = threading.Thread(target=cls._run_writer, args=(cls._db_path,), name="silence-store-writer", daemon=True)
+                cls._writer.start()
+
+    @classmethod
+    def _run_writer(cls, db_path: str):
+        """后台写入线程：用独立的连接按顺序写完排队的写入，锁竞争时一直重试（关闭时每条只再尝试一次）"""
+        conn: Optional[sqlite3.Connection] = None
+        while True:
+            write = cls._writes.get()
+            if write is None:
+                break
+            while True:
+                try:
+                    if conn is None:
+                        conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+                        conn.execute(f"PRAGMA busy_timeout={cls._WRITER_BUSY_TIMEOUT_MS}")
+                    cls._apply(conn, write)
+                    break
+                except sqlite3.OperationalError as e:
+                    if _is_busy(e) and not cls._closing:
+                        continue  # busy_timeout 已经等过一轮了，直接重试
+                    logger.error(f"后台写入沉默状态数据库失败，丢弃这次写入: {str(e)}\n{traceback.format_exc()}")
+                    break
+                except Exception as e:
+                    logger.error(f"后台写入沉默状态数据库失败，丢弃这次写入: {str(e)}\n{traceback.format_exc()}")
+                    break
+            cls._finish(write)
+        if conn is not None:
+            conn.close()
+
+    @classmethod
+    def _finish(cls, write: Tuple[str, Any, bool, Optional[str], Optional[str]]):
+        kind, stream_id = write[3], write[4]
+        with cls._lock:
+            cls._deferred -= 1
+            if kind is not None:
+                key = (kind, stream_id)
+                left = cls._deferred_keys.get(key, 0) - 1
+                if left > 0:
+                    cls._deferred_keys[key] = left
+                else:
+                    cls._deferred_keys.pop(key, None)
+
+def _is_busy(e: sqlite3.OperationalError) -> bool:
+    """是否是数据库被其他连接锁住导致的错误"""
+    message = str(e)
+    return "locked" in message or "busy" in message
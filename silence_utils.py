@@ -1,6 +1,13 @@
 from src.common.logger import get_logger
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Callable, Dict, Any, FrozenSet, List, Tuple
+from .silence_config import SilenceConfig
+from .silence_store import SilenceStore
+from .expiry_scheduler import ExpiryScheduler
+from .expiry_index import ExpiryIndex
+from .config_watcher import ConfigWatcher
+import functools
 import hashlib
+import math
 import os
 import random
 import toml
@@ -9,29 +16,139 @@ import time
 
 logger = get_logger("Silence")
 
+# 沉默层，优先级从低到高: 自然语言（动作、自动沉默） < 指令 < 实验性功能配置的默认沉默
+LAYERS = ("action", "command", "config")
+LAYER_NAMES = {"action": "自然语言", "command": "指令", "config": "配置"}
+
+# 沉默情况类型对应的沉默层
+_CASE_LAYERS = {"low": 0, "medium": 0, "serious": 0, "command": 1, "config": 2}
+
+# 沉默层中表示“永久”的截止时间
+NO_EXPIRY = math.inf
+
+class _SilenceRecord:
+    """
+    单个聊天流的分层沉默记录
+    - 每一层保存自己的截止时间，0 表示该层没有沉默，NO_EXPIRY 表示永久
+    - 只要有一层还在生效聊天流就处于沉默状态，沉默原因由生效的最高层决定；高层到期后低层自然接着生效
+    - 生效的最高层、沉默原因、整体结束时间和最近一层的到期时间在每次变化时算好，读取时直接取用
+    """
+
+    __slots__ = ("until", "top", "reason", "end", "next_expiry")
+
+    def __init__(self):
+        self.until = [0.0] * len(LAYERS)
+        self.top = -1  # 生效的最高层，-1 表示没有任何一层
+        self.reason = ""
+        self.end = 0.0  # 所有层中最晚的截止时间，即整个沉默结束的时间
+        self.next_expiry = NO_EXPIRY  # 所有层中最早的截止时间，到这个时间才需要重新计算
+
+    def resolve(self, now: float) -> bool:
+        """丢弃已经到期的层并重新计算生效状态，返回是否有层被丢弃"""
+        until = self.until
+        dropped = False
+        self.top = -1
+        self.end = 0.0
+        self.next_expiry = NO_EXPIRY
+        for layer, value in enumerate(until):
+            if not value:
+                continue
+            if value < now:
+                until[layer] = 0.0
+                dropped = True
+                continue
+            self.top = layer
+            if value > self.end:
+                self.end = value
+            if value < self.next_expiry:
+                self.next_expiry = value
+        self.reason = layer_reason(self.top, until)
+        return dropped
+
+def layer_reason(top: int, until) -> str:
+    """由生效的最高层和各层截止时间得出沉默原因"""
+    if top == _CASE_LAYERS["config"]:
+        return "special_silence"
+    if top >= 0 and until[top] == NO_EXPIRY:
+        return "force_silence"
+    return ""
+
 class SilenceUtils:
 
     # 沉默状态记录
-    _silence_records: Dict[str, Dict[str, Any]] = {} # 格式: {stream_id: {expiration: 过期时间戳 或 None}}, 如果过期时间戳是None表示永久沉默
+    _silence_records: Dict[str, _SilenceRecord] = {} # 格式: {stream_id: 分层沉默记录}，只保存至少有一层在生效的聊天流
+
+    # 状态版本号，沉默记录每次变化都会加一，供判定结果缓存校验（只在事件循环中修改）
+    state_version: int = 0
+
+    # 配置版本号，每次替换配置快照都会加一（只由 reload_config 修改，可能在配置监视线程中发生，
+    # 因此与 state_version 分开计数，两个线程不会对同一个计数器做读-改-写）
+    config_version: int = 0
 
-    # 配置缓存
-    _config_cache: Optional[Dict[str, Any]] = None
-    _config_mtime: Optional[float] = None
-    _last_mtime_check: float = 0
+    # 沉默状态过期调度器（在类定义之后创建），按每个聊天流最早到期的一层安排
+    _expiry: ExpiryScheduler
+
+    # 按整体结束时间排序的沉默记录索引，供 /silence list 分页读取
+    _index = ExpiryIndex()
+
+    # 沉默结束（所有层都到期、被移除或被其他进程解除）时的回调
+    _exit_listeners: List[Callable[[str], None]] = []
+
+    # 沉默状态变化（enter=进入沉默，exit=被解除，expire=到期结束）时的回调
+    _state_listeners: List[Callable[[str, str], None]] = []
+
+    # 当前配置（只读快照，由后台监视线程重新加载后整体替换）
+    _config: Optional[SilenceConfig] = None
+    _config_watcher: Optional[ConfigWatcher] = None
 
     # 添加沉默状态方法
     @classmethod
     def add_silence(cls, case: str, duration: Optional[int], stream_id: str) -> bool:
         """
         添加沉默状态
+        只覆盖 case 对应的那一层，其他层的沉默保持不变
         """
     
+        ok, duration = cls.resolve_duration(case, duration)
+        if not ok:
+            return False
+        layer = _CASE_LAYERS[case]
+        
+        # 计算沉默状态结束时的时间戳
+        if duration is None:
+            expiration = None  # 永久沉默
+        else:
+            expiration = time.time() + duration
+
+        # 写入对应的沉默层
+        record = cls._silence_records.get(stream_id)
+        if record is None:
+            record = _SilenceRecord()
+        record.until[layer] = NO_EXPIRY if expiration is None else expiration
+        record.resolve(time.time())
+        cls._commit(stream_id, record)
+
+        # 配置层随配置文件实时计算，不需要持久化
+        if LAYERS[layer] != "config":
+            SilenceStore.save_silence(stream_id, LAYERS[layer], expiration)
+        duration_str = f"{duration}秒" if duration else "永久"
+        logger.info(f"已添加聊天流 {stream_id} 到沉默列表，类型: {case}，沉默层: {LAYER_NAMES[LAYERS[layer]]}，持续时间: {duration_str}")
+
+        return True
+    
+    # 沉默时长计算方法
+    @classmethod
+    def resolve_duration(cls, case: str, duration: Optional[float]) -> Tuple[bool, Optional[float]]:
+        """
+        按沉默情况类型计算沉默时长
+        返回: (是否有效, 沉默秒数 或 None表示永久)
+        """
         # 每次调用施加沉默方法时实时读取配置（支持热更新）
         config = cls._load_config()
-        low_min, low_max = config["adjustment"]["low_case"]
-        medium_min, medium_max = config["adjustment"]["medium_case"]
-        serious_min, serious_max = config["adjustment"]["serious_case"]
-        max_action_silence_time = config["adjustment"]["max_action_silence_time"]
+        low_min, low_max = config.low_case
+        medium_min, medium_max = config.medium_case
+        serious_min, serious_max = config.serious_case
+        max_action_silence_time = config.max_action_silence_time
         
         if case == "low":
             duration = random.randint(low_min, low_max)  # 默认配置是2分钟到10分钟之间
@@ -43,152 +160,376 @@ class SilenceUtils:
             else:
                 # 拒绝不合理的沉默时间
                 if duration > max_action_silence_time:
-                    return False
-        elif case == "command":
+                    return False, None
+        elif case == "command" or case == "config":
             pass  # 直接使用传入的duration
         else:
             logger.error(f"无效的沉默情况类型: {case},你接入的LLM很可能犯傻了") # 理论上极低概率出错，但还是写了以防万一
-            return False
+            return False, None
         
-        # 计算沉默状态结束时的时间戳
-        if duration is None:
-            expiration = None  # 永久沉默
-        else:
-            expiration = time.time() + duration
-
-        # 直接存储计算好的时间戳
-        cls._silence_records[stream_id] = {"expiration": expiration}
-        duration_str = f"{duration}秒" if duration else "永久"
-        logger.info(f"已添加聊天流 {stream_id} 到沉默列表，类型: {case}，持续时间: {duration_str}")
+        return True, duration
 
-        return True
-    
     # 移除沉默状态方法
     @classmethod
-    def remove_silence(cls, stream_id: str) -> bool:
+    def remove_silence(cls, stream_id: str, layer: str = "command") -> bool:
         """
         移除沉默状态
-        返回: True=成功移除, False=本来就不在沉默中
+        移除 layer 及比它低的所有沉默层（指令和艾特可以解除自然语言和指令施加的沉默，但解除不了配置的默认沉默）
+        返回: True=成功移除, False=这几层本来就没有沉默
         """
-        if stream_id not in cls._silence_records:
-            logger.warning(f"聊天流 {stream_id} 未处于沉默状态")
+        if not cls._drop_layers(stream_id, range(LAYERS.index(layer) + 1)):
+            logger.warning(f"聊天流 {stream_id} 未处于可以解除的沉默状态")
             return False
-        
-        # 直接删沉默状态记录
-        del cls._silence_records[stream_id]
-
-        logger.info(f"已移除聊天流 {stream_id} 的沉默状态")
+        logger.info(f"已移除聊天流 {stream_id} 的沉默状态（{LAYER_NAMES[layer]}及以下）")
         return True
 
+    # 配置层同步方法
+    @classmethod
+    def sync_config_layer(cls, stream_id: str, active: bool):
+        """让聊天流的配置层与当前配置一致（群聊被加入或移出默认沉默列表后，下一条消息时生效）"""
+        record = cls._silence_records.get(stream_id)
+        layer = _CASE_LAYERS["config"]
+        if active == (record is not None and record.until[layer] != 0.0):
+            return
+        if active:
+            cls.add_silence("config", None, stream_id)
+            # 原有的沉默被配置层覆盖后不会再结束，这里先调用结束回调（例如把摘要写出去），免得攒下的内容一直留在内存里
+            if record is not None:
+                cls._notify_exit(stream_id)
+        elif cls._drop_layers(stream_id, (layer,)):
+            logger.info(f"聊天流 {stream_id} 已不在默认沉默列表中，移除配置施加的沉默")
+
     # 检查是否处于沉默状态方法
     @classmethod
     def is_silenced(cls, stream_id: str) -> Tuple[bool, str]:
         """
         检查指定聊天流是否处于沉默状态
-        自动清理过期记录
+        生效的最高层和沉默原因已经提前算好，这里只需要一次查找和一次比较；
+        到期的层由过期调度器主动清理，这里只兜底处理调度器还没来得及触发的记录
         """
         # 不在记录里就返回False
-        if stream_id not in cls._silence_records:
+        record = cls._silence_records.get(stream_id)
+        if record is None:
             return False, ""
         
-        expiration = cls._silence_records[stream_id].get("expiration")
-        
-        # 永久沉默返回True
-        if expiration is None:
-            return True, "force_silence"
-        
-        # 检查沉默状态是否过期
-        current_time = time.time()
-        if expiration >= current_time:
-            return True, ""  # 没到时间就还在沉默中
+        # 还没有任何一层到期，直接返回算好的结果
+        if record.next_expiry >= time.time():
+            return True, record.reason
         
-        # 已过期，直接删除记录
-        del cls._silence_records[stream_id]
-        logger.info(f"聊天流 {stream_id} 的沉默状态已过期，自动清理")
-        return False, ""
+        # 有层已经到期，重新计算（可能还有更低的层在生效）
+        cls._expire(stream_id)
+        record = cls._silence_records.get(stream_id)
+        if record is None:
+            return False, ""
+        return True, record.reason
+
+    # 沉默过期时间查询方法
+    @classmethod
+    def get_expiration(cls, stream_id: str, layer: Optional[str] = None) -> Tuple[bool, Optional[float]]:
+        """
+        返回 (是否存在沉默记录, 过期时间戳 或 None表示永久)，不做过期检查
+        layer 为 None 时返回整个沉默的结束时间，否则只看指定的那一层
+        """
+        record = cls._silence_records.get(stream_id)
+        if record is None:
+            return False, None
+        until = record.end if layer is None else record.until[LAYERS.index(layer)]
+        if not until:
+            return False, None
+        return True, None if until == NO_EXPIRY else until
+
+    # 可结束沉默检查方法
+    @classmethod
+    def can_end(cls, stream_id: str) -> bool:
+        """
+        聊天流的沉默是否会结束并触发沉默结束回调
+        只有自然语言层和指令层会到期或被解除；有配置层时它们结束后沉默仍然继续，结束回调不会被调用
+        """
+        record = cls._silence_records.get(stream_id)
+        return record is not None and not record.until[_CASE_LAYERS["config"]]
+
+    # 沉默层查询方法
+    @classmethod
+    def get_layers(cls, stream_id: str) -> List[Tuple[str, Optional[float]]]:
+        """按优先级从高到低返回聊天流正在生效的沉默层，格式: [(沉默层, 过期时间戳 或 None)]"""
+        record = cls._silence_records.get(stream_id)
+        if record is None:
+            return []
+        now = time.time()
+        return [
+            (LAYERS[layer], None if until == NO_EXPIRY else until)
+            for layer, until in reversed(list(enumerate(record.until)))
+            if until and until >= now
+        ]
+
+    # 剩余沉默时间查询方法
+    @classmethod
+    def get_silence_remaining(cls, stream_id: str) -> Tuple[bool, Optional[float]]:
+        """
+        查询聊天流剩余的沉默时间（到所有沉默层都结束为止）
+        返回: (是否处于沉默状态, 剩余秒数)，剩余秒数为 None 表示永久沉默
+        """
+        if not cls.is_silenced(stream_id)[0]:
+            return False, None
+        end = cls._silence_records[stream_id].end
+        return True, None if end == NO_EXPIRY else end - time.time()
+
+    # 沉默状态过期处理方法
+    @classmethod
+    def _expire(cls, stream_id: str):
+        """清理已经到期的沉默层（由过期调度器回调），还有更低的层在生效时由它接着生效"""
+        record = cls._silence_records.get(stream_id)
+        if record is None:
+            return
+        before = [bool(until) for until in record.until]
+        if not record.resolve(time.time()):
+            cls._commit(stream_id, record, expired=True)  # 记录已被覆盖，按新的到期时间重新安排
+            return
+
+        expired = tuple(LAYERS[layer] for layer, until in enumerate(record.until) if before[layer] and not until)
+        SilenceStore.delete_silence(stream_id, expired)
+        if record.top < 0:
+            logger.info(f"聊天流 {stream_id} 的沉默状态已过期，自动清理")
+        else:
+            logger.info(f"聊天流 {stream_id} 的{'、'.join(LAYER_NAMES[layer] for layer in expired)}沉默已过期，{LAYER_NAMES[LAYERS[record.top]]}沉默继续生效")
+        cls._commit(stream_id, record, expired=True)
+
+    @classmethod
+    def _drop_layers(cls, stream_id: str, layers) -> bool:
+        """移除聊天流的指定几层沉默，返回是否真的移除了某一层"""
+        record = cls._silence_records.get(stream_id)
+        if record is None:
+            return False
+        dropped = tuple(LAYERS[layer] for layer in layers if record.until[layer])
+        if not dropped:
+            return False
+        for layer in layers:
+            record.until[layer] = 0.0
+        record.resolve(time.time())
+        SilenceStore.delete_silence(stream_id, dropped)
+        cls._commit(stream_id, record)
+        return True
+
+    @classmethod
+    def _commit(cls, stream_id: str, record: _SilenceRecord, expired: bool = False, notify: bool = True):
+        """把重新计算过的记录写回内存，同步索引和过期调度；所有层都结束时移除记录并通知沉默结束"""
+        cls.state_version += 1
+        if record.top < 0:
+            if cls._silence_records.pop(stream_id, None) is None:
+                return
+            cls._index.discard(stream_id)
+            cls._expiry.cancel(stream_id)
+            cls._notify_exit(stream_id)
+            if notify:
+                cls._notify_state("expire" if expired else "exit", stream_id)
+            return
+
+        entered = stream_id not in cls._silence_records
+        cls._silence_records[stream_id] = record
+        cls._index.set(stream_id, None if record.end == NO_EXPIRY else record.end)
+        if record.next_expiry == NO_EXPIRY:
+            cls._expiry.cancel(stream_id)
+        else:
+            cls._expiry.schedule(stream_id, record.next_expiry)
+        if entered and notify:
+            cls._notify_state("enter", stream_id)
+
+    # 沉默结束回调注册方法
+    @classmethod
+    def add_exit_listener(cls, listener: Callable[[str], None]):
+        """注册沉默结束（或被不会结束的配置层覆盖）时的回调，参数为聊天流ID（重复注册同一个回调只生效一次）"""
+        if listener not in cls._exit_listeners:
+            cls._exit_listeners.append(listener)
+
+    @classmethod
+    def _notify_exit(cls, stream_id: str):
+        for listener in cls._exit_listeners:
+            try:
+                listener(stream_id)
+            except Exception as e:
+                logger.error(f"沉默结束回调执行出错: {str(e)}\n{traceback.format_exc()}")
+
+    # 沉默状态变化回调注册方法
+    @classmethod
+    def add_state_listener(cls, listener: Callable[[str, str], None]):
+        """注册沉默状态变化时的回调，参数为 (enter、exit 或 expire, 聊天流ID)（重复注册同一个回调只生效一次）"""
+        if listener not in cls._state_listeners:
+            cls._state_listeners.append(listener)
+
+    @classmethod
+    def _notify_state(cls, event: str, stream_id: str):
+        for listener in cls._state_listeners:
+            try:
+                listener(event, stream_id)
+            except Exception as e:
+                logger.error(f"沉默状态变化回调执行出错: {str(e)}\n{traceback.format_exc()}")
+
+    # 启动后台任务方法
+    @classmethod
+    def start_background(cls):
+        """启动沉默状态相关的后台任务（需要在事件循环中调用）"""
+        cls._expiry.start()
+
+    # 停止后台任务方法
+    @classmethod
+    def stop_background(cls):
+        """停止沉默状态相关的后台任务"""
+        cls._expiry.stop()
     
+    # 从持久化存储恢复沉默状态方法
+    @classmethod
+    def restore(cls) -> int:
+        """
+        从本地数据库恢复沉默状态（已过期的记录会在恢复时被丢弃）
+        配置层不会被持久化，之后收到消息时按当前配置重新施加
+        返回: 恢复的聊天流数量
+        """
+        rows = SilenceStore.load_silences()
+        now = time.time()
+        previous = set(cls._silence_records)
+        cls._silence_records = {}
+        cls._index.clear()
+        for stream_id, layers in rows.items():
+            record = cls._record_from_layers(layers)
+            record.resolve(now)
+            if record.top >= 0:
+                cls._commit(stream_id, record, notify=False)
+        cls.state_version += 1
+
+        # 只通知真正发生了变化的聊天流（结束的沉默也要调用结束回调，否则攒下的摘要不会被写出）
+        for stream_id in previous - cls._silence_records.keys():
+            cls._notify_exit(stream_id)
+            cls._notify_state("exit", stream_id)
+        for stream_id in cls._silence_records.keys() - previous:
+            cls._notify_state("enter", stream_id)
+        return len(cls._silence_records)
+
+    # 沉默状态导出方法
+    @classmethod
+    def export_records(cls) -> Dict[str, Tuple[float, ...]]:
+        """导出各聊天流各层的截止时间（副本，0 表示该层没有沉默，NO_EXPIRY 表示永久），不做过期检查、不修改任何状态"""
+        return {stream_id: tuple(record.until) for stream_id, record in cls._silence_records.items()}
+
+    # 同步其他进程写入的沉默状态方法
+    @classmethod
+    def apply_remote(cls, stream_id: str, layers: Dict[str, Optional[float]]):
+        """把数据库中（由其他进程写入的）单个聊天流各层的沉默状态同步到内存，不会再写回数据库（本进程的配置层保持不变）"""
+        record = cls._silence_records.get(stream_id)
+        new = cls._record_from_layers(layers)
+        config_layer = _CASE_LAYERS["config"]
+        if record is not None:
+            new.until[config_layer] = record.until[config_layer]
+            if new.until == record.until:
+                return
+        elif not any(new.until):
+            return
+        new.resolve(time.time())
+        cls._commit(stream_id, new)
+
+    @staticmethod
+    def _record_from_layers(layers: Dict[str, Optional[float]]) -> _SilenceRecord:
+        record = _SilenceRecord()
+        for layer, expiration in layers.items():
+            if layer in LAYERS and layer != "config":
+                record.until[LAYERS.index(layer)] = NO_EXPIRY if expiration is None else expiration
+        return record
+
+    # 沉默列表查询方法
+    @classmethod
+    def list_silences(cls, offset: int = 0, limit: int = 10) -> Tuple[int, List[Tuple[str, Optional[float]]]]:
+        """
+        按剩余时间从短到长分页列出沉默中的聊天流（永久沉默排在最后）
+        返回: (沉默中的聊天流总数, [(stream_id, 过期时间戳 或 None)])
+        """
+        return len(cls._index), cls._index.page(offset, limit)
+
+    # 全部沉默聊天流查询方法
+    @classmethod
+    def silenced_streams(cls) -> List[str]:
+        """返回所有沉默中的聊天流ID（按剩余时间从短到长）"""
+        return cls._index.keys()
+
+    # 剩余时间格式化方法
+    @staticmethod
+    def format_remaining(seconds: Optional[float]) -> str:
+        """把剩余秒数格式化为可读文本，None 为永久"""
+        if seconds is None:
+            return "永久"
+        seconds = max(0, int(seconds))
+        hours, rest = divmod(seconds, 3600)
+        minutes, seconds = divmod(rest, 60)
+        if hours:
+            return f"{hours}小时{minutes}分{seconds}秒"
+        if minutes:
+            return f"{minutes}分{seconds}秒"
+        return f"{seconds}秒"
+
+    # 定时沉默检查方法
+    @classmethod
+    def is_quiet_hours(cls, group_id: Any) -> Tuple[bool, str]:
+        """检查群聊当前是否处于定时沉默时间窗口内"""
+        if cls._load_config().quiet_hours.is_quiet(group_id):
+            return True, "quiet_hours"
+        return False, ""
+
     # 沉默人群检查方法
     @classmethod
-    def is_silenced_someone(cls, user_id: int) -> Tuple[bool, str]:
-        """沉默人群检查逻辑"""
+    def is_silenced_someone(cls, user_id: Any) -> Tuple[bool, str]:
+        """沉默人群检查逻辑（int和str形式的ID均可）"""
 
-        # 先读一下配置
-        config = cls._load_config()
-        enable = config.get("experimental", {}).get("silence_special_check", False)
-        silence_someones = config.get("experimental", {}).get("silence_someone_list", [])
-        
-        # 检查用户ID是否在沉默人群列表中
-        if not enable:
-            return False, ""
-        
-        if not silence_someones:
-            return False, ""
-            
-        if user_id in silence_someones:
+        # 未启用默认沉默功能时索引为空，一次哈希查找即可得出结果
+        if user_id in cls._load_config().special_users:
             return True, "special_silence"
-        
-        else:
-            return False, ""
+        return False, ""
         
     # 沉默群聊检查方法
     @classmethod
-    def is_silenced_group(cls, group_id: int) -> Tuple[bool, str]:
-        """沉默群聊检查逻辑"""
+    def is_silenced_group(cls, group_id: Any) -> Tuple[bool, str]:
+        """沉默群聊检查逻辑（int和str形式的ID均可）"""
 
-        # 先读一下配置
-        config = cls._load_config()
-        enable = config.get("experimental", {}).get("silence_special_check", False)
-        silence_groups = config.get("experimental", {}).get("silence_group_list", [])
-        
-        # 检查群聊ID是否在沉默群聊列表中
-        if not enable:
-            return False, ""
-        
-        if not silence_groups:
-            return False, ""
-            
-        if group_id in silence_groups:
+        if group_id in cls._load_config().special_groups:
             return True, "special_silence"
-        
-        else:
-            return False, ""
+        return False, ""
 
     # 禁用command组件方法
     @classmethod
-    def is_disable_commands(cls) -> Tuple[bool, list]:
+    def is_disable_commands(cls) -> Tuple[bool, FrozenSet[str]]:
         """检查是否禁用指令组件"""
         config = cls._load_config()
-        return config["adjustment"]["disable_command"], ["silence_command"] + config["adjustment"]["unaffected_command_list"]
+        return config.disable_command, config.unaffected_commands
     
     # 权限检查方法
     @classmethod
-    def check_person_permission(cls, user_id: int) -> bool:
-        """权限检查逻辑"""
+    def check_person_permission(cls, user_id: Any) -> bool:
+        """权限检查逻辑（int和str形式的ID均可）"""
 
-        # 先读一下配置
         config = cls._load_config()
-        mode = config.get("permissions", {}).get("white_or_black_list", "whitelist")
-        admin_users = config.get("permissions", {}).get("admin_users", [])
         
         # 检查用户ID是否在管理员列表中
-        if not admin_users:
+        if not config.admin_users:
             logger.info(f"未配置管理员用户列表")
             return False
-        if mode == "whitelist":
-            return user_id in admin_users
+        if config.is_whitelist:
+            return user_id in config.admin_users
         else:
-            return user_id not in admin_users
+            return user_id not in config.admin_users
         
     # 检查是否启用沉默状态下表达学习
     @classmethod
     def check_expression_learning(cls) -> bool:
         """检查是否启用沉默状态下表达学习"""
-        config = cls._load_config()
-        return config.get("experimental", {}).get("silence_expression_learning", False)
+        return cls._load_config().silence_expression_learning
+
+    # 获取当前配置快照方法
+    @classmethod
+    def get_config(cls) -> SilenceConfig:
+        """获取当前的只读配置快照"""
+        return cls._load_config()
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def generate_stream_id(platform: str, user_id: str, group_id: Optional[str]) -> str:
-        """生成聊天流唯一ID（与ChatStream保持一致）"""
+        """生成聊天流唯一ID（与ChatStream保持一致，结果带缓存）"""
         if group_id:
             components = [platform, str(group_id)]
         else:
@@ -197,57 +538,58 @@ class SilenceUtils:
         key = "_".join(components)
         return hashlib.md5(key.encode()).hexdigest()
 
+    # 配置文件路径
+    @staticmethod
+    def config_path() -> str:
+        """插件配置文件的路径"""
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.toml")
+
+    # 重新加载配置方法
     @classmethod
-    def _load_config(cls) -> Dict[str, Any]:
-        """从配置文件加载配置（带缓存）"""
-        current_time = time.time()
-        
-        # 有缓存且距离上次检查不到3秒，直接返回缓存
-        if cls._config_cache is not None and current_time - cls._last_mtime_check < 3.0:
-            return cls._config_cache
-        
-        cls._last_mtime_check = current_time
-        
+    def reload_config(cls) -> bool:
+        """
+        读取、解析并校验配置文件，成功后一次性替换当前配置快照
+        会阻塞读取文件，只应在插件初始化或配置监视线程中调用
+        返回: True=已替换, False=加载失败，保留上一份配置
+        """
         try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            config_path = os.path.join(script_dir, "config.toml")
-            current_mtime = os.path.getmtime(config_path)
-            
-            # 文件未修改且有缓存，返回缓存
-            if cls._config_mtime == current_mtime and cls._config_cache is not None:
-                return cls._config_cache
-            
-            # 文件已修改，重新加载
-            cls._config_mtime = current_mtime
-            
-            with open(config_path, 'r', encoding='utf-8') as f:
+            with open(cls.config_path(), 'r', encoding='utf-8') as f:
                 config_data = toml.load(f)
-            
-            cls._config_cache = {
-                "permissions": {
-                    "white_or_black_list": config_data.get("permissions", {}).get("white_or_black_list", "whitelist"),
-                    "admin_users": config_data.get("permissions", {}).get("admin_users", [])
-                },
-                "adjustment": {
-                    "disable_command": config_data.get("adjustment", {}).get("disable_command", True),
-                    "unaffected_command_list": config_data.get("adjustment", {}).get("unaffected_command_list", []),
-                    "low_case": config_data.get("adjustment", {}).get("low_case", [120, 600]),
-                    "medium_case": config_data.get("adjustment", {}).get("medium_case", [600, 1200]),
-                    "serious_case": config_data.get("adjustment", {}).get("serious_case", [1200, 5400]),
-                    "max_action_silence_time": config_data.get("adjustment", {}).get("max_action_silence_time", 10800)
-                },
-                "experimental": {
-                    "silence_expression_learning": config_data.get("experimental", {}).get("silence_expression_learning", False),
-                    "silence_special_check": config_data.get("experimental", {}).get("silence_special_check", False),
-                    "silence_someone_list": config_data.get("experimental", {}).get("silence_someone_list", []),
-                    "silence_group_list": config_data.get("experimental", {}).get("silence_group_list", [])
-                }
-            }
-            
-            return cls._config_cache
-            
+            config = SilenceConfig(config_data)
         except Exception as e:
-            logger.error(f"加载配置文件时出错: {str(e)}\n{traceback.format_exc()}")
-            if cls._config_cache is not None:
-                return cls._config_cache
-            raise
\ No newline at end of file
+            logger.error(f"加载配置文件时出错，继续使用上一份有效配置: {str(e)}\n{traceback.format_exc()}")
+            return False
+
+        cls._config = config
+        cls.config_version += 1
+        return True
+
+    # 启动配置监视方法
+    @classmethod
+    def start_config_watcher(cls):
+        """启动后台配置监视线程，配置文件变化时自动重新加载"""
+        if cls._config_watcher is None:
+            cls._config_watcher = ConfigWatcher(cls.config_path(), cls._on_config_change)
+        cls._config_watcher.start()
+
+    # 停止配置监视方法
+    @classmethod
+    def stop_config_watcher(cls):
+        """停止后台配置监视线程"""
+        if cls._config_watcher is not None:
+            cls._config_watcher.stop()
+
+    @classmethod
+    def _on_config_change(cls):
+        if cls.reload_config():
+            logger.info("检测到配置文件变化，已重新加载沉默插件配置")
+
+    @classmethod
+    def _load_config(cls) -> SilenceConfig:
+        """获取当前配置快照（不访问文件系统，插件初始化前被调用时使用默认配置）"""
+        config = cls._config
+        if config is None:
+            config = cls._config = SilenceConfig({})
+        return config
+
+SilenceUtils._expiry = ExpiryScheduler("沉默状态", SilenceUtils._expire)
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Any, Tuple
+from .silence_utils import SilenceUtils
+from .mute_utils import MuteUtils
+from .user_silence_utils import UserSilenceUtils
+import time
+
+class SilenceVerdict:
+    """
+    一条消息的沉默判定结果（只读）
+    - silenced: 是否处于沉默状态
+    - reason: 沉默原因，""=普通沉默，"force_silence"=指令指定的永久沉默，"special_silence"=实验性功能配置的默认沉默，
+              "quiet_hours"=定时沉默，"user_silence"=只针对该发送者的用户沉默
+    - muted: 是否处于禁言状态
+    - unbreakable: 沉默是否豁免于艾特打断
+    """
+
+    __slots__ = ("silenced", "reason", "muted", "unbreakable")
+
+    # 艾特无法打断的沉默原因
+    UNBREAKABLE_REASONS = frozenset(["force_silence", "special_silence", "quiet_hours", "user_silence"])
+
+    def __init__(self, silenced: bool, reason: str, muted: bool):
+        _set = object.__setattr__
+        _set(self, "silenced", silenced)
+        _set(self, "reason", reason)
+        _set(self, "muted", muted)
+        _set(self, "unbreakable", silenced and reason in self.UNBREAKABLE_REASONS)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("SilenceVerdict 是只读的判定结果")
+
+    @property
+    def intercept(self) -> bool:
+        """是否需要截断回复流程"""
+        return self.silenced or self.muted
+
+    def __repr__(self) -> str:
+        return f"SilenceVerdict(silenced={self.silenced}, reason={self.reason!r}, muted={self.muted})"
+
+# 最常见的“什么都没有”的判定结果，直接复用
+_PASS = SilenceVerdict(False, "", False)
+
+class VerdictEngine:
+    """
+    沉默判定引擎
+    - 两个事件处理器共用同一套判定逻辑，保证对同一条消息的结论一致
+    - 判定结果只取决于聊天流、发送者和当前状态，因此以 (stream_id, user_id) 为键缓存，
+      ON_MESSAGE_PRE_PROCESS 算出的结果可以直接被随后的 ON_MESSAGE 复用
+    - 沉默、禁言记录或配置任何变化都会使缓存失效，缓存条目也只存活很短时间（定时沉默窗口的边界因此最多晚这么久生效）
+    """
+
+    _MEMO_SIZE = 1024
+    _MEMO_TTL = 2.0
+
+    _memo: "OrderedDict[Tuple[Any, Any], Tuple[Tuple[int, int, int, int], float, SilenceVerdict]]" = OrderedDict()  # 格式: {(stream_id, user_id): (配置和状态版本, 过期时间, 判定结果)}
+
+    @classmethod
+    def decide(cls, stream_id: str, user_id: Any, group_id: Any) -> SilenceVerdict:
+        """计算（或复用）一条消息的沉默判定结果"""
+        key = (stream_id, user_id)
+        now = time.monotonic()
+        # 配置可能在配置监视线程中被替换，因此在判定之前取配置版本号，判定期间换了配置时这条缓存会直接失效
+        config_version = SilenceUtils.config_version
+        entry = cls._memo.get(key)
+        if entry is not None and entry[0] == (config_version, SilenceUtils.state_version, MuteUtils.state_version, UserSilenceUtils.state_version) and entry[1] > now:
+            return entry[2]
+
+        verdict = cls._compute(stream_id, user_id, group_id)
+
+        # 判定过程本身可能改变状态（例如给默认沉默的群聊施加配置层），因此在判定之后再取状态版本号
+        cls._memo[key] = ((config_version, SilenceUtils.state_version, MuteUtils.state_version, UserSilenceUtils.state_version), now + cls._MEMO_TTL, verdict)
+        cls._memo.move_to_end(key)
+        if len(cls._memo) > cls._MEMO_SIZE:
+            cls._memo.popitem(last=False)
+        return verdict
+
+    @classmethod
+    def clear(cls):
+        """清空判定缓存"""
+        cls._memo.clear()
+
+    @staticmethod
+    def _compute(stream_id: str, user_id: Any, group_id: Any) -> SilenceVerdict:
+        # 进行针对特定群聊的沉默检查（实验性功能），结果作为最高的配置层写入沉默记录，群聊被移出配置后自动撤掉
+        if group_id:
+            SilenceUtils.sync_config_layer(stream_id, SilenceUtils.is_silenced_group(group_id)[0])
+
+        # 检查是否处于沉默状态（各沉默层中生效的最高层决定沉默原因）
+        is_silenced, silence_reason = SilenceUtils.is_silenced(stream_id)
+
+        # 检查群聊是否处于定时沉默时间窗口内
+        if not is_silenced and group_id:
+            is_silenced, silence_reason = SilenceUtils.is_quiet_hours(group_id)
+
+        # 检查发送者是否在这个聊天流中被单独沉默
+        if not is_silenced and user_id:
+            is_silenced, silence_reason = UserSilenceUtils.is_silenced(stream_id, user_id)
+
+        # 进行针对特定用户的沉默检查（实验性功能）
+        if not is_silenced and user_id:
+            is_silenced, silence_reason = SilenceUtils.is_silenced_someone(user_id)
+
+        is_muted = MuteUtils.is_muted(stream_id)
+        if not is_silenced and not is_muted:
+            return _PASS
+        return SilenceVerdict(is_silenced, silence_reason, is_muted)
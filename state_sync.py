@@ -0,0 +1,79 @@
+from src.common.logger import get_logger
+from .silence_store import SilenceStore
+from .silence_utils import SilenceUtils
+from .mute_utils import MuteUtils
+from .user_silence_utils import UserSilenceUtils
+from typing import Optional
+import asyncio
+import traceback
+
+logger = get_logger("Silence")
+
+class StateSync:
+    """
+    多进程共享状态同步
+    - 同一台机器上的多个麦麦进程共用一个状态数据库（state_backend = "shared"）时启用
+    - 后台协程按固定间隔检查 PRAGMA data_version，只有其他进程提交过写入时才读取变更日志，
+      再逐条把变化的聊天流同步进内存，消息处理时的沉默判断仍然只读内存中的字典
+    """
+
+    enabled: bool = False
+
+    _interval: float = 0.05
+    _task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def configure(cls, enabled: bool, interval: float = 0.05):
+        """开启或关闭同步，并设置轮询间隔（秒）"""
+        cls.enabled = enabled
+        cls._interval = max(0.005, interval)
+
+    @classmethod
+    def start(cls) -> bool:
+        """在开启同步且有运行中的事件循环时启动同步协程，返回是否在运行"""
+        if not cls.enabled:
+            return False
+        if cls._task is not None and not cls._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        cls._task = loop.create_task(cls._run())
+        return True
+
+    @classmethod
+    def stop(cls):
+        """停止同步协程"""
+        if cls._task is not None:
+            cls._task.cancel()
+            cls._task = None
+
+    @classmethod
+    def sync_once(cls) -> int:
+        """
+        同步一次其他进程写入的变更
+        返回: 同步的聊天流数量（整体重新加载时为重新加载的记录数）
+        """
+        changes = SilenceStore.poll_changes()
+        if changes is None:
+            logger.warning("沉默状态变更日志不连续，重新加载全部沉默和禁言状态")
+            return SilenceUtils.restore() + MuteUtils.restore() + UserSilenceUtils.restore()
+
+        for kind, stream_id in changes:
+            if kind == "silence":
+                SilenceUtils.apply_remote(stream_id, SilenceStore.load_silence(stream_id))
+            elif kind == "mute":
+                MuteUtils.apply_remote(stream_id, SilenceStore.load_mute(stream_id))
+            elif kind == "user_silence":
+                UserSilenceUtils.apply_remote(stream_id, SilenceStore.load_user_silence(stream_id))
+        return len(changes)
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            try:
+                cls.sync_once()
+            except Exception as e:
+                logger.error(f"同步共享沉默状态时出错: {str(e)}\n{traceback.format_exc()}")
+            await asyncio.sleep(cls._interval)
@@ -0,0 +1,45 @@
+from src.common.logger import get_logger
+from .write_behind import WriteBehindQueue
+from .lazy_import import LazyImport
+from typing import Any, List, Optional, Tuple
+import traceback
+
+# 主程序中较重的模块在第一次使用时才导入
+MessageStorage = LazyImport("src.chat.message_receive.storage", "MessageStorage")
+
+logger = get_logger("Silence")
+
+class StorageUtils:
+    """
+    沉默期间消息的延迟存储
+    - 事件处理器只把消息放进有界队列，不再等待数据库写入
+    - 后台协程按批次依次调用 MessageStorage.store_message
+    """
+
+    _queue: Optional[WriteBehindQueue] = None
+
+    @classmethod
+    def configure(cls, max_size: int = 1000, batch_size: int = 50, flush_interval: float = 1.0):
+        """设置队列参数（需要在第一条消息入队之前调用）"""
+        cls._queue = WriteBehindQueue("沉默消息存储队列", cls._store_batch, max_size, batch_size, flush_interval)
+
+    @classmethod
+    async def store_message(cls, message: Any, chat_stream: Any):
+        """把消息放进存储队列，队列满时等待（反压）"""
+        if cls._queue is None:
+            cls.configure()
+        await cls._queue.put((message, chat_stream))  # type: ignore
+
+    @classmethod
+    async def drain(cls, timeout: float = 10.0):
+        """写完队列中剩余的消息（插件停止时调用）"""
+        if cls._queue is not None:
+            await cls._queue.drain(timeout)
+
+    @classmethod
+    async def _store_batch(cls, batch: List[Tuple[Any, Any]]):
+        for message, chat_stream in batch:
+            try:
+                await MessageStorage.store_message(message, chat_stream)
+            except Exception as e:
+                logger.error(f"存储沉默期间的消息失败: {str(e)}\n{traceback.format_exc()}")
@@ -0,0 +1,159 @@
+from src.common.logger import get_logger
+from .silence_store import SilenceStore
+from .expiry_scheduler import ExpiryScheduler
+from typing import Any, Dict, List, Optional, Tuple
+import time
+
+logger = get_logger("Silence")
+
+class UserSilenceUtils:
+    """
+    只针对群聊中某个用户的沉默（用户沉默）
+    - 与 silence_someone_list 不同，只在指定的聊天流中生效，可以设置时长和原因
+    - 记录保存在 stream_id → user_id → (过期时间, 原因) 的两级字典里，每条消息的检查最多两次哈希查找，
+      没有任何用户沉默的聊天流一次查找就能返回
+    - 每条记录单独交给过期调度器，到期后主动清理，聊天流下的记录清空时连同一级字典一起移除
+    """
+
+    _scopes: Dict[str, Dict[str, Tuple[Optional[float], str]]] = {}  # 格式: {stream_id: {user_id: (过期时间戳 或 None, 原因)}}
+
+    # 状态版本号，用户沉默记录每次变化都会加一，供判定结果缓存校验
+    state_version: int = 0
+
+    _expiry: ExpiryScheduler
+
+    @classmethod
+    def add(cls, stream_id: str, user_id: Any, duration: Optional[float] = None, reason: str = "") -> bool:
+        """让麦麦在聊天流中忽略某个用户，duration 为 None 表示永久，已有记录时直接覆盖"""
+        if user_id is None or user_id == "":
+            return False
+        user_id = str(user_id)
+        expiration = None if duration is None else time.time() + duration
+        cls._scopes.setdefault(stream_id, {})[user_id] = (expiration, reason)
+        cls.state_version += 1
+        SilenceStore.save_user_silence(stream_id, user_id, expiration, reason)
+        if expiration is None:
+            cls._expiry.cancel((stream_id, user_id))
+        else:
+            cls._expiry.schedule((stream_id, user_id), expiration)
+        duration_str = f"{duration:g}秒" if duration else "永久"
+        logger.info(f"已在聊天流 {stream_id} 中沉默用户 {user_id}，持续时间: {duration_str}{f'，原因: {reason}' if reason else ''}")
+        return True
+
+    @classmethod
+    def remove(cls, stream_id: str, user_id: Any) -> bool:
+        """
+        解除聊天流中某个用户的沉默
+        返回: True=成功解除, False=本来就没有被沉默
+        """
+        user_id = str(user_id)
+        if not cls._discard(stream_id, user_id):
+            return False
+        SilenceStore.delete_user_silence(stream_id, user_id)
+        logger.info(f"已解除聊天流 {stream_id} 中用户 {user_id} 的沉默")
+        return True
+
+    @classmethod
+    def is_silenced(cls, stream_id: str, user_id: Any) -> Tuple[bool, str]:
+        """检查聊天流中的某个用户是否被沉默（int和str形式的ID均可）"""
+        users = cls._scopes.get(stream_id)
+        if users is None:
+            return False, ""
+        record = users.get(str(user_id))
+        if record is None:
+            return False, ""
+
+        expiration = record[0]
+        if expiration is None or expiration >= time.time():
+            return True, "user_silence"
+
+        # 过期调度器还没来得及清理，这里兜底
+        cls._expire((stream_id, str(user_id)))
+        return False, ""
+
+    @classmethod
+    def list_users(cls, stream_id: str) -> List[Tuple[str, Optional[float], str]]:
+        """按过期时间从早到晚列出聊天流中被沉默的用户（永久的排在最后），格式: [(user_id, 过期时间戳 或 None, 原因)]"""
+        now = time.time()
+        users = cls._scopes.get(stream_id, {})
+        entries = [(user_id, expiration, reason) for user_id, (expiration, reason) in users.items() if expiration is None or expiration >= now]
+        entries.sort(key=lambda entry: float("inf") if entry[1] is None else entry[1])
+        return entries
+
+    @classmethod
+    def restore(cls) -> int:
+        """
+        从本地数据库恢复用户沉默（已过期的记录会在恢复时被丢弃）
+        返回: 恢复的记录数量
+        """
+        rows = SilenceStore.load_user_silences()
+        cls._scopes = {}
+        for stream_id, user_id, expiration, reason in rows:
+            cls._scopes.setdefault(stream_id, {})[user_id] = (expiration, reason)
+            if expiration is not None:
+                cls._expiry.schedule((stream_id, user_id), expiration)
+        cls.state_version += 1
+        return len(rows)
+
+    @classmethod
+    def apply_remote(cls, stream_id: str, users: Dict[str, Tuple[Optional[float], str]]):
+        """把数据库中（由其他进程写入的）单个聊天流的用户沉默同步到内存，不会再写回数据库"""
+        old = cls._scopes.get(stream_id, {})
+        if old == users:
+            return
+        for user_id in old:
+            if user_id not in users:
+                cls._expiry.cancel((stream_id, user_id))
+        if users:
+            cls._scopes[stream_id] = dict(users)
+        else:
+            cls._scopes.pop(stream_id, None)
+        for user_id, (expiration, _) in users.items():
+            if expiration is None:
+                cls._expiry.cancel((stream_id, user_id))
+            else:
+                cls._expiry.schedule((stream_id, user_id), expiration)
+        cls.state_version += 1
+
+    @classmethod
+    def export_records(cls) -> Dict[str, Dict[str, Tuple[Optional[float], str]]]:
+        """导出全部用户沉默（副本），不做过期检查、不修改任何状态"""
+        return {stream_id: dict(users) for stream_id, users in cls._scopes.items()}
+
+    @classmethod
+    def start_background(cls):
+        """启动用户沉默过期调度（需要在事件循环中调用）"""
+        cls._expiry.start()
+
+    @classmethod
+    def stop_background(cls):
+        """停止用户沉默过期调度"""
+        cls._expiry.stop()
+
+    @classmethod
+    def _discard(cls, stream_id: str, user_id: str) -> bool:
+        """从内存中移除一条记录，聊天流下没有记录时连同一级字典一起移除"""
+        users = cls._scopes.get(stream_id)
+        if users is None or users.pop(user_id, None) is None:
+            return False
+        if not users:
+            del cls._scopes[stream_id]
+        cls._expiry.cancel((stream_id, user_id))
+        cls.state_version += 1
+        return True
+
+    @classmethod
+    def _expire(cls, key: Tuple[str, str]):
+        """清理已经过期的用户沉默（由过期调度器回调，记录已被覆盖或解除时什么也不做）"""
+        stream_id, user_id = key
+        record = cls._scopes.get(stream_id, {}).get(user_id)
+        if record is None:
+            return
+        expiration = record[0]
+        if expiration is None or expiration > time.time():
+            return
+        cls._discard(stream_id, user_id)
+        SilenceStore.delete_user_silence(stream_id, user_id)
+        logger.info(f"聊天流 {stream_id} 中用户 {user_id} 的沉默已过期，自动清理")
+
+UserSilenceUtils._expiry = ExpiryScheduler("用户沉默", UserSilenceUtils._expire)
@@ -0,0 +1,101 @@
+from src.common.logger import get_logger
+from typing import Any, Awaitable, Callable, List, Optional
+import asyncio
+import traceback
+
+logger = get_logger("Silence")
+
+class WriteBehindQueue:
+    """
+    有界的延迟写入队列
+    - 调用方只把数据放进队列，真正的写入由后台协程批量完成
+    - 攒够 batch_size 条或距离批次中第一条数据超过 flush_interval 秒时写入一批
+    - 队列满时 put 会等待（反压），put_nowait 则直接丢弃并计数
+    - drain 会尽快写完队列中剩余的数据后停止后台协程
+    """
+
+    def __init__(self, name: str, sink: Callable[[List[Any]], Awaitable[None]], max_size: int, batch_size: int, flush_interval: float):
+        self._name = name
+        self._sink = sink
+        self._max_size = max(1, max_size)
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = max(0.0, flush_interval)
+        self._queue: asyncio.Queue = asyncio.Queue(self._max_size)
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._draining = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, item: Any):
+        """放入一条数据，队列满时等待后台协程腾出空间"""
+        self.start()
+        await self._queue.put(item)
+        self._notify()
+
+    def put_nowait(self, item: Any) -> bool:
+        """放入一条数据，队列满时直接丢弃，返回是否放入成功"""
+        self.start()
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._notify()
+        return True
+
+    def start(self):
+        """启动后台写入协程（需要在事件循环中调用）"""
+        if self._task is not None and not self._task.done():
+            return
+        self._draining = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def drain(self, timeout: float = 10.0):
+        """写完队列中剩余的数据并停止后台协程"""
+        if self._task is None:
+            return
+        self._draining = True
+        self._batch_ready.set()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._name} 在 {timeout} 秒内没能写完，仍有 {self._queue.qsize()} 条数据未写入")
+        self._task.cancel()
+        self._task = None
+
+    def _notify(self):
+        if self._queue.qsize() >= self._batch_size:
+            self._batch_ready.set()
+
+    async def _run(self):
+        queue = self._queue
+        batch_ready = self._batch_ready
+        while True:
+            first = await queue.get()
+
+            # 不够一批时最多等待 flush_interval 秒
+            if not self._draining and queue.qsize() + 1 < self._batch_size:
+                try:
+                    await asyncio.wait_for(batch_ready.wait(), self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            if not self._draining:
+                batch_ready.clear()
+
+            batch = [first]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                await self._sink(batch)
+            except Exception as e:
+                logger.error(f"{self._name} 批量写入失败，丢弃 {len(batch)} 条数据: {str(e)}\n{traceback.format_exc()}")
+            finally:
+                for _ in batch:
+                    queue.task_done()